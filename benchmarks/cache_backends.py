@@ -0,0 +1,103 @@
+"""
+Сравнение бэкендов кэша на запросах, которые делают ленты записей.
+
+Запуск из корня репозитория:
+    python benchmarks/cache_backends.py --number 2000 --processes 4
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import django
+from django.conf import settings
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'yatube'))
+
+CARD = '<div class="card mb-3 mt-1 shadow-sm">' + 'текст записи ' * 100
+FRAGMENT = CARD * 10
+VERSIONS = ['version:posts', 'version:follows:1']
+CARDS = [f'post_card:{pk}:1634567890.123456:0' for pk in range(10)]
+
+
+def configure(directory):
+    shm = '/dev/shm' if os.path.isdir('/dev/shm') else directory
+    settings.configure(CACHES={
+        'locmem': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'filebased': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(directory, 'files'),
+        },
+        'shared_memory': {
+            'BACKEND': 'core.mmap_cache.SharedMemoryCache',
+            'LOCATION': os.path.join(shm, f'yatube-bench-{os.getpid()}'),
+        },
+        'two_tier': {
+            'BACKEND': 'core.cache.TwoTierCache',
+            'LOCATION': 'shared_memory',
+            'OPTIONS': {'IMMUTABLE_NAMESPACES': ['post_card', 'template']},
+        },
+    })
+    django.setup()
+
+
+def feed_request(cache):
+    """Что делает страница ленты при горячем кэше."""
+    cache.get_many(VERSIONS)
+    cache.get('template.cache.index_page.0123456789abcdef')
+    cache.get_many(CARDS)
+
+
+def cold_request(cache):
+    """Страница после изменения: новые версии, карточки и фрагмент."""
+    cache.set_many(dict.fromkeys(VERSIONS, time.time()), None)
+    cache.set_many(dict.fromkeys(CARDS, CARD), 86400)
+    cache.set('template.cache.index_page.0123456789abcdef', FRAGMENT, 21600)
+
+
+def measure(alias, pattern, number):
+    from django.core.cache import caches
+    cache = caches[alias]
+    cold_request(cache)
+    started = time.perf_counter()
+    for _ in range(number):
+        pattern(cache)
+    return (time.perf_counter() - started) / number * 1000000
+
+
+def parallel(alias, number, processes):
+    """Запросов горячей ленты в секунду на все процессы вместе."""
+    context = multiprocessing.get_context('fork')
+    with context.Pool(processes) as pool:
+        started = time.perf_counter()
+        pool.starmap(measure, [(alias, feed_request, number)] * processes)
+        elapsed = time.perf_counter() - started
+    return number * processes / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--number', type=int, default=2000)
+    parser.add_argument('--processes', type=int, default=4)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        configure(directory)
+        aliases = ['locmem', 'filebased', 'shared_memory', 'two_tier']
+        print(f'{"бэкенд":<15}{"горячая, мкс":>15}{"холодная, мкс":>15}'
+              f'{"процессы, з/с":>16}')
+        for alias in aliases:
+            hot = measure(alias, feed_request, args.number)
+            cold = measure(alias, cold_request, args.number // 10)
+            rate = 0
+            if alias != 'locmem':
+                rate = parallel(alias, args.number, args.processes)
+            print(f'{alias:<15}{hot:>15.1f}{cold:>15.1f}{rate:>16.0f}')
+        os.remove(settings.CACHES['shared_memory']['LOCATION'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+"""
+Нагрузка по HTTP на основные сценарии пользователя.
+
+Приложение запускается в этом процессе (многопоточный WSGI-сервер
+Django, DEBUG выключен) или под gunicorn, нагрузку дают потоки с
+keep-alive сессиями requests. Для каждого сценария выводятся запросы в
+секунду и задержки p50/p95/p99. С --baseline результат сравнивается с
+сохранённым JSON: падение пропускной способности или рост p95 больше
+--threshold отмечается, и скрипт завершается с кодом 1.
+
+Сценарии работают на данных из manage.py seed, входят под его
+пользователями с паролем --password. Запуск из корня репозитория:
+    (cd yatube && python manage.py seed --users 2000 --posts 100000)
+    python benchmarks/http_load.py --baseline benchmarks/http_load.json
+    python benchmarks/http_load.py --save benchmarks/http_load.json
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import warnings
+
+import django
+import requests
+
+YATUBE = os.path.join(os.path.dirname(__file__), '..', 'yatube')
+sys.path.insert(0, YATUBE)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+DEEP_PAGES = (50, 500)
+SAMPLE = 200
+
+
+class Sample:
+    """Пользователи, записи и курсоры глубоких страниц из базы."""
+
+    def __init__(self, rng):
+        from django.db.models import Max
+
+        from posts.models import Post, User
+        from posts.paginator import AFTER, encode_cursor
+        self.usernames = list(User.objects.filter(
+            email__endswith='@example.com', is_active=True
+        ).values_list('username', flat=True)[:SAMPLE])
+        if not self.usernames:
+            sys.exit('В базе нет пользователей seed: сначала manage.py seed')
+        last = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+        self.posts = []
+        for _ in range(SAMPLE):
+            found = Post.objects.filter(
+                pk__gte=rng.randint(1, last)
+            ).order_by('pk').values_list('pk', 'author__username')[:1]
+            self.posts.extend(found)
+        ordered = Post.objects.order_by('-pub_date', '-pk')
+        self.cursors = []
+        for _ in range(SAMPLE // 10):
+            page = rng.randint(*DEEP_PAGES)
+            key = ordered.values_list('pub_date', 'pk')[page * 10 - 1:][:1]
+            self.cursors.extend(
+                encode_cursor(AFTER, found, page + 1) for found in key
+            )
+
+
+class Visitor:
+    """Сессия одного пользователя: вход по форме и токен JWT."""
+
+    def __init__(self, base, username=None, password=None):
+        self.base = base
+        self.session = requests.Session()
+        self.headers = {}
+        if username:
+            self.login(username, password)
+
+    def login(self, username, password):
+        self.session.get(f'{self.base}/auth/login/')
+        response = self.session.post(f'{self.base}/auth/login/', data={
+            'username': username, 'password': password,
+            'csrfmiddlewaretoken': self.session.cookies['csrftoken'],
+        }, allow_redirects=False)
+        if response.status_code != 302:
+            sys.exit(f'Не удалось войти как {username}: неверный пароль?')
+        token = self.session.post(f'{self.base}/api/v1/jwt/create/', json={
+            'username': username, 'password': password,
+        }).json()['access']
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def get(self, path, **kwargs):
+        return self.session.get(self.base + path, **kwargs)
+
+    def post(self, path, data):
+        data['csrfmiddlewaretoken'] = self.session.cookies['csrftoken']
+        return self.session.post(
+            self.base + path, data=data, allow_redirects=False
+        )
+
+
+def index(visitor, sample, rng):
+    return visitor.get('/')
+
+
+def deep_pagination(visitor, sample, rng):
+    return visitor.get('/', params={'cursor': rng.choice(sample.cursors)})
+
+
+def profile(visitor, sample, rng):
+    return visitor.get(f'/{rng.choice(sample.usernames)}/')
+
+
+def follow_feed(visitor, sample, rng):
+    return visitor.get('/follow/')
+
+
+def new_post(visitor, sample, rng):
+    return visitor.post('/new/', {'text': f'Под нагрузкой {rng.random()}'})
+
+
+def comment(visitor, sample, rng):
+    post_id, username = rng.choice(sample.posts)
+    return visitor.post(
+        f'/{username}/{post_id}/comment/', {'text': 'Ответ под нагрузкой'}
+    )
+
+
+def api_read(visitor, sample, rng):
+    return visitor.get(
+        '/api/v1/posts/', params={'limit': 20}, headers=visitor.headers
+    )
+
+
+def api_write(visitor, sample, rng):
+    return visitor.session.post(
+        f'{visitor.base}/api/v1/posts/',
+        json={'text': f'Запись через API {rng.random()}'},
+        headers=visitor.headers
+    )
+
+
+# Сценарий: функция и нужен ли вход.
+JOURNEYS = {
+    'index': (index, False),
+    'deep_pagination': (deep_pagination, False),
+    'profile': (profile, False),
+    'follow_feed': (follow_feed, True),
+    'new_post': (new_post, True),
+    'comment': (comment, True),
+    'api_read': (api_read, True),
+    'api_write': (api_write, True),
+}
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def serve_in_process(port):
+    from django.conf import settings
+    from django.core.servers.basehttp import (ThreadedWSGIServer,
+                                              WSGIRequestHandler)
+    from django.core.wsgi import get_wsgi_application
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    # Как в продакшене: без панели отладки и журнала запросов к базе.
+    settings.DEBUG = False
+    server = ThreadedWSGIServer(('127.0.0.1', port), QuietHandler)
+    server.set_app(get_wsgi_application())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.shutdown
+
+
+def serve_gunicorn(port, workers):
+    process = subprocess.Popen([
+        'gunicorn', 'yatube.wsgi:application', '--bind', f'127.0.0.1:{port}',
+        '--workers', str(workers), '--log-level', 'warning',
+    ], cwd=YATUBE)
+    for _ in range(100):
+        try:
+            requests.get(f'http://127.0.0.1:{port}/about/author/', timeout=1)
+            break
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    return process.terminate
+
+
+def percentile(latencies, fraction):
+    if not latencies:
+        return float('nan')
+    return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+
+def run(journey, visitors, sample, duration, seed):
+    """Потоки по числу посетителей крутят сценарий duration секунд."""
+    function, _ = JOURNEYS[journey]
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+
+    def work(number, visitor):
+        rng = random.Random(f'{seed}:{journey}:{number}')
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = function(visitor, sample, rng)
+            elapsed = (time.perf_counter() - started) * 1000
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+            else:
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=work, args=(number, visitor))
+        for number, visitor in enumerate(visitors)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50': round(percentile(latencies, 0.5), 1),
+        'p95': round(percentile(latencies, 0.95), 1),
+        'p99': round(percentile(latencies, 0.99), 1),
+        'errors': len(errors),
+    }
+
+
+def regressions(result, baseline, threshold):
+    """Что хуже базовой линии больше чем на threshold."""
+    found = []
+    if result['rps'] < baseline['rps'] * (1 - threshold):
+        found.append(f'rps {baseline["rps"]} → {result["rps"]}')
+    if result['p95'] > baseline['p95'] * (1 + threshold):
+        found.append(f'p95 {baseline["p95"]} → {result["p95"]}')
+    if result['errors'] > baseline.get('errors', 0):
+        found.append(f'ошибок {result["errors"]}')
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--server', choices=('inprocess', 'gunicorn'), default='inprocess'
+    )
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument(
+        '--duration', type=float, default=10, help='Секунд на сценарий'
+    )
+    parser.add_argument(
+        '--journeys', nargs='+', choices=JOURNEYS, default=list(JOURNEYS)
+    )
+    parser.add_argument('--password', default='yatube-seed')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', help='JSON для сравнения')
+    parser.add_argument('--save', help='Сохранить результат как JSON')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+    # Тестовый SECRET_KEY короче, чем хочет PyJWT: предупреждения мешают.
+    warnings.filterwarnings('ignore', module='jwt')
+    django.setup()
+    sample = Sample(random.Random(args.seed))
+    port = free_port()
+    if args.server == 'gunicorn':
+        stop = serve_gunicorn(port, args.workers)
+    else:
+        stop = serve_in_process(port)
+    base = f'http://127.0.0.1:{port}'
+    anonymous = [Visitor(base) for _ in range(args.concurrency)]
+    members = [
+        Visitor(base, username, args.password)
+        for username in sample.usernames[:args.concurrency]
+    ]
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as source:
+            baseline = json.load(source)['journeys']
+    results, failed = {}, False
+    print(f'{"сценарий":<18}{"зап/с":>8}{"p50, мс":>10}{"p95, мс":>10}'
+          f'{"p99, мс":>10}{"ошибки":>8}')
+    try:
+        for journey in args.journeys:
+            visitors = members if JOURNEYS[journey][1] else anonymous
+            result = run(journey, visitors, sample, args.duration, args.seed)
+            results[journey] = result
+            found = []
+            if journey in baseline:
+                found = regressions(result, baseline[journey], args.threshold)
+            failed = failed or bool(found)
+            print(f'{journey:<18}{result["rps"]:>8.0f}{result["p50"]:>10.1f}'
+                  f'{result["p95"]:>10.1f}{result["p99"]:>10.1f}'
+                  f'{result["errors"]:>8}'
+                  + (f'  РЕГРЕССИЯ: {", ".join(found)}' if found else ''))
+    finally:
+        stop()
+    if args.save:
+        with open(args.save, 'w') as output:
+            json.dump({
+                'server': args.server, 'concurrency': args.concurrency,
+                'journeys': results,
+            }, output, ensure_ascii=False, indent=2)
+            output.write('\n')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+"""
+Микробенчмарки горячих участков: шаблон карточки, сериализаторы API,
+постраничный вывод и построение ссылок.
+
+Данные создаются в отдельной тестовой базе в памяти, DEBUG выключен.
+Каждый замер сначала прогревается, число вызовов подбирается так, чтобы
+повтор длился не меньше 0,2 с, а из --repeat повторов берутся медиана
+и минимум на вызов. Результат дописывается строкой JSON в --history и
+сравнивается с прошлым результатом того же замера. Имя замера
+начинается со слоя (template, serializer, paginator, urls), поэтому по
+изменениям видно, где появилась регрессия.
+
+Запуск из корня репозитория:
+    python benchmarks/micro.py
+    python benchmarks/micro.py --only serializer --no-save
+"""
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+
+import django
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'yatube'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+HISTORY = os.path.join(os.path.dirname(__file__), 'micro_history.jsonl')
+POSTS = 1000
+USERS = 20
+
+
+def create_data():
+    from django.utils import timezone
+
+    from posts.models import Comment, Group, Post, User
+    User.objects.bulk_create(
+        User(username=f'reader{number}') for number in range(USERS)
+    )
+    users = list(User.objects.order_by('pk'))
+    group = Group.objects.create(
+        title='Группа', slug='group', description='Описание'
+    )
+    now = timezone.now()
+    Post.objects.bulk_create(
+        Post(
+            text='Текст записи\nв две строки ' * 10,
+            author=users[number % USERS],
+            group=group if number % 3 == 0 else None,
+            pub_date=now - dt.timedelta(minutes=number),
+            updated=now, comments_count=number % 5,
+        )
+        for number in range(POSTS)
+    )
+    post = Post.objects.first()
+    Comment.objects.bulk_create(
+        Comment(post=post, author=users[number % USERS], text='Ответ')
+        for number in range(100)
+    )
+
+
+def template_cases(request, posts):
+    from django.template import RequestContext, engines
+
+    engine = engines['django'].engine
+    page = engine.from_string(
+        '{% for post in posts %}{% include "post_item.html" %}{% endfor %}'
+    )
+
+    def render(count):
+        return lambda: page.render(
+            RequestContext(request, {'posts': posts[:count]})
+        )
+
+    return {
+        f'template.post_item.{count}': render(count)
+        for count in (10, 100, 1000)
+    }
+
+
+def serializer_cases(request, posts, comments):
+    from api.serializers import (CommentSerializer,
+                                 FollowSerializer,
+                                 PostSerializer)
+
+    def follow():
+        serializer = FollowSerializer(
+            data={'author': 'reader1'}, context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+
+    return {
+        'serializer.post.10': lambda: PostSerializer(
+            posts[:10], many=True
+        ).data,
+        'serializer.post.100': lambda: PostSerializer(
+            posts[:100], many=True
+        ).data,
+        'serializer.comment.100': lambda: CommentSerializer(
+            comments, many=True
+        ).data,
+        'serializer.follow.validate': follow,
+    }
+
+
+def paginator_cases(posts):
+    from django.core.paginator import Paginator
+
+    from posts.models import Post
+    from posts.paginator import AFTER, KeysetPaginator, encode_cursor
+    queryset = Post.objects.select_related('author', 'group').order_by(
+        '-pub_date', '-pk'
+    )
+    edge = posts[499]
+    cursor = encode_cursor(AFTER, (edge.pub_date, edge.pk), 51)
+    return {
+        'paginator.offset.page_50': lambda: list(
+            Paginator(queryset, 10).page(50)
+        ),
+        'paginator.keyset.page_51': lambda: list(
+            KeysetPaginator(Post.objects.select_related(
+                'author', 'group'
+            ), 10).get_page(cursor=cursor)
+        ),
+    }
+
+
+def url_cases(posts):
+    from django.urls import reverse
+
+    def links():
+        for post in posts[:10]:
+            username = post.author.username
+            reverse('profile', args=[username])
+            reverse('post_view', args=[username, post.id])
+            reverse('post_edit', args=[username, post.id])
+            if post.group:
+                reverse('group_posts', args=[post.group.slug])
+
+    return {'urls.post_item.10': links}
+
+
+def cases():
+    from django.test import RequestFactory
+
+    from posts.models import Comment, Post, User
+    create_data()
+    posts = list(Post.objects.select_related('author', 'group').order_by(
+        '-pub_date', '-pk'
+    ))
+    comments = list(Comment.objects.select_related('author'))
+    request = RequestFactory().get('/')
+    request.user = User.objects.get(username='reader0')
+    return {
+        **template_cases(request, posts),
+        **serializer_cases(request, posts, comments),
+        **paginator_cases(posts),
+        **url_cases(posts),
+    }
+
+
+def measure(function, repeat):
+    """Медиана и минимум на вызов, мкс, после прогрева."""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    timer.timeit(number)
+    times = [
+        elapsed / number * 1000000
+        for elapsed in timer.repeat(repeat, number)
+    ]
+    return {
+        'median': round(statistics.median(times), 2),
+        'min': round(min(times), 2),
+        'calls': number,
+    }
+
+
+def commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous(path):
+    """Последний результат каждого замера в истории."""
+    latest = {}
+    if os.path.exists(path):
+        with open(path) as history:
+            for line in filter(str.strip, history):
+                latest.update(json.loads(line)['results'])
+    return latest
+
+
+def change(result, before):
+    if not before:
+        return ''
+    delta = (result['median'] / before['median'] - 1) * 100
+    return f'{delta:>+10.1f}%'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument(
+        '--only', nargs='+', default=[],
+        help='Подстроки имён замеров, например template paginator'
+    )
+    parser.add_argument('--history', default=HISTORY)
+    parser.add_argument(
+        '--no-save', action='store_true', help='Не дописывать в историю'
+    )
+    args = parser.parse_args()
+    django.setup()
+    from django.conf import settings
+    from django.test.utils import (setup_databases,
+                                   setup_test_environment,
+                                   teardown_databases)
+
+    # Без журнала запросов и отладочных шаблонов, как в продакшене.
+    settings.DEBUG = False
+    setup_test_environment(debug=False)
+    databases = setup_databases(verbosity=0, interactive=False)
+    before = previous(args.history)
+    results = {}
+    print(f'{"замер":<30}{"медиана, мкс":>14}{"минимум, мкс":>14}'
+          f'{"к прошлому":>11}')
+    try:
+        for name, function in cases().items():
+            if args.only and not any(part in name for part in args.only):
+                continue
+            results[name] = measure(function, args.repeat)
+            print(f'{name:<30}{results[name]["median"]:>14.1f}'
+                  f'{results[name]["min"]:>14.1f}'
+                  f'{change(results[name], before.get(name))}')
+    finally:
+        teardown_databases(databases, verbosity=0)
+    if not args.no_save:
+        with open(args.history, 'a') as history:
+            history.write(json.dumps({
+                'date': dt.datetime.now(dt.timezone.utc).isoformat(
+                    timespec='seconds'
+                ),
+                'commit': commit(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'results': results,
+            }, ensure_ascii=False) + '\n')
+
+
+if __name__ == '__main__':
+    main()
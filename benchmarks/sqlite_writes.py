@@ -0,0 +1,117 @@
+"""
+Конкурентная запись в SQLite: стандартная настройка и рабочий режим.
+
+Несколько процессов, как воркеры gunicorn, выполняют транзакции вида
+«прочитать счётчик, добавить запись, обновить счётчик». Для каждого
+режима выводятся ошибки «database is locked» и задержки транзакций.
+
+Запуск из корня репозитория:
+    python benchmarks/sqlite_writes.py --processes 8 --number 300
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import django
+from django.conf import settings
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'yatube'))
+
+MODES = {
+    'stock': {'ENGINE': 'django.db.backends.sqlite3'},
+    'production': {'ENGINE': 'core.backends.sqlite3'},
+}
+
+
+def create_database(path):
+    with sqlite3.connect(path) as connection:
+        connection.executescript(
+            'CREATE TABLE post (id INTEGER PRIMARY KEY, author, text);'
+            'CREATE TABLE stats (author PRIMARY KEY, posts);'
+            'INSERT INTO stats VALUES (0, 0), (1, 0), (2, 0), (3, 0);'
+        )
+
+
+def configure(mode, path):
+    from yatube import settings as project
+    database = {'NAME': path, **MODES[mode]}
+    if mode == 'production':
+        database['OPTIONS'] = project.SQLITE_OPTIONS
+    settings.configure(DATABASES={'default': database})
+    django.setup()
+
+
+def write(number, seed):
+    """Задержки успешных транзакций, мс, и число ошибок блокировки."""
+    from django.db import OperationalError, connection, transaction
+    author = seed % 4
+    latencies, errors = [], 0
+    for _ in range(number):
+        started = time.perf_counter()
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT posts FROM stats WHERE author = %s', [author]
+                )
+                cursor.fetchone()
+                cursor.execute(
+                    'INSERT INTO post (author, text) VALUES (%s, %s)',
+                    [author, 'текст записи ' * 20]
+                )
+                cursor.execute(
+                    'UPDATE stats SET posts = posts + 1 WHERE author = %s',
+                    [author]
+                )
+        except OperationalError:
+            errors += 1
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies, errors
+
+
+def run(mode, processes, number):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sqlite3')
+        create_database(path)
+        context = multiprocessing.get_context('fork')
+        with context.Pool(
+            processes, initializer=configure, initargs=(mode, path)
+        ) as pool:
+            started = time.perf_counter()
+            results = pool.starmap(
+                write, [(number, seed) for seed in range(processes)]
+            )
+            elapsed = time.perf_counter() - started
+    latencies = sorted(sum((result[0] for result in results), []))
+    errors = sum(result[1] for result in results)
+    return len(latencies) / elapsed, errors, latencies
+
+
+def percentile(latencies, fraction):
+    if not latencies:
+        return float('nan')
+    return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--number', type=int, default=300)
+    args = parser.parse_args()
+    print(f'{"режим":<12}{"тр/с":>8}{"ошибки":>8}{"p50, мс":>10}'
+          f'{"p99, мс":>10}{"max, мс":>10}')
+    for mode in MODES:
+        rate, errors, latencies = run(mode, args.processes, args.number)
+        median = statistics.median(latencies) if latencies else float('nan')
+        print(f'{mode:<12}{rate:>8.0f}{errors:>8}{median:>10.1f}'
+              f'{percentile(latencies, 0.99):>10.1f}'
+              f'{latencies[-1] if latencies else float("nan"):>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -123,3 +123,27 @@ def follow_4(another_user_2, user):
 def follow_5(user_2, user):
     from posts.models import Follow
     return Follow.objects.create(user=user, author=user_2)
+
+
+@pytest.fixture
+def seed_feeds(user, another_user_2, group):
+    """Return a function that tops up every feed to `size` posts."""
+    from posts import feed
+    from posts.models import Comment, Follow
+
+    def seed(size):
+        for author in (user, another_user_2):
+            missing = size - author.posts.count()
+            Post.objects.bulk_create(
+                Post(text=f'Тестовый пост {number}', author=author, group=group)
+                for number in range(max(missing, 0))
+            )
+        Comment.objects.bulk_create(
+            Comment(text='Коммент', post=post, author=another_user_2)
+            for post in Post.objects.filter(comments=None)
+        )
+        Follow.objects.get_or_create(user=user, author=another_user_2)
+        feed.rebuild()
+        return Post.objects.filter(author=user).first()
+
+    return seed
@@ -0,0 +1,123 @@
+from importlib import import_module
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.plans import walk
+
+pytestmark = [pytest.mark.django_db]
+
+URL_MODULES = ('posts.urls', 'api.urls', 'users.urls', 'about.urls')
+
+SIZES = (10, 1000)
+
+# Максимальное число SQL-запросов на один GET-запрос к маршруту.
+QUERY_BUDGETS = {
+    'index': 5,
+    'new_post': 3,
+    'follow_index': 6,
+    'group_posts': 6,
+    'profile': 7,
+    'post_view': 5,
+    'post_edit': 5,
+    'add_comment': 3,
+    'profile_follow': 3,
+    'profile_unfollow': 3,
+    'search': 4,
+    'api-root': 1,
+    'post-list': 2,
+    'post-detail': 2,
+    'group-list': 2,
+    'group-detail': 2,
+    'follow-list': 2,
+    'autocomplete-list': 3,
+    'export-posts': 1,
+    'export-comments': 1,
+    'export-follows': 1,
+    'comments-list': 3,
+    'comments-detail': 3,
+    'jwt-create': 0,
+    'jwt-refresh': 0,
+    'jwt-verify': 0,
+    'signup': 2,
+    'about:author': 2,
+    'about:tech': 2,
+}
+ROUTE_QUERIES = {
+    'search': {'q': 'тестовые посты'},
+    'autocomplete-list': {'q': 'test'},
+}
+
+
+def named_routes():
+    routes = {}
+    for module_name in URL_MODULES:
+        module = import_module(module_name)
+        namespace = getattr(module, 'app_name', None)
+        for name, params in walk(module.urlpatterns, namespace):
+            routes.setdefault(name, params)
+    return routes
+
+
+def route_kwargs(name, params, post):
+    objects = {
+        'post': post,
+        'group': post.group,
+        'comments': post.comments.first(),
+    }
+    values = {
+        'username': post.author.username,
+        'post_id': post.id,
+        'slug': post.group.slug,
+        'pk': getattr(objects.get(name.split('-')[0]), 'pk', None),
+    }
+    return {param: values[param] for param in params}
+
+
+def measure(client, token, routes, post):
+    cache.clear()
+    results = {}
+    for name, params in routes.items():
+        path = reverse(name, kwargs=route_kwargs(name, params, post))
+        with CaptureQueriesContext(connection) as queries:
+            client.get(
+                path, ROUTE_QUERIES.get(name),
+                HTTP_AUTHORIZATION=f'Bearer {token["access"]}'
+            )
+        sql_time = sum(float(query['time']) for query in queries)
+        results[name] = (len(queries), sql_time)
+    return results
+
+
+class TestQueryBudget:
+
+    def test_every_route_has_budget(self):
+        missing = set(named_routes()) - set(QUERY_BUDGETS)
+        assert not missing, (
+            f'Объявите бюджет запросов в `QUERY_BUDGETS` для маршрутов {missing}'
+        )
+
+    def test_queries_do_not_grow_with_data(self, user_client, token,
+                                           seed_feeds, record_property):
+        routes = named_routes()
+        measurements = [
+            measure(user_client, token, routes, seed_feeds(size))
+            for size in SIZES
+        ]
+        for name in routes:
+            (small, small_time), (large, large_time) = (
+                measurement[name] for measurement in measurements
+            )
+            record_property(name, f'{small}/{large} запросов, {large_time:.3f}с')
+            assert large <= small, (
+                f'Маршрут `{name}` выполняет {small} SQL-запросов при {SIZES[0]} '
+                f'записях и {large} при {SIZES[1]}: число запросов растёт с данными'
+            )
+            budget = QUERY_BUDGETS.get(name, 0)
+            assert large <= budget, (
+                f'Маршрут `{name}` выполняет {large} SQL-запросов, '
+                f'бюджет `QUERY_BUDGETS` — {budget}'
+            )
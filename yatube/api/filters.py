@@ -0,0 +1,26 @@
+from rest_framework import filters
+
+from posts import search, usernames
+
+
+class PostSearchFilter(filters.SearchFilter):
+    """Полнотекстовый поиск по записям вместо LIKE по search_fields."""
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not query.strip():
+            return queryset
+        return search.search(query, queryset)
+
+
+class FollowSearchFilter(filters.SearchFilter):
+    """Поиск подписок по имени автора без LIKE, с учётом опечаток."""
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not query.strip():
+            return queryset
+        authors = queryset.values_list('author_id', flat=True)
+        return queryset.filter(author_id__in=usernames.index.matching(
+            query, limit=None, candidates=list(authors)
+        ))
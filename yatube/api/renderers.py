@@ -0,0 +1,15 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework import renderers
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """Одна строка JSON: так в выгрузке отдаются ошибки."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        line = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+        return f'{line}\n'.encode()
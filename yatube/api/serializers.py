@@ -1,9 +1,19 @@
 from rest_framework import serializers, validators
 
+from posts import shards
 from posts.models import Comment, Follow, Group, Post, User
 
 
+class ShardIdField(serializers.IntegerField):
+    """id шардов больше 2**53: в JSON строкой, чтобы не терялись в JS."""
+
+    def to_representation(self, value):
+        value = super().to_representation(value)
+        return str(value) if shards.enabled() else value
+
+
 class PostSerializer(serializers.ModelSerializer):
+    id = ShardIdField(read_only=True)
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True
@@ -22,6 +32,8 @@ class GroupSerializer(serializers.ModelSerializer):
 
 
 class CommentSerializer(serializers.ModelSerializer):
+    id = ShardIdField(read_only=True)
+    post = ShardIdField(source='post_id', read_only=True)
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True
@@ -29,7 +41,6 @@ class CommentSerializer(serializers.ModelSerializer):
 
     class Meta:
         fields = '__all__'
-        read_only_fields = ('post',)
         model = Comment
 
 
@@ -59,3 +70,10 @@ class FollowSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 'Пользователь не может подписаться сам на себя!')
         return data
+
+
+class UsernameSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        fields = ('id', 'username')
+        model = User
@@ -1,18 +1,38 @@
 from django.urls import include, path
-from rest_framework import routers
+from rest_framework import permissions, routers
 
-from api.views import CommentViewSet, FollowViewSet, GroupViewSet, PostViewSet
+from api.views import (AutocompleteViewSet,
+                       CommentViewSet,
+                       ExportView,
+                       FollowViewSet,
+                       GroupViewSet,
+                       PostViewSet)
 
 router = routers.DefaultRouter()
 router.register('posts', PostViewSet)
 router.register('groups', GroupViewSet)
 router.register('follow', FollowViewSet, basename='follow')
+router.register('autocomplete', AutocompleteViewSet, basename='autocomplete')
 router.register(
-    r'^posts/(?P<post_id>\d+)/comments',
+    r'posts/(?P<post_id>\d+)/comments',
     CommentViewSet, basename='comments'
 )
 
 urlpatterns = [
     path('v1/', include(router.urls)),
     path('v1/', include('djoser.urls.jwt')),
+    path(
+        'v1/export/posts/', ExportView.as_view(dataset='posts'),
+        name='export-posts'
+    ),
+    path(
+        'v1/export/comments/', ExportView.as_view(dataset='comments'),
+        name='export-comments'
+    ),
+    path(
+        'v1/export/follows/', ExportView.as_view(
+            dataset='follows', permission_classes=(permissions.IsAdminUser,)
+        ),
+        name='export-follows'
+    ),
 ]
@@ -1,12 +1,25 @@
-from django.shortcuts import get_object_or_404
-from rest_framework import filters, mixins, pagination, permissions, viewsets
-
+import re
+
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework import (exceptions,
+                            mixins,
+                            pagination,
+                            permissions,
+                            views,
+                            viewsets)
+from rest_framework.response import Response
+
+from api.filters import FollowSearchFilter, PostSearchFilter
 from api.permissions import AuthorOrReadOnly
+from api.renderers import NDJSONRenderer
 from api.serializers import (CommentSerializer,
                              FollowSerializer,
                              GroupSerializer,
-                             PostSerializer)
-from posts.models import Group, Post
+                             PostSerializer,
+                             UsernameSerializer)
+from posts import export, shards, usernames
+from posts.models import Group, Post, User
 
 
 class PostViewSet(viewsets.ModelViewSet):
@@ -14,6 +27,20 @@ class PostViewSet(viewsets.ModelViewSet):
     serializer_class = PostSerializer
     permission_classes = (AuthorOrReadOnly,)
     pagination_class = pagination.LimitOffsetPagination
+    filter_backends = (PostSearchFilter,)
+    search_fields = ('text',)
+
+    def get_queryset(self):
+        return shards.scatter(Post.objects.with_related()).order_by(
+            '-pub_date', '-pk'
+        )
+
+    def get_object(self):
+        post = shards.find_or_404(
+            Post.objects.with_related(), pk=self.kwargs[self.lookup_field]
+        )
+        self.check_object_permissions(self.request, post)
+        return post
 
     def perform_create(self, serializer):
         author = self.request.user
@@ -30,16 +57,16 @@ class CommentViewSet(viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = (AuthorOrReadOnly,)
 
-    def get_queryset(self):
+    def get_post(self):
         post_id = self.kwargs['post_id']
-        post = get_object_or_404(Post, pk=post_id)
-        return post.comments.all()
+        return shards.find_or_404(Post.objects.all(), pk=post_id)
+
+    def get_queryset(self):
+        return self.get_post().comments.with_related('author')
 
     def perform_create(self, serializer):
         author = self.request.user
-        post_id = self.kwargs['post_id']
-        post = get_object_or_404(Post, pk=post_id)
-        serializer.save(author=author, post=post)
+        serializer.save(author=author, post=self.get_post())
 
 
 class CreateListViewSet(
@@ -50,13 +77,60 @@ class CreateListViewSet(
 
 class FollowViewSet(CreateListViewSet):
     serializer_class = FollowSerializer
-    filter_backends = (filters.SearchFilter,)
+    filter_backends = (FollowSearchFilter,)
     search_fields = ('author__username',)
 
     def get_queryset(self):
         user = self.request.user
-        return user.follower.all()
+        return user.follower.select_related('user', 'author')
 
     def perform_create(self, serializer):
         user = self.request.user
         serializer.save(user=user)
+
+
+class AutocompleteViewSet(viewsets.ViewSet):
+    """Имена пользователей по началу или с опечаткой: ?q=имя."""
+
+    def list(self, request):
+        found = usernames.index.search(request.query_params.get('q', ''))
+        users = User.objects.only('username').in_bulk(found)
+        serializer = UsernameSerializer(
+            [users[pk] for pk in found if pk in users], many=True
+        )
+        return Response(serializer.data)
+
+
+class ExportView(views.APIView):
+    """
+    Выгрузка набора данных целиком в NDJSON, строки по возрастанию id.
+
+    ?since= и ?until= принимают id или дату; чтобы продолжить прерванную
+    выгрузку, достаточно передать since=последний id + 1. При
+    Accept-Encoding: gzip ответ сжимается на лету.
+    """
+    dataset = None
+    renderer_classes = (NDJSONRenderer,)
+    accepts_gzip = re.compile(r'\bgzip\b')
+
+    def get(self, request):
+        dataset = export.DATASETS[self.dataset]
+        try:
+            conditions = export.filters(
+                dataset, request.query_params.get('since'),
+                request.query_params.get('until')
+            )
+        except ValueError as error:
+            raise exceptions.ValidationError({'detail': str(error)})
+        chunks = export.chunks(dataset, conditions)
+        gzip = self.accepts_gzip.search(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        response = StreamingHttpResponse(
+            export.compress(chunks) if gzip else chunks,
+            content_type=NDJSONRenderer.media_type
+        )
+        if gzip:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
@@ -0,0 +1,109 @@
+import os
+import re
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib import admin
+from django.http import (FileResponse,
+                         Http404,
+                         HttpResponseBadRequest,
+                         QueryDict)
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import path, reverse
+from django.utils.html import format_html
+from django.utils.http import is_safe_url
+
+from core import models, profiling
+
+# Браузеры выбрасывают пробелы и управляющие символы, а «\» читают как
+# «/»: «/\t/evil.com» и «/\evil.com» ведут на чужой сайт.
+UNSAFE = re.compile(r'[\s\\\x00-\x1f\x7f]')
+
+
+@admin.register(models.RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """
+    Профили запросов. Ссылку на профилирование страницы выдаёт
+    link/?path=/адрес/ этого раздела, она действует PROFILE_LINK_MAX_AGE
+    секунд.
+    """
+    list_display = (
+        'created', 'method', 'path', 'status_code', 'duration', 'sql_time',
+        'template_time', 'cards_time', 'thumbnail_time',
+    )
+    list_filter = ('created', 'status_code')
+    search_fields = ('path',)
+    exclude = ('report',)
+    readonly_fields = (
+        'created', 'user', 'method', 'path', 'status_code', 'duration',
+        'sql_time', 'template_time', 'cards_time', 'thumbnail_time',
+        'download', 'cumulative',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path('link/', self.admin_site.admin_view(self.link_view),
+                 name='core_requestprofile_link'),
+            path('<int:pk>/download/',
+                 self.admin_site.admin_view(self.download_view),
+                 name='core_requestprofile_download'),
+            *super().get_urls(),
+        ]
+
+    def link_view(self, request):
+        target = request.GET.get('path', '')
+        url = urlsplit(target)
+        if not target.startswith('/') or UNSAFE.search(target) or not (
+            is_safe_url(target, allowed_hosts=None)
+        ):
+            return HttpResponseBadRequest('Нужен путь вида /username/')
+        query = QueryDict(url.query, mutable=True)
+        query[profiling.PARAMETER] = profiling.sign(url.path, request.user)
+        return redirect(f'{url.path}?{query.urlencode()}')
+
+    def download_view(self, request, pk):
+        profile = get_object_or_404(models.RequestProfile, pk=pk)
+        filename = os.path.join(settings.PROFILES_DIR, profile.file)
+        if not os.path.exists(filename):
+            raise Http404
+        return FileResponse(
+            open(filename, 'rb'), as_attachment=True, filename=profile.file
+        )
+
+    def download(self, obj):
+        return format_html(
+            '<a href="{}">{}</a> (snakeviz, python -m pstats)',
+            reverse('admin:core_requestprofile_download', args=[obj.pk]),
+            obj.file
+        )
+
+    def cumulative(self, obj):
+        return format_html('<pre>{}</pre>', obj.report)
+
+
+@admin.register(models.QueryStat)
+class QueryStatAdmin(admin.ModelAdmin):
+    """Формы SQL-запросов, самые дорогие в сумме сверху."""
+    list_display = (
+        'fingerprint', 'view', 'template', 'count', 'total_time',
+        'mean_time', 'max_time',
+    )
+    list_filter = ('view',)
+    search_fields = ('fingerprint', 'view', 'template')
+    readonly_fields = list_display
+    exclude = ('digest',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def mean_time(self, obj):
+        return round(obj.mean_time, 2)
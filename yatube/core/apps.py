@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+from django.core.signals import request_finished
+
+
+class CoreConfig(AppConfig):
+    name = 'core'
+
+    def ready(self):
+        from core import querystats
+        request_finished.connect(querystats.recorder.flush_if_due)
@@ -0,0 +1,43 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite для нескольких процессов gunicorn.
+
+    OPTIONS['init_command'] — PRAGMA через ';', которые выполняются на
+    каждом новом соединении. OPTIONS['transaction_mode'] = 'IMMEDIATE'
+    берёт блокировку записи в начале транзакции: иначе транзакция,
+    начавшаяся с чтения, при первой записи сразу получает «database is
+    locked», не дожидаясь busy_timeout. OPTIONS['foreign_keys'] = False
+    отключает проверку внешних ключей — для шардов, где нет таблиц, на
+    которые ссылаются строки.
+    """
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        kwargs.pop('init_command', None)
+        kwargs.pop('transaction_mode', None)
+        kwargs.pop('foreign_keys', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        init_command = self.settings_dict['OPTIONS'].get('init_command', '')
+        for statement in filter(str.strip, init_command.split(';')):
+            conn.execute(statement)
+        if not self.foreign_keys:
+            conn.execute('PRAGMA foreign_keys = OFF')
+        return conn
+
+    @property
+    def foreign_keys(self):
+        return self.settings_dict['OPTIONS'].get('foreign_keys', True)
+
+    def enable_constraint_checking(self):
+        if self.foreign_keys:
+            super().enable_constraint_checking()
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        self.cursor().execute(f'BEGIN {mode}' if mode else 'BEGIN')
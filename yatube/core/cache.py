@@ -0,0 +1,182 @@
+import pickle
+import re
+import time
+from collections import Counter, OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+NAMESPACE = re.compile(r'[:.]')
+MISSING = object()
+
+
+def now():
+    return int(time.time() * 1000000)
+
+
+class TwoTierCache(BaseCache):
+    """
+    Ограниченный LRU процесса (L1) перед общим кэшем (L2).
+
+    LOCATION — алиас общего кэша в CACHES. Запись ключа меняет поколение
+    его пространства имён (начало ключа до «:» или «.») в L2. Копии в L1
+    других процессов помечены старым поколением и перестают читаться,
+    как только процесс перечитает поколения: не позже чем через
+    GENERATION_INTERVAL секунд. Записи IMMUTABLE_NAMESPACES поколение не
+    меняют: их ключи и так содержат версию данных. L1 принадлежит
+    экземпляру бэкенда, а Django создаёт его на каждый поток.
+    """
+    generation_prefix = 'generation:'
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = location
+        self.l1_timeout = options.get('L1_TIMEOUT', 300)
+        self.interval = options.get('GENERATION_INTERVAL', 1)
+        self.immutable = frozenset(options.get('IMMUTABLE_NAMESPACES', ()))
+        self.local = OrderedDict()
+        self.generations = {}
+        self.checked = float('-inf')
+        self.stats = Counter()
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def namespace(self, key):
+        return NAMESPACE.split(key, 1)[0]
+
+    def fetch_generations(self, namespaces):
+        keys = {self.generation_prefix + name: name for name in namespaces}
+        found = self.shared.get_many(keys)
+        for key in keys.keys() - found.keys():
+            self.shared.add(key, now(), None)
+            found[key] = self.shared.get(key)
+        return {keys[key]: value for key, value in found.items()}
+
+    def generation(self, namespace):
+        if time.monotonic() - self.checked >= self.interval:
+            self.checked = time.monotonic()
+            self.generations = self.fetch_generations(self.generations)
+        if namespace not in self.generations:
+            self.generations.update(self.fetch_generations([namespace]))
+        return self.generations[namespace]
+
+    def bump(self, keys):
+        namespaces = {self.namespace(key) for key in keys} - self.immutable
+        if namespaces:
+            generation = now()
+            self.shared.set_many({
+                self.generation_prefix + name: generation
+                for name in namespaces
+            }, None)
+            self.generations.update(dict.fromkeys(namespaces, generation))
+
+    def local_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.l1_timeout
+        return min(timeout, self.l1_timeout)
+
+    def local_get(self, key, generation):
+        entry = self.local.get(key)
+        if entry is not None:
+            value, expires, stored = entry
+            if stored == generation and expires > time.monotonic():
+                self.local.move_to_end(key)
+                self.stats['l1_hits'] += 1
+                return pickle.loads(value)
+            del self.local[key]
+        self.stats['l1_misses'] += 1
+        return MISSING
+
+    def local_set(self, key, value, timeout, generation):
+        timeout = self.local_timeout(timeout)
+        if timeout <= 0:
+            self.local.pop(key, None)
+            return
+        self.local[key] = (
+            pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+            time.monotonic() + timeout,
+            generation,
+        )
+        self.local.move_to_end(key)
+        while len(self.local) > self._max_entries:
+            self.local.popitem(last=False)
+
+    def get_many(self, keys, version=None):
+        found, missing = {}, {}
+        for key in keys:
+            generation = self.generation(self.namespace(key))
+            value = self.local_get(self.make_key(key, version), generation)
+            if value is MISSING:
+                missing[key] = generation
+            else:
+                found[key] = value
+        if missing:
+            shared = self.shared.get_many(missing, version=version)
+            self.stats['l2_hits'] += len(shared)
+            self.stats['l2_misses'] += len(missing) - len(shared)
+            for key, value in shared.items():
+                self.local_set(
+                    self.make_key(key, version), value, None, missing[key]
+                )
+            found.update(shared)
+        return found
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        # Панель кеша debug_toolbar теряет результат set_many.
+        failed = self.shared.set_many(data, timeout, version=version) or []
+        self.bump(data)
+        for key, value in data.items():
+            if key not in failed:
+                self.local_set(
+                    self.make_key(key, version), value, timeout,
+                    self.generation(self.namespace(key))
+                )
+        return failed
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self.bump([key])
+            self.local_set(
+                self.make_key(key, version), value, timeout,
+                self.generation(self.namespace(key))
+            )
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version=version)
+        self.bump([key])
+        self.local_set(
+            self.make_key(key, version), value, None,
+            self.generation(self.namespace(key))
+        )
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.local.pop(self.make_key(key, version), None)
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete_many(self, keys, version=None):
+        self.shared.delete_many(keys, version=version)
+        self.bump(keys)
+        for key in keys:
+            self.local.pop(self.make_key(key, version), None)
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version=version)
+
+    def clear(self):
+        self.shared.clear()
+        self.local.clear()
+        self.generations.clear()
@@ -0,0 +1,36 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def copy_database(name, using=DEFAULT_DB_ALIAS):
+    """Согласованный снимок SQLite-базы в файл name."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        raise CommandError('Копирование реплик поддерживает только SQLite')
+    connection.ensure_connection()
+    target = sqlite3.connect(name)
+    try:
+        connection.connection.backup(target)
+    finally:
+        target.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную SQLite-базу в файлы реплик из DATABASE_REPLICAS, '
+        'чтобы проверять чтение с реплик локально'
+    )
+
+    def handle(self, *args, **options):
+        if not settings.REPLICA_DATABASES:
+            raise CommandError(
+                'Реплики не настроены: задайте DATABASE_REPLICAS'
+            )
+        for alias in settings.REPLICA_DATABASES:
+            name = settings.DATABASES[alias]['NAME']
+            connections[alias].close()
+            copy_database(name)
+            self.stdout.write(f'{alias}: {name}')
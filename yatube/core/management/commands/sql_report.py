@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from core.models import QueryStat
+
+ORDERS = {
+    'total': '-total_time',
+    'count': '-count',
+    'max': '-max_time',
+    'mean': (F('total_time') / F('count')).desc(),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Самые дорогие формы SQL-запросов: число, суммарное, среднее и '
+        'максимальное время, представление и строка шаблона'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--order', choices=ORDERS, default='total')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--view', help='Часть имени представления')
+        parser.add_argument(
+            '--reset', action='store_true', help='Очистить статистику'
+        )
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            QueryStat.objects.all().delete()
+            self.stdout.write('Статистика очищена')
+            return
+        stats = QueryStat.objects.order_by(ORDERS[options['order']])
+        if options['view']:
+            stats = stats.filter(view__contains=options['view'])
+        self.stdout.write(
+            f'{"всего, мс":>12}{"раз":>8}{"среднее":>10}{"макс.":>10}  '
+            'представление / шаблон'
+        )
+        for stat in stats[:options['limit']]:
+            self.stdout.write(
+                f'{stat.total_time:>12.1f}{stat.count:>8}'
+                f'{stat.mean_time:>10.2f}{stat.max_time:>10.2f}  '
+                f'{stat.view} {stat.template}\n    {stat.fingerprint}'
+            )
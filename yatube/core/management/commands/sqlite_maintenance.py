@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+INCREMENTAL = 2
+CHECKPOINT_MODES = ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE')
+
+
+def pragma(cursor, name):
+    cursor.execute(f'PRAGMA {name}')
+    return cursor.fetchone()[0]
+
+
+class Command(BaseCommand):
+    help = (
+        'Обслуживание SQLite: ANALYZE, инкрементальный VACUUM '
+        'и перенос WAL в основной файл базы'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            '--pages', type=int, default=0,
+            help='Сколько свободных страниц вернуть, 0 — все'
+        )
+        parser.add_argument(
+            '--checkpoint', choices=CHECKPOINT_MODES, default='TRUNCATE'
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда поддерживает только SQLite')
+        with connection.cursor() as cursor:
+            if pragma(cursor, 'auto_vacuum') != INCREMENTAL:
+                cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                cursor.execute('VACUUM')
+                self.stdout.write('VACUUM: включён инкрементальный режим')
+            cursor.execute('ANALYZE')
+            free = pragma(cursor, 'freelist_count')
+            # Каждый шаг PRAGMA incremental_vacuum возвращает одну страницу,
+            # а cursor.execute делает только первый шаг.
+            connection.connection.executescript(
+                f'PRAGMA incremental_vacuum({options["pages"]})'
+            )
+            freed = free - pragma(cursor, 'freelist_count')
+            cursor.execute(f'PRAGMA wal_checkpoint({options["checkpoint"]})')
+            busy, wal_pages, moved = cursor.fetchone()
+        self.stdout.write(
+            f'Освобождено страниц: {freed}, '
+            f'страниц WAL перенесено: {moved} из {wal_pages}'
+            + (', WAL занят читателями' if busy else '')
+        )
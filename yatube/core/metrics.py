@@ -0,0 +1,199 @@
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+FLUSH_INTERVAL = 1
+
+# Имя: тип и описание для Prometheus.
+METRICS = {
+    'yatube_http_requests_total': (
+        'counter', 'Запросы по маршрутам'
+    ),
+    'yatube_http_errors_total': (
+        'counter', 'Ответы с кодом 4xx и 5xx по маршрутам'
+    ),
+    'yatube_http_request_duration_seconds': (
+        'histogram', 'Время ответа по маршрутам'
+    ),
+    'yatube_db_queries_total': (
+        'counter', 'SQL-запросы по маршрутам'
+    ),
+    'yatube_cache_hits_total': (
+        'counter', 'Попадания в кэш по маршрутам'
+    ),
+    'yatube_cache_misses_total': (
+        'counter', 'Промахи кэша по маршрутам'
+    ),
+    'yatube_thumbnail_duration_seconds': (
+        'histogram', 'Создание миниатюр картинок'
+    ),
+}
+
+
+def enabled():
+    return bool(settings.METRICS_DIR)
+
+
+class Registry:
+    """
+    Метрики одного процесса.
+
+    Процесс раз в FLUSH_INTERVAL секунд записывает свои значения в файл
+    METRICS_DIR/<pid>.json, а выдача складывает файлы всех процессов.
+    Файлы завершившихся воркеров остаются, чтобы счётчики не убывали;
+    каталог очищают при перезапуске сервиса.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.flushed = time.monotonic()
+
+    def prepare(self, labels):
+        if self.pid != os.getpid():
+            # Копия родителя после fork: его значения уже в его файле.
+            self.reset()
+        return tuple(sorted(labels.items()))
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            key = name, self.prepare(labels)
+            self.counters[key] += value
+        self.flush_if_due()
+
+    def observe(self, name, labels, value):
+        with self.lock:
+            key = name, self.prepare(labels)
+            if key not in self.histograms:
+                self.histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+            histogram = self.histograms[key]
+            histogram[bisect_left(BUCKETS, value)] += 1
+            histogram[-1] += value
+        self.flush_if_due()
+
+    def flush_if_due(self):
+        if time.monotonic() - self.flushed >= FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        directory = settings.METRICS_DIR
+        with self.lock:
+            self.flushed = time.monotonic()
+            data = {
+                'counters': [
+                    [name, labels, value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                'histograms': [
+                    [name, labels, values]
+                    for (name, labels), values in self.histograms.items()
+                ],
+            }
+        os.makedirs(directory, exist_ok=True)
+        descriptor, path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(descriptor, 'w') as output:
+            json.dump(data, output)
+        os.replace(path, os.path.join(directory, f'{self.pid}.json'))
+
+
+registry = Registry()
+
+
+def collect(directory):
+    """Сумма значений из файлов всех процессов."""
+    counters = defaultdict(float)
+    histograms = {}
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        with open(path) as source:
+            data = json.load(source)
+        for name, labels, value in data['counters']:
+            counters[name, tuple(map(tuple, labels))] += value
+        for name, labels, values in data['histograms']:
+            key = name, tuple(map(tuple, labels))
+            total = histograms.setdefault(key, [0] * len(values))
+            histograms[key] = [a + b for a, b in zip(total, values)]
+    return counters, histograms
+
+
+def labels_text(labels, **extra):
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ''
+    inner = ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', r'\\')
+                         .replace('"', r'\"').replace('\n', r'\n'))
+        for key, value in pairs
+    )
+    return '{' + inner + '}'
+
+
+def number(value):
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def histogram_lines(name, labels, values):
+    cumulative = 0
+    for bound, count in zip((*BUCKETS, '+Inf'), values):
+        cumulative += count
+        yield f'{name}_bucket{labels_text(labels, le=bound)} {cumulative}'
+    yield f'{name}_sum{labels_text(labels)} {number(values[-1])}'
+    yield f'{name}_count{labels_text(labels)} {cumulative}'
+
+
+def render():
+    """Все метрики в текстовом формате Prometheus."""
+    registry.flush()
+    counters, histograms = collect(settings.METRICS_DIR)
+    lines = []
+    for name, (kind, description) in METRICS.items():
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+        if kind == 'counter':
+            lines += [
+                f'{name}{labels_text(labels)} {number(value)}'
+                for (found, labels), value in sorted(counters.items())
+                if found == name
+            ]
+        else:
+            for (found, labels), values in sorted(histograms.items()):
+                if found == name:
+                    lines += histogram_lines(name, labels, values)
+    return '\n'.join(lines) + '\n'
+
+
+def route(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unmatched'
+
+
+def observe_request(request, response, timing):
+    labels = {'route': route(request)}
+    registry.inc(
+        'yatube_http_requests_total', {**labels, 'method': request.method}
+    )
+    if response.status_code >= 400:
+        registry.inc(
+            'yatube_http_errors_total',
+            {**labels, 'status': response.status_code}
+        )
+    registry.observe(
+        'yatube_http_request_duration_seconds', labels, timing.total
+    )
+    registry.inc('yatube_db_queries_total', labels, timing.queries)
+    if timing.cache_hits is not None:
+        registry.inc('yatube_cache_hits_total', labels, timing.cache_hits)
+        registry.inc(
+            'yatube_cache_misses_total', labels, timing.cache_misses
+        )
@@ -0,0 +1,90 @@
+import random
+import time
+
+from django.conf import settings
+
+from core import metrics, profiling, querystats, routers, timing
+
+
+class ReplicaPinMiddleware:
+    """Закрепляет чтение за основной базой после записи пользователя."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            pinned_until = float(request.COOKIES.get(routers.PIN_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0
+        routers.start(pinned_until)
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = routers.finish()
+        if wrote and settings.REPLICA_DATABASES:
+            seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                routers.PIN_COOKIE, str(time.time() + seconds),
+                max_age=seconds, httponly=True, samesite='Lax'
+            )
+        return response
+
+
+class ServerTimingMiddleware:
+    """
+    Время запроса, базы и шаблонов и попадания в кэш: заголовок
+    Server-Timing и строка JSON в журнал core.timing.
+
+    Заголовок и журнал получает доля SERVER_TIMING_SAMPLE_RATE запросов.
+    С METRICS_DIR замеряются все запросы: замер идёт ещё и в метрики.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        timing.instrument_templates()
+
+    def __call__(self, request):
+        sampled = random.random() < settings.SERVER_TIMING_SAMPLE_RATE
+        if not sampled and not metrics.enabled():
+            return self.get_response(request)
+        with timing.measure() as result:
+            response = self.get_response(request)
+        if metrics.enabled():
+            metrics.observe_request(request, response, result)
+        if sampled:
+            response['Server-Timing'] = result.header()
+            timing.log(request, response, result)
+        return response
+
+
+class ProfilingMiddleware:
+    """Запрос по подписанной ссылке сотрудника идёт под cProfile."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        user = profiling.unsign(request)
+        if user is None:
+            return self.get_response(request)
+        return profiling.profile(self.get_response, request, user)
+
+
+class QueryStatsMiddleware:
+    """Формы SQL-запросов с представлением и строкой шаблона."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.SQL_STATS_ENABLED:
+            return self.get_response(request)
+        with querystats.recorder.recording():
+            return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if settings.SQL_STATS_ENABLED:
+            querystats.recorder.local.view = querystats.view_name(
+                view_func, request.method
+            )
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.6 on 2026-10-18 21:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=2000)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('duration', models.FloatField(help_text='мс')),
+                ('sql_time', models.FloatField(help_text='мс')),
+                ('template_time', models.FloatField(help_text='мс')),
+                ('cards_time', models.FloatField(help_text='мс, post_item.html')),
+                ('thumbnail_time', models.FloatField(help_text='мс, sorl.thumbnail')),
+                ('file', models.CharField(max_length=255)),
+                ('report', models.TextField()),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created'],
+            },
+        ),
+    ]
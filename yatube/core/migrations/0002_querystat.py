@@ -0,0 +1,33 @@
+# Generated by Django 2.2.6 on 2026-10-18 21:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueryStat',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=32)),
+                ('view', models.CharField(max_length=255)),
+                ('template', models.CharField(blank=True, max_length=255)),
+                ('fingerprint', models.TextField()),
+                ('count', models.PositiveIntegerField()),
+                ('total_time', models.FloatField(help_text='мс')),
+                ('max_time', models.FloatField(help_text='мс')),
+            ],
+            options={
+                'ordering': ['-total_time'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='querystat',
+            constraint=models.UniqueConstraint(fields=('digest', 'view', 'template'), name='unique_query_stat'),
+        ),
+    ]
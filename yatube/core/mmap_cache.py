@@ -0,0 +1,313 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+MAGIC = b'yatube01'
+HEADER = struct.Struct('<8sIII')
+SLOT = struct.Struct('<QdIHBB')
+REFERENCED = SLOT.size - 1
+DATA_ALIGN = 64
+WAYS = 8
+COMPRESS_FROM = 1024
+
+_files = {}
+_files_lock = threading.Lock()
+
+
+class SlotFile:
+    """
+    Файл из слотов фиксированного размера, отображённый в память.
+
+    Слоты сгруппированы в корзины по WAYS штук, ключ попадает в корзину
+    по хэшу. Вытеснение внутри корзины — CLOCK: чтение ставит слоту бит
+    обращения, стрелка корзины пропускает слоты с битом, снимая его. Бит
+    пишется под исключительной блокировкой и только если его ещё нет.
+    Корзины делятся на полосы с общими (чтение) и исключительными
+    (запись) блокировками fcntl на байтах файла, поэтому чтения разных
+    процессов идут параллельно. Внутри процесса полосу держит
+    threading.Lock: блокировки fcntl принадлежат процессу, а не потоку.
+    """
+
+    def __init__(self, path, slots, slot_size, stripes):
+        self.buckets = max(1, -(-slots // WAYS))
+        self.slot_size = slot_size
+        self.stripes = stripes
+        self.hands = HEADER.size
+        self.data = -(-(self.hands + self.buckets) // DATA_ALIGN) * DATA_ALIGN
+        size = self.data + self.buckets * WAYS * slot_size
+        self.fd = open_locked(path)
+        try:
+            header = HEADER.pack(MAGIC, self.buckets, slot_size, stripes)
+            if os.pread(self.fd, HEADER.size, 0) != header:
+                self.fd = replace(path, self.fd, header, size)
+            self.memory = mmap.mmap(self.fd, size)
+        finally:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN)
+        self.thread_locks = [threading.Lock() for _ in range(stripes)]
+
+    @contextmanager
+    def locked(self, bucket, exclusive):
+        stripe = bucket % self.stripes
+        with self.thread_locks[stripe]:
+            mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+            fcntl.lockf(self.fd, mode, 1, stripe)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, stripe)
+
+    @contextmanager
+    def locked_all(self):
+        for lock in self.thread_locks:
+            lock.acquire()
+        try:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, self.stripes, 0)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN, self.stripes, 0)
+        finally:
+            for lock in self.thread_locks:
+                lock.release()
+
+    def capacity(self):
+        return self.slot_size - SLOT.size
+
+    def bucket(self, key):
+        digest = hashlib.blake2b(key, digest_size=8).digest()
+        key_hash = int.from_bytes(digest, 'little')
+        return key_hash, key_hash % self.buckets
+
+    def offset(self, bucket, way):
+        return self.data + (bucket * WAYS + way) * self.slot_size
+
+    def header(self, offset):
+        return SLOT.unpack_from(self.memory, offset)
+
+    def find(self, key_hash, bucket, key):
+        for way in range(WAYS):
+            offset = self.offset(bucket, way)
+            stored, _, _, key_length, used, _ = self.header(offset)
+            start = offset + SLOT.size
+            if used and stored == key_hash and (
+                self.memory[start:start + key_length] == key
+            ):
+                return offset
+        return None
+
+    def read(self, offset):
+        _, expires, length, key_length, _, _ = self.header(offset)
+        if expires and expires <= time.time():
+            return None
+        start = offset + SLOT.size + key_length
+        return self.memory[start:start + length]
+
+    def referenced(self, offset):
+        return self.memory[offset + REFERENCED]
+
+    def reference(self, offset):
+        self.memory[offset + REFERENCED] = 1
+
+    def victim(self, bucket):
+        now = time.time()
+        for way in range(WAYS):
+            offset = self.offset(bucket, way)
+            _, expires, _, _, used, _ = self.header(offset)
+            if not used or (expires and expires <= now):
+                return offset
+        hand = self.hands + bucket
+        way = self.memory[hand]
+        while self.memory[self.offset(bucket, way) + REFERENCED]:
+            self.memory[self.offset(bucket, way) + REFERENCED] = 0
+            way = (way + 1) % WAYS
+        self.memory[hand] = (way + 1) % WAYS
+        return self.offset(bucket, way)
+
+    def write(self, offset, key_hash, key, value, expires):
+        start = offset + SLOT.size
+        self.memory[start:start + len(key)] = key
+        self.memory[start + len(key):start + len(key) + len(value)] = value
+        SLOT.pack_into(
+            self.memory, offset,
+            key_hash, expires or 0, len(value), len(key), 1, 1
+        )
+
+    def expire(self, offset, expires):
+        key_hash, _, length, key_length, used, referenced = self.header(offset)
+        SLOT.pack_into(
+            self.memory, offset,
+            key_hash, expires or 0, length, key_length, used, referenced
+        )
+
+    def free(self, offset):
+        SLOT.pack_into(self.memory, offset, 0, 0, 0, 0, 0, 0)
+
+    def clear(self):
+        with self.locked_all():
+            for bucket in range(self.buckets):
+                for way in range(WAYS):
+                    self.free(self.offset(bucket, way))
+
+
+def open_locked(path):
+    """
+    Файл под исключительной блокировкой. Если пока ждали блокировку,
+    файл по пути заменили, открывается уже новый.
+    """
+    while True:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(fd, fcntl.LOCK_EX)
+        try:
+            if os.path.samestat(os.fstat(fd), os.stat(path)):
+                return fd
+        except FileNotFoundError:
+            pass
+        fcntl.lockf(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def replace(path, fd, header, size):
+    """
+    Новый файл с другой разметкой подменяет старый через os.replace.
+
+    Старый файл не усекается: процессы, которые его отобразили, получили
+    бы SIGBUS. Они дорабатывают со старым файлом, а открывающие путь
+    заново получают новый. Возвращает дескриптор нового файла под той же
+    блокировкой.
+    """
+    temporary = f'{path}.{os.getpid()}.tmp'
+    new = os.open(temporary, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+    fcntl.lockf(new, fcntl.LOCK_EX)
+    os.ftruncate(new, size)
+    os.pwrite(new, header, 0)
+    os.replace(temporary, path)
+    fcntl.lockf(fd, fcntl.LOCK_UN)
+    os.close(fd)
+    return new
+
+
+def dumps(value):
+    """Pickle, а крупные значения ещё и zlib: HTML сжимается в разы."""
+    data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    if len(data) < COMPRESS_FROM:
+        return data
+    return zlib.compress(data, 1)
+
+
+def loads(data):
+    if data[:1] != pickle.PROTO:
+        data = zlib.decompress(data)
+    return pickle.loads(data)
+
+
+def open_slot_file(path, slots, slot_size, stripes):
+    """Один SlotFile на файл в процессе; после fork файл открывается заново."""
+    key = (path, os.getpid())
+    with _files_lock:
+        if key not in _files:
+            _files[key] = SlotFile(path, slots, slot_size, stripes)
+        return _files[key]
+
+
+class SharedMemoryCache(BaseCache):
+    """
+    Кэш в файле, отображённом в память, общий для процессов хоста.
+
+    LOCATION — путь к файлу, лучше в /dev/shm. Файл занимает
+    SLOTS * SLOT_SIZE байт; значения, которые и после сжатия не влезают
+    в слот, не кэшируются.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.slots = open_slot_file(
+            location,
+            options.get('SLOTS', 2048),
+            options.get('SLOT_SIZE', 16384),
+            options.get('STRIPES', 64),
+        )
+
+    def locate(self, key, version):
+        key = self.make_key(key, version=version).encode()
+        return (key,) + self.slots.bucket(key)
+
+    def get(self, key, default=None, version=None):
+        key, key_hash, bucket = self.locate(key, version)
+        with self.slots.locked(bucket, exclusive=False):
+            offset = self.slots.find(key_hash, bucket, key)
+            value = None if offset is None else self.slots.read(offset)
+            referenced = value is not None and self.slots.referenced(offset)
+        if value is None:
+            return default
+        if not referenced:
+            with self.slots.locked(bucket, exclusive=True):
+                offset = self.slots.find(key_hash, bucket, key)
+                if offset is not None:
+                    self.slots.reference(offset)
+        return loads(value)
+
+    def store(self, key, value, timeout, version, only_new=False):
+        key, key_hash, bucket = self.locate(key, version)
+        value = dumps(value)
+        fits = len(key) + len(value) <= self.slots.capacity()
+        with self.slots.locked(bucket, exclusive=True):
+            offset = self.slots.find(key_hash, bucket, key)
+            if offset is not None:
+                if only_new and self.slots.read(offset) is not None:
+                    return False
+                self.slots.free(offset)
+            if not fits:
+                return False
+            self.slots.write(
+                self.slots.victim(bucket), key_hash, key, value,
+                self.get_backend_timeout(timeout)
+            )
+        return True
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.store(key, value, timeout, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.store(key, value, timeout, version, only_new=True)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key, key_hash, bucket = self.locate(key, version)
+        with self.slots.locked(bucket, exclusive=True):
+            offset = self.slots.find(key_hash, bucket, key)
+            if offset is None or self.slots.read(offset) is None:
+                return False
+            self.slots.expire(offset, self.get_backend_timeout(timeout))
+        return True
+
+    def incr(self, key, delta=1, version=None):
+        name = key
+        key, key_hash, bucket = self.locate(key, version)
+        with self.slots.locked(bucket, exclusive=True):
+            offset = self.slots.find(key_hash, bucket, key)
+            value = None if offset is None else self.slots.read(offset)
+            if value is None:
+                raise ValueError("Key '%s' not found" % name)
+            expires = self.slots.header(offset)[1]
+            value = loads(value) + delta
+            self.slots.write(offset, key_hash, key, dumps(value), expires)
+        return value
+
+    def delete(self, key, version=None):
+        key, key_hash, bucket = self.locate(key, version)
+        with self.slots.locked(bucket, exclusive=True):
+            offset = self.slots.find(key_hash, bucket, key)
+            if offset is not None:
+                self.slots.free(offset)
+
+    def clear(self):
+        self.slots.clear()
@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+class RequestProfile(models.Model):
+    """Запрос, выполненный под cProfile по подписанной ссылке."""
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+    user = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name='+'
+    )
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2000)
+    status_code = models.PositiveSmallIntegerField()
+    duration = models.FloatField(help_text='мс')
+    sql_time = models.FloatField(help_text='мс')
+    template_time = models.FloatField(help_text='мс')
+    cards_time = models.FloatField(help_text='мс, post_item.html')
+    thumbnail_time = models.FloatField(help_text='мс, sorl.thumbnail')
+    file = models.CharField(max_length=255)
+    report = models.TextField()
+
+    class Meta:
+        ordering = ['-created']
+
+    def __str__(self):
+        return f'{self.method} {self.path}'
+
+
+class QueryStat(models.Model):
+    """Форма SQL-запроса, откуда она выполняется и во что обходится."""
+    digest = models.CharField(max_length=32)
+    view = models.CharField(max_length=255)
+    template = models.CharField(max_length=255, blank=True)
+    fingerprint = models.TextField()
+    count = models.PositiveIntegerField()
+    total_time = models.FloatField(help_text='мс')
+    max_time = models.FloatField(help_text='мс')
+
+    class Meta:
+        ordering = ['-total_time']
+        constraints = [
+            models.UniqueConstraint(
+                fields=('digest', 'view', 'template'),
+                name='unique_query_stat'
+            ),
+        ]
+
+    def __str__(self):
+        return self.fingerprint[:50]
+
+    @property
+    def mean_time(self):
+        return self.total_time / self.count
@@ -0,0 +1,84 @@
+import cProfile
+import io
+import os
+import pstats
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+from core.models import RequestProfile, User
+
+SALT = 'core.profiling'
+PARAMETER = 'profile'
+HEADER = 'HTTP_X_PROFILE'
+REPORT_LINES = 60
+
+# Поле RequestProfile: функции, накопленное время которых в него идёт.
+LAYERS = {
+    'sql_time': [
+        ('django/db/backends/utils.py', '_execute'),
+        ('django/db/backends/utils.py', '_executemany'),
+    ],
+    'template_time': [('django/template/backends/django.py', 'render')],
+    'cards_time': [('posts/templatetags/post_cards.py', 'post_cards')],
+    'thumbnail_time': [('sorl/thumbnail/base.py', 'get_thumbnail')],
+}
+
+
+def sign(path, user):
+    """Ссылочный токен: профилирует только этот путь и недолго."""
+    return signing.dumps({'path': path, 'user': user.pk}, salt=SALT)
+
+
+def unsign(request):
+    """Выдавший ссылку сотрудник, если она подписана для пути запроса."""
+    token = request.GET.get(PARAMETER) or request.META.get(HEADER)
+    if not token:
+        return None
+    try:
+        data = signing.loads(
+            token, salt=SALT, max_age=settings.PROFILE_LINK_MAX_AGE
+        )
+    except signing.BadSignature:
+        return None
+    if data['path'] != request.path:
+        return None
+    return User.objects.filter(pk=data['user'], is_staff=True).first()
+
+
+def layer_times(stats):
+    """Накопленное время слоёв, мс; вложенные слои входят во внешние."""
+    times = dict.fromkeys(LAYERS, 0.0)
+    for (filename, _, function), (_, _, _, cumulative, _) in (
+        stats.stats.items()
+    ):
+        filename = filename.replace(os.sep, '/')
+        for field, functions in LAYERS.items():
+            if any(
+                filename.endswith(suffix) and function == name
+                for suffix, name in functions
+            ):
+                times[field] += cumulative * 1000
+    return times
+
+
+def profile(get_response, request, user):
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    response = profiler.runcall(get_response, request)
+    duration = (time.perf_counter() - started) * 1000
+    os.makedirs(settings.PROFILES_DIR, exist_ok=True)
+    slug = request.path.strip('/').replace('/', '_') or 'index'
+    name = f'{timezone.now():%Y%m%d-%H%M%S-%f}-{slug[:100]}.prof'
+    profiler.dump_stats(os.path.join(settings.PROFILES_DIR, name))
+    report = io.StringIO()
+    stats = pstats.Stats(profiler, stream=report)
+    stats.sort_stats('cumulative').print_stats(REPORT_LINES)
+    RequestProfile.objects.create(
+        user=user, method=request.method, path=request.path,
+        status_code=response.status_code, duration=duration,
+        file=name, report=report.getvalue(), **layer_times(stats)
+    )
+    return response
@@ -0,0 +1,174 @@
+import hashlib
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.template.base import Node
+
+from core.models import QueryStat
+
+logger = logging.getLogger(__name__)
+
+NORMALIZE = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+]
+RENDER_NODE = Node.render_annotated.__code__
+STACK_DEPTH = 200
+NO_VIEW = '-'
+CORE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def fingerprint(sql):
+    """Форма запроса: литералы и параметры — «?», списки IN — «(...)»."""
+    for pattern, replacement in NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def view_name(view_func, method):
+    """Модуль и имя функции или вьюсета с действием DRF."""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return f'{view_func.__module__}.{view_func.__qualname__}'
+    name = f'{cls.__module__}.{cls.__name__}'
+    action = (getattr(view_func, 'actions', None) or {}).get(method.lower())
+    return f'{name}.{action}' if action else name
+
+
+def template_line(frame):
+    """Шаблон и строка тега или переменной, которые выполняют запрос."""
+    for _ in range(STACK_DEPTH):
+        if frame is None:
+            break
+        if frame.f_code is RENDER_NODE:
+            node = frame.f_locals['self']
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                return f'{origin.template_name}:{token.lineno}'
+        frame = frame.f_back
+    return ''
+
+
+def project_stack(frame):
+    """Стек вызовов только по коду проекта, без Django и этих обёрток."""
+    return traceback.format_list([
+        entry for entry in traceback.extract_stack(frame)
+        if entry.filename.startswith(settings.BASE_DIR)
+        and not entry.filename.startswith(CORE_DIR)
+    ])
+
+
+class Recorder:
+    """
+    Счётчик форм SQL-запросов процесса по представлениям и строкам
+    шаблонов. В базу накопленное уходит не чаще раза в
+    SQL_STATS_FLUSH_INTERVAL секунд, одним обновлением на форму, уже
+    после отправки ответа: ошибка записи не ломает запрос, а накопленное
+    дождётся следующей попытки.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.pending = {}
+        self.flushed = time.monotonic()
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка execute_wrapper для всех подключений."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, time.perf_counter() - started)
+
+    def record(self, sql, elapsed):
+        shape = fingerprint(sql)
+        view = getattr(self.local, 'view', NO_VIEW)
+        template = template_line(sys._getframe(2))
+        key = hashlib.md5(shape.encode()).hexdigest(), view, template
+        with self.lock:
+            self.add(key, shape, 1, elapsed, elapsed)
+        if elapsed * 1000 >= settings.SQL_SLOW_QUERY_MS:
+            logger.warning(
+                'Медленный запрос %.1f мс в %s %s: %s\n%s',
+                elapsed * 1000, view, template, sql,
+                ''.join(project_stack(sys._getframe(2)))
+            )
+
+    def add(self, key, shape, count, total, longest):
+        stat = self.pending.setdefault(key, [shape, 0, 0.0, 0.0])
+        stat[1] += count
+        stat[2] += total
+        stat[3] = max(stat[3], longest)
+
+    @contextmanager
+    def recording(self):
+        self.local.view = NO_VIEW
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(self))
+                yield
+        finally:
+            del self.local.view
+
+    def flush_if_due(self, **kwargs):
+        """Обработчик request_finished."""
+        if settings.SQL_STATS_ENABLED and time.monotonic() - self.flushed >= (
+            settings.SQL_STATS_FLUSH_INTERVAL
+        ):
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.flushed = time.monotonic()
+        try:
+            with transaction.atomic():
+                for (digest, view, template), stat in pending.items():
+                    save(digest, view, template, *stat)
+        except DatabaseError:
+            logger.exception('Статистика SQL не записана, повтор позже')
+            with self.lock:
+                for key, stat in pending.items():
+                    self.add(key, *stat)
+
+
+def save(digest, view, template, shape, count, total, longest):
+    found = QueryStat.objects.filter(
+        digest=digest, view=view, template=template
+    )
+    changes = {
+        'count': F('count') + count,
+        'total_time': F('total_time') + total * 1000,
+        'max_time': Greatest('max_time', Value(longest * 1000)),
+    }
+    if found.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            QueryStat.objects.create(
+                digest=digest, view=view, template=template,
+                fingerprint=shape, count=count, total_time=total * 1000,
+                max_time=longest * 1000,
+            )
+    except IntegrityError:
+        # Другой воркер успел создать строку.
+        found.update(**changes)
+
+
+recorder = Recorder()
@@ -0,0 +1,59 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'pin_primary'
+
+_state = threading.local()
+
+
+def start(pinned_until=0):
+    """Начало запроса: читать с реплик, если запрос не закреплён."""
+    _state.replicas = pinned_until < time.time()
+    _state.wrote = False
+
+
+def finish():
+    """Конец запроса: True, если в нём была запись."""
+    try:
+        return getattr(_state, 'wrote', False)
+    finally:
+        _state.replicas = _state.wrote = False
+
+
+def pin():
+    _state.replicas = False
+    _state.wrote = True
+
+
+class ReplicaRouter:
+    """
+    Запись — в основную базу, чтение в запросах — с реплик.
+
+    После первой записи запрос до конца читает из основной базы, а
+    middleware продлевает это на следующие запросы пользователя, чтобы он
+    видел свои изменения, пока реплики их не догнали. Вне запросов
+    (команды, тесты) и внутри транзакций чтение идёт из основной базы.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.REPLICA_DATABASES
+        if (
+            not replicas or not getattr(_state, 'replicas', False)
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        pin()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.REPLICA_DATABASES
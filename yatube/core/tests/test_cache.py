@@ -0,0 +1,97 @@
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from core.cache import TwoTierCache
+
+SHARED_DIR = tempfile.mkdtemp()
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': SHARED_DIR,
+    },
+})
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = 1000.0
+        patcher = mock.patch(
+            'core.cache.time.monotonic', side_effect=lambda: self.clock
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.worker = self.make_cache()
+        self.other_worker = self.make_cache()
+        self.worker.clear()
+
+    def make_cache(self, **options):
+        options.setdefault('GENERATION_INTERVAL', 10)
+        options.setdefault('IMMUTABLE_NAMESPACES', ['post_card'])
+        return TwoTierCache('shared', {'OPTIONS': options})
+
+    def test_invalidation_reaches_other_workers_within_interval(self):
+        """Запись в одном процессе видна другим не позже интервала."""
+        self.worker.set('version:posts', 1)
+        self.assertEqual(self.other_worker.get('version:posts'), 1)
+        self.worker.set('version:posts', 2)
+        self.assertEqual(self.worker.get('version:posts'), 2)
+        self.assertEqual(self.other_worker.get('version:posts'), 1)
+        self.clock += 10
+        self.assertEqual(self.other_worker.get('version:posts'), 2)
+
+    def test_delete_and_clear_reach_other_workers(self):
+        """Удаление и очистка сбрасывают L1 других процессов."""
+        self.worker.set_many({'version:posts': 1, 'version:group:1': 2})
+        self.other_worker.get_many(['version:posts', 'version:group:1'])
+        self.worker.delete('version:posts')
+        self.clock += 10
+        self.assertIsNone(self.other_worker.get('version:posts'))
+        self.assertEqual(self.other_worker.get('version:group:1'), 2)
+        self.worker.clear()
+        self.clock += 10
+        self.assertIsNone(self.other_worker.get('version:group:1'))
+
+    def test_immutable_namespace_keeps_local_copies(self):
+        """Запись неизменяемых ключей не сбрасывает чужой L1."""
+        self.worker.set('version:posts', 1)
+        self.other_worker.get('version:posts')
+        self.other_worker.stats.clear()
+        self.worker.set('post_card:1', 'карточка')
+        self.clock += 10
+        self.other_worker.get('version:posts')
+        self.assertEqual(self.other_worker.stats['l1_hits'], 1)
+
+    def test_set_many_without_failed_keys_from_shared(self):
+        """Обёртки кеша, теряющие результат set_many, не ломают запись."""
+        with mock.patch.object(self.worker.shared, 'set_many') as set_many:
+            set_many.return_value = None
+            self.worker.set('version:posts', 1)
+        self.assertEqual(self.worker.get('version:posts'), 1)
+
+    def test_local_tier_is_bounded_and_counted(self):
+        """L1 ограничен MAX_ENTRIES и считает попадания и промахи."""
+        worker = self.make_cache(MAX_ENTRIES=2)
+        worker.set_many({'a:1': 1, 'a:2': 2, 'a:3': 3})
+        self.assertEqual(len(worker.local), 2)
+        self.assertEqual(
+            worker.get_many(['a:1', 'a:2', 'a:3', 'a:4']),
+            {'a:1': 1, 'a:2': 2, 'a:3': 3}
+        )
+        self.assertEqual(worker.stats['l1_hits'], 2)
+        self.assertEqual(worker.stats['l1_misses'], 2)
+        self.assertEqual(worker.stats['l2_hits'], 1)
+        self.assertEqual(worker.stats['l2_misses'], 1)
+
+    def test_local_entries_expire_with_timeout(self):
+        """L1 не хранит запись дольше её таймаута."""
+        self.worker.set('a:1', 1, timeout=5)
+        self.clock += 6
+        self.worker.stats.clear()
+        self.assertEqual(self.worker.get('a:1'), 1)
+        self.assertEqual(self.worker.stats['l1_misses'], 1)
+        self.assertEqual(self.worker.stats['l2_hits'], 1)
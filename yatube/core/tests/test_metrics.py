@@ -0,0 +1,115 @@
+import multiprocessing
+import re
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail.base import ThumbnailBackend
+
+from core import metrics
+from core.thumbnails import TimedThumbnailBackend
+from posts.models import Post, User
+
+METRICS_DIR = tempfile.mkdtemp()
+
+
+def worker_request():
+    metrics.registry.inc(
+        'yatube_http_requests_total', {'route': 'index', 'method': 'GET'}
+    )
+    metrics.registry.flush()
+
+
+@override_settings(METRICS_DIR=METRICS_DIR)
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='author')
+        Post.objects.create(text='Запись', author=cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+        metrics.registry.reset()
+
+    def value(self, text, sample):
+        found = re.search(
+            r'^' + re.escape(sample) + r' ([\d.]+)$', text, re.MULTILINE
+        )
+        self.assertIsNotNone(found, sample)
+        return float(found.group(1))
+
+    def scrape(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_routes_are_counted_by_url_name(self):
+        """Счётчики, ошибки и гистограммы — по имени маршрута."""
+        self.client.get(reverse('index'))
+        self.client.get(reverse('profile', args=['author']))
+        self.client.get(reverse('profile', args=['nobody']))
+        self.client.get(reverse('follow-list'))
+        text = self.scrape()
+        self.assertEqual(self.value(text, (
+            'yatube_http_requests_total{method="GET",route="profile"}'
+        )), 2)
+        self.assertEqual(self.value(text, (
+            'yatube_http_errors_total{route="profile",status="404"}'
+        )), 1)
+        self.assertEqual(self.value(text, (
+            'yatube_http_errors_total{route="follow-list",status="401"}'
+        )), 1)
+        self.assertEqual(self.value(text, (
+            'yatube_http_request_duration_seconds_count{route="index"}'
+        )), 1)
+        self.assertEqual(self.value(text, (
+            'yatube_http_request_duration_seconds_bucket'
+            '{route="index",le="+Inf"}'
+        )), 1)
+        self.assertGreater(
+            self.value(text, 'yatube_db_queries_total{route="index"}'), 0
+        )
+        self.assertGreater(
+            self.value(text, 'yatube_cache_misses_total{route="index"}'), 0
+        )
+
+    def test_worker_processes_are_summed(self):
+        """Значения воркеров складываются, копия после fork не удваивает."""
+        self.client.get(reverse('index'))
+        metrics.registry.flush()
+        process = multiprocessing.get_context('fork').Process(
+            target=worker_request
+        )
+        process.start()
+        process.join()
+        text = self.scrape()
+        self.assertEqual(self.value(text, (
+            'yatube_http_requests_total{method="GET",route="index"}'
+        )), 2)
+
+    def test_thumbnail_time(self):
+        """Создание миниатюры попадает в гистограмму."""
+        # Сама обработка картинки здесь не важна.
+        with mock.patch.object(ThumbnailBackend, '_create_thumbnail') as made:
+            TimedThumbnailBackend()._create_thumbnail(
+                'source', '960x339', {}, 'thumbnail'
+            )
+        made.assert_called_once_with('source', '960x339', {}, 'thumbnail')
+        self.assertEqual(self.value(
+            self.scrape(), 'yatube_thumbnail_duration_seconds_count'
+        ), 1)
+
+    @override_settings(METRICS_DIR='')
+    def test_endpoint_is_off_without_directory(self):
+        """Без METRICS_DIR метрик нет."""
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,106 @@
+import multiprocessing
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.mmap_cache import SharedMemoryCache, SlotFile
+
+
+def increment(location, times):
+    cache = SharedMemoryCache(location, {})
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SharedMemoryCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = os.path.join(directory.name, 'cache')
+        self.cache = self.make_cache()
+
+    def make_cache(self, **options):
+        return SharedMemoryCache(self.location, {'OPTIONS': options})
+
+    def test_get_set_add_delete(self):
+        """Базовые операции кэша."""
+        self.cache.set('version:posts', 1)
+        self.assertEqual(self.cache.get('version:posts'), 1)
+        self.assertFalse(self.cache.add('version:posts', 2))
+        self.assertTrue(self.cache.add('version:group:1', 2))
+        self.assertEqual(
+            self.cache.get_many(['version:posts', 'version:group:1', 'x']),
+            {'version:posts': 1, 'version:group:1': 2}
+        )
+        self.cache.delete('version:posts')
+        self.assertIsNone(self.cache.get('version:posts'))
+        self.assertEqual(self.cache.incr('version:group:1', 3), 5)
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('version:group:1'))
+
+    def test_timeout(self):
+        """Записи истекают по таймауту, touch его продлевает."""
+        self.cache.set('a', 1, timeout=10)
+        self.cache.set('b', 1, timeout=10)
+        self.cache.touch('b', timeout=100)
+        later = time.time() + 50
+        with mock.patch('core.mmap_cache.time.time', return_value=later):
+            self.assertIsNone(self.cache.get('a'))
+            self.assertEqual(self.cache.get('b'), 1)
+
+    def test_large_values_are_compressed_or_skipped(self):
+        """Сжимаемый HTML влезает в слот, несжимаемые данные — нет."""
+        html = '<article class="card">текст</article>' * 1000
+        self.cache.set('page', html)
+        self.assertEqual(self.cache.get('page'), html)
+        noise = os.urandom(20000)
+        self.cache.set('page', noise)
+        self.assertIsNone(self.cache.get('page'))
+
+    def test_eviction_keeps_recently_read_keys(self):
+        """CLOCK вытесняет записи, которые не читали."""
+        cache = SharedMemoryCache(
+            self.location + '-small', {'OPTIONS': {'SLOTS': 8}}
+        )
+        for number in range(8):
+            cache.set(f'key:{number}', number)
+        for number in range(8):
+            cache.get(f'key:{number}')
+        cache.set('key:8', 8)
+        cache.get('key:8')
+        cache.set('key:9', 9)
+        found = cache.get_many(f'key:{number}' for number in range(10))
+        self.assertEqual(len(found), 8)
+        self.assertIn('key:8', found)
+        self.assertIn('key:9', found)
+
+    def test_processes_share_cache(self):
+        """Процессы видят общие данные, блокировки не теряют записи."""
+        self.cache.set('counter', 0)
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(target=increment, args=(self.location, 200))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get('counter'), 800)
+
+    def test_new_layout_replaces_file(self):
+        """Другая разметка — новый файл, старое отображение цело."""
+        old = SlotFile(self.location + '-layout', 64, 4096, 4)
+        key_hash, bucket = old.bucket(b'key')
+        old.write(old.offset(bucket, 0), key_hash, b'key', b'value', 0)
+        new = SlotFile(self.location + '-layout', 8, 4096, 4)
+        self.assertFalse(os.path.samestat(
+            os.fstat(old.fd), os.fstat(new.fd)
+        ))
+        offset = old.find(key_hash, bucket, b'key')
+        self.assertEqual(old.read(offset), b'value')
+        self.assertEqual(old.memory[-1], 0)
+        self.assertIsNone(new.find(*new.bucket(b'key'), b'key'))
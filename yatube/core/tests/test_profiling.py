@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import profiling
+from core.models import RequestProfile
+from posts.models import Post, User
+
+PROFILES_DIR = tempfile.mkdtemp()
+
+
+@override_settings(PROFILES_DIR=PROFILES_DIR)
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create(
+            username='admin', is_staff=True, is_superuser=True
+        )
+        cls.author = User.objects.create(username='author')
+        Post.objects.create(text='Запись', author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(PROFILES_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.path = reverse('profile', args=['author'])
+
+    def test_staff_link_profiles_one_request(self):
+        """Ссылка из админки профилирует страницу и сохраняет профиль."""
+        self.client.force_login(self.staff)
+        link = self.client.get(
+            reverse('admin:core_requestprofile_link'), {'path': self.path}
+        )
+        self.assertTrue(link['Location'].startswith(self.path + '?profile='))
+        self.client.logout()
+        response = self.client.get(link['Location'])
+        self.assertEqual(response.status_code, 200)
+        profile = RequestProfile.objects.get()
+        self.assertEqual(
+            (profile.path, profile.status_code, profile.user),
+            (self.path, 200, self.staff)
+        )
+        self.assertGreater(profile.sql_time, 0)
+        self.assertGreater(profile.template_time, profile.cards_time)
+        self.assertGreater(profile.cards_time, 0)
+        self.assertIn('post_cards', profile.report)
+        self.assertTrue(
+            os.path.exists(os.path.join(PROFILES_DIR, profile.file))
+        )
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse(
+            'admin:core_requestprofile_change', args=[profile.pk]
+        ))
+        self.assertContains(response, 'post_cards')
+        response = self.client.get(reverse(
+            'admin:core_requestprofile_download', args=[profile.pk]
+        ))
+        self.assertEqual(response.status_code, 200)
+
+    def test_other_tokens_are_ignored(self):
+        """Чужой путь, не сотрудник, подделка и просрочка — без профиля."""
+        tokens = [
+            profiling.sign('/other/', self.staff),
+            profiling.sign(self.path, self.author),
+            profiling.sign(self.path, self.staff) + 'x',
+        ]
+        for token in tokens:
+            self.client.get(self.path, {'profile': token})
+        with override_settings(PROFILE_LINK_MAX_AGE=-1):
+            self.client.get(
+                self.path, HTTP_X_PROFILE=profiling.sign(self.path, self.staff)
+            )
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_link_keeps_query_and_rejects_other_hosts(self):
+        """Ссылка сохраняет параметры адреса и не ведёт на чужой сайт."""
+        self.client.force_login(self.staff)
+        url = reverse('admin:core_requestprofile_link')
+        for target in ('//evil.com', '/\\evil.com', '/\t/evil.com', 'x/'):
+            with self.subTest(target=target):
+                response = self.client.get(url, {'path': target})
+                self.assertEqual(response.status_code, 400)
+        link = self.client.get(url, {'path': self.path + '?page=1'})
+        self.assertTrue(
+            link['Location'].startswith(self.path + '?page=1&profile=')
+        )
+        self.client.get(link['Location'])
+        self.assertEqual(RequestProfile.objects.get().path, self.path)
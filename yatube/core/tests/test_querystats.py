@@ -0,0 +1,101 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.models import QueryStat
+from core.querystats import fingerprint
+from posts.models import Comment, Post, User
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_literals_and_lists_are_folded(self):
+        """Запросы, отличающиеся только значениями, — одна форма."""
+        self.assertEqual(
+            fingerprint(
+                'SELECT "t2"."id" FROM "t2" WHERE "t2"."id" IN (%s, %s,\n'
+                "  %s) AND name = 'O''Neil' LIMIT 21"
+            ),
+            'SELECT "t2"."id" FROM "t2" WHERE "t2"."id" IN (...) '
+            'AND name = ? LIMIT ?'
+        )
+        self.assertEqual(
+            fingerprint('SELECT 1 FROM a WHERE id IN (%s)'),
+            fingerprint('SELECT 2 FROM a WHERE id IN (%s)')
+        )
+
+
+@override_settings(SQL_STATS_ENABLED=True, SQL_STATS_FLUSH_INTERVAL=0)
+class QueryStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='author')
+        cls.post = Post.objects.create(text='Запись', author=cls.user)
+        Comment.objects.create(text='Ответ', post=cls.post, author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        self.path = reverse('post_view', args=['author', self.post.pk])
+
+    def test_queries_are_attributed_to_views_and_templates(self):
+        """Форма запроса копит число и время по представлению и шаблону."""
+        self.client.get(self.path)
+        cache.clear()
+        self.client.get(self.path)
+        self.client.get(reverse('post-list'))
+        comments = QueryStat.objects.get(
+            view='posts.views.post_view',
+            fingerprint__contains='FROM "posts_comment"'
+        )
+        self.assertEqual(comments.count, 2)
+        self.assertRegex(comments.template, r'^comments\.html:\d+$')
+        self.assertGreaterEqual(comments.total_time, comments.max_time)
+        self.assertTrue(QueryStat.objects.filter(
+            view='api.views.PostViewSet.list'
+        ).exists())
+
+    @override_settings(SQL_SLOW_QUERY_MS=0)
+    def test_slow_queries_are_logged_with_stack(self):
+        """Запрос дольше порога попадает в журнал со стеком вызовов."""
+        with self.assertLogs('core.querystats', 'WARNING') as logs:
+            self.client.get(self.path)
+        self.assertIn('posts/conditional.py', logs.output[0])
+        self.assertNotIn('django/core/handlers', logs.output[0])
+
+    def test_report(self):
+        """Отчёт и админка показывают самые дорогие формы."""
+        self.client.get(self.path)
+        output = StringIO()
+        call_command('sql_report', '--order', 'mean', stdout=output)
+        self.assertIn('posts.views.post_view', output.getvalue())
+        self.client.force_login(User.objects.create(
+            username='admin', is_staff=True, is_superuser=True
+        ))
+        response = self.client.get(
+            reverse('admin:core_querystat_changelist')
+        )
+        self.assertContains(response, 'posts.views.post_view')
+        call_command('sql_report', '--reset', stdout=StringIO())
+        self.assertFalse(QueryStat.objects.exists())
+
+    def test_failed_flush_keeps_stats(self):
+        """Ошибка записи статистики не ломает ответ и не теряет данные."""
+        with mock.patch(
+            'core.querystats.save',
+            side_effect=OperationalError('database is locked')
+        ), self.assertLogs('core.querystats', 'ERROR'):
+            response = self.client.get(self.path)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(QueryStat.objects.exists())
+        cache.clear()
+        self.client.get(self.path)
+        comments = QueryStat.objects.get(
+            view='posts.views.post_view',
+            fingerprint__contains='FROM "posts_comment"'
+        )
+        self.assertEqual(comments.count, 2)
@@ -0,0 +1,85 @@
+import os
+import tempfile
+
+from django.db import connections
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core import routers
+from core.management.commands.copy_replicas import copy_database
+from posts.models import Post, User
+
+DUMMY_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+}
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+        self.addCleanup(routers.finish)
+
+    def test_reads_go_to_replicas_only_inside_requests(self):
+        """Вне запроса и после записи чтение идёт из основной базы."""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        routers.start()
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertTrue(routers.finish())
+        routers.start(pinned_until=float('inf'))
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertFalse(routers.finish())
+
+    def test_replicas_are_not_migrated(self):
+        """Реплики получают схему копированием, а не миграциями."""
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+
+
+@override_settings(REPLICA_DATABASES=['replica'], CACHES=DUMMY_CACHE)
+class ReadYourWritesTests(TransactionTestCase):
+    """Реплика — копия SQLite-файла, которая отстаёт от основной базы."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.replica = os.path.join(tempfile.mkdtemp(), 'replica.sqlite3')
+        connections.databases['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': cls.replica,
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica'].close()
+        del connections['replica']
+        del connections.databases['replica']
+        os.remove(cls.replica)
+        super().tearDownClass()
+
+    def sync_replica(self):
+        connections['replica'].close()
+        copy_database(self.replica)
+
+    def test_user_sees_own_comment_before_replica_catches_up(self):
+        """После комментария пользователь читает основную базу."""
+        user = User.objects.create(username='reader')
+        post = Post.objects.create(text='Запись', author=user)
+        self.client.force_login(user)
+        self.sync_replica()
+        response = self.client.post(
+            reverse('add_comment', args=[user.username, post.pk]),
+            {'text': 'Свежий комментарий'}, follow=True
+        )
+        self.assertIn(routers.PIN_COOKIE, self.client.cookies)
+        self.assertEqual(len(response.context['comments']), 1)
+        del self.client.cookies[routers.PIN_COOKIE]
+        response = self.client.get(response.redirect_chain[-1][0])
+        self.assertEqual(len(response.context['comments']), 0)
+        self.sync_replica()
+        response = self.client.get(response.request['PATH_INFO'])
+        self.assertEqual(len(response.context['comments']), 1)
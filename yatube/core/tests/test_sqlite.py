@@ -0,0 +1,74 @@
+import io
+import os
+import sqlite3
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.test import SimpleTestCase
+
+from core.management.commands.sqlite_maintenance import pragma
+
+
+class ProductionSqliteTests(SimpleTestCase):
+    databases = {'file'}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.path = os.path.join(tempfile.mkdtemp(), 'db.sqlite3')
+        connections.databases['file'] = {
+            'ENGINE': 'core.backends.sqlite3',
+            'NAME': cls.path,
+            'OPTIONS': settings.SQLITE_OPTIONS,
+        }
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['file'].close()
+        del connections['file']
+        del connections.databases['file']
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(cls.path + suffix):
+                os.remove(cls.path + suffix)
+
+    def setUp(self):
+        self.cursor = connections['file'].cursor()
+        self.addCleanup(self.cursor.close)
+
+    def test_pragmas_applied_on_connect(self):
+        """Новое соединение работает в WAL и ждёт блокировку."""
+        self.assertEqual(pragma(self.cursor, 'journal_mode'), 'wal')
+        self.assertEqual(pragma(self.cursor, 'busy_timeout'), 5000)
+        self.assertEqual(pragma(self.cursor, 'synchronous'), 1)
+
+    def test_transaction_takes_write_lock_at_begin(self):
+        """Транзакция блокирует запись сразу, а не при первом UPDATE."""
+        other = sqlite3.connect(self.path, timeout=0)
+        self.addCleanup(other.close)
+        self.cursor.execute('CREATE TABLE IF NOT EXISTS lock (x)')
+        with transaction.atomic(using='file'):
+            connections['file'].cursor().execute('SELECT 1')
+            with self.assertRaisesMessage(
+                sqlite3.OperationalError, 'database is locked'
+            ):
+                other.execute('INSERT INTO lock VALUES (1)')
+        other.execute('INSERT INTO lock VALUES (1)')
+        other.commit()
+
+    def test_maintenance_returns_free_pages_and_truncates_wal(self):
+        """Команда обслуживания освобождает страницы и очищает WAL."""
+        self.cursor.execute('CREATE TABLE IF NOT EXISTS data (blob)')
+        self.cursor.executemany(
+            'INSERT INTO data VALUES (%s)', [(b'x' * 4000,)] * 200
+        )
+        self.cursor.execute('DELETE FROM data')
+        self.assertGreater(pragma(self.cursor, 'freelist_count'), 0)
+        out = io.StringIO()
+        call_command('sqlite_maintenance', database='file', stdout=out)
+        self.assertIn('Освобождено страниц', out.getvalue())
+        self.assertEqual(pragma(self.cursor, 'freelist_count'), 0)
+        self.assertEqual(pragma(self.cursor, 'auto_vacuum'), 2)
+        self.assertEqual(os.path.getsize(self.path + '-wal'), 0)
@@ -0,0 +1,57 @@
+import json
+import re
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+METRIC = re.compile(r'(\w+);(?:dur=([\d.]+))?;?(?:desc="([^"]*)")?')
+
+
+class ServerTimingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='author')
+        Post.objects.create(text='Запись', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def metrics(self, response):
+        return {
+            name: (duration, description)
+            for name, duration, description in METRIC.findall(
+                response['Server-Timing']
+            )
+        }
+
+    def test_header_reports_database_cache_and_templates(self):
+        """Заголовок называет число запросов, попадания и время шаблонов."""
+        response = self.client.get(reverse('profile', args=['author']))
+        metrics = self.metrics(response)
+        self.assertEqual(set(metrics), {'db', 'cache', 'tpl', 'total'})
+        self.assertRegex(metrics['db'][1], r'^[1-9]\d* SQL$')
+        self.assertRegex(metrics['cache'][1], r'^hit \d+, miss [1-9]')
+        self.assertGreater(float(metrics['tpl'][0]), 0)
+        self.assertGreaterEqual(
+            float(metrics['total'][0]), float(metrics['tpl'][0])
+        )
+        response = self.client.get(reverse('profile', args=['author']))
+        self.assertRegex(self.metrics(response)['cache'][1], r'^hit [1-9]')
+
+    def test_log_line_is_json(self):
+        """В журнал попадает одна строка JSON на запрос."""
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            self.client.get(reverse('index'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], '/')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_measured(self):
+        """Запросы вне выборки проходят без заголовка."""
+        response = self.client.get(reverse('index'))
+        self.assertFalse(response.has_header('Server-Timing'))
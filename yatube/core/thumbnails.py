@@ -0,0 +1,18 @@
+import time
+
+from sorl.thumbnail.base import ThumbnailBackend
+
+from core import metrics
+
+
+class TimedThumbnailBackend(ThumbnailBackend):
+    """Время создания миниатюр попадает в метрики."""
+
+    def _create_thumbnail(self, *args, **kwargs):
+        started = time.perf_counter()
+        super()._create_thumbnail(*args, **kwargs)
+        if metrics.enabled():
+            metrics.registry.observe(
+                'yatube_thumbnail_duration_seconds', {},
+                time.perf_counter() - started
+            )
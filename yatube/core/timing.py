@@ -0,0 +1,115 @@
+import json
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.core.cache import cache
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger(__name__)
+local = threading.local()
+render = Template.render
+
+
+class RequestTiming:
+    """Запросы к базе, кэш и шаблоны за время одного запроса."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.templates = 0.0
+        self.total = 0.0
+        self.cache_hits = self.cache_misses = None
+        self.rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка execute_wrapper для всех подключений."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += time.perf_counter() - started
+
+    def count_cache(self, before, after):
+        if after is None:
+            return
+        self.cache_hits = (
+            after['l1_hits'] + after['l2_hits']
+            - before['l1_hits'] - before['l2_hits']
+        )
+        self.cache_misses = after['l2_misses'] - before['l2_misses']
+
+    def header(self):
+        metrics = [
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} SQL"',
+            f'tpl;dur={self.templates * 1000:.1f}',
+            f'total;dur={self.total * 1000:.1f}',
+        ]
+        if self.cache_hits is not None:
+            metrics.insert(1, (
+                f'cache;desc="hit {self.cache_hits}, '
+                f'miss {self.cache_misses}"'
+            ))
+        return ', '.join(metrics)
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.total * 1000, 1),
+            'db_ms': round(self.db * 1000, 1),
+            'queries': self.queries,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'template_ms': round(self.templates * 1000, 1),
+        }
+
+
+def timed_render(template, context):
+    """Template.render, который считает время только внешнего шаблона."""
+    timing = getattr(local, 'timing', None)
+    if timing is None or timing.rendering:
+        return render(template, context)
+    timing.rendering = True
+    started = time.perf_counter()
+    try:
+        return render(template, context)
+    finally:
+        timing.templates += time.perf_counter() - started
+        timing.rendering = False
+
+
+def instrument_templates():
+    Template.render = timed_render
+
+
+def cache_stats():
+    """Счётчики попаданий TwoTierCache; у других бэкендов их нет."""
+    stats = getattr(cache, 'stats', None)
+    return None if stats is None else stats.copy()
+
+
+@contextmanager
+def measure():
+    timing = local.timing = RequestTiming()
+    before = cache_stats()
+    started = time.perf_counter()
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timing))
+            yield timing
+    finally:
+        timing.total = time.perf_counter() - started
+        timing.count_cache(before, cache_stats())
+        local.timing = None
+
+
+def log(request, response, timing):
+    logger.info(json.dumps({
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        **timing.as_dict(),
+    }))
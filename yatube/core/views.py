@@ -0,0 +1,12 @@
+from django.http import Http404, HttpResponse
+
+from core import metrics
+
+
+def metrics_view(request):
+    """Метрики для Prometheus; снаружи адрес закрыт в nginx."""
+    if not metrics.enabled():
+        raise Http404
+    return HttpResponse(
+        metrics.render(), content_type='text/plain; version=0.0.4'
+    )
@@ -1,6 +1,27 @@
+from django.conf import settings
 from django.contrib import admin
+from django.core.exceptions import ValidationError
 
-from posts import models
+from posts import models, search, shards
+
+
+class ShardFilter(admin.SimpleListFilter):
+    """При шардировании список показывает записи одного шарда."""
+    title = 'шард'
+    parameter_name = 'shard'
+
+    def lookups(self, request, model_admin):
+        return [(alias, alias) for alias in settings.POST_SHARDS]
+
+    def value(self):
+        return super().value() or settings.POST_SHARDS[0]
+
+    def choices(self, changelist):
+        # Без пункта «Все»: один список не может идти по нескольким базам.
+        return list(super().choices(changelist))[1:]
+
+    def queryset(self, request, queryset):
+        return queryset.using(self.value())
 
 
 @admin.register(models.Post)
@@ -10,6 +31,36 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date', 'group')
     empty_value_display = '-пусто-'
 
+    @property
+    def show_full_result_count(self):
+        # Общее число по основной базе при шардировании всегда 0.
+        return not shards.enabled()
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_related()
+
+    def get_list_filter(self, request):
+        if shards.enabled():
+            return (ShardFilter, *self.list_filter)
+        return self.list_filter
+
+    def get_list_select_related(self, request):
+        # Связанные объекты уже подгружает with_related().
+        return ()
+
+    def get_object(self, request, object_id, from_field=None):
+        if not shards.enabled():
+            return super().get_object(request, object_id, from_field)
+        try:
+            return shards.find(self.get_queryset(request), pk=object_id)
+        except (ValueError, ValidationError):
+            return None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return search.search(search_term, queryset), False
+
 
 @admin.register(models.Group)
 class GroupAdmin(admin.ModelAdmin):
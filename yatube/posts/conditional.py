@@ -0,0 +1,109 @@
+import hashlib
+from datetime import datetime
+from functools import wraps
+
+from django.http import Http404
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from posts import models, shards, versions
+
+
+def first_pk(queryset):
+    return next(iter(queryset.values_list('pk', flat=True)[:1]), None)
+
+
+def index_scope(request):
+    return ['posts'], shards.latest(models.Post.objects.all())
+
+
+def group_scope(request, slug):
+    # Изменения записей группы уже двигают версию group:<id>.
+    group_id = first_pk(models.Group.objects.filter(slug=slug))
+    if group_id is None:
+        return None
+    return [f'group:{group_id}'], None
+
+
+def author_versions(author_id):
+    """Записи, подписки и счётчики автора, которые видны на карточке."""
+    return [
+        f'author:{author_id}',
+        f'followers:{author_id}',
+        f'follows:{author_id}',
+        f'stats:{author_id}',
+    ]
+
+
+def profile_scope(request, username):
+    author_id = first_pk(models.User.objects.filter(username=username))
+    if author_id is None:
+        return None
+    return [*author_versions(author_id), f'follows:{request.user.pk}'], None
+
+
+def post_scope(request, username, post_id):
+    try:
+        post = shards.post_or_404(
+            models.Post.objects.only('author', 'updated'),
+            username, post_id
+        )
+    except Http404:
+        return None
+    return author_versions(post.author_id), post.updated
+
+
+def validators(request, scope, kwargs):
+    """ETag и Last-Modified страницы без отрисовки шаблона."""
+    if not hasattr(request, 'validators'):
+        request.validators = (None, None)
+        found = scope(request, **kwargs)
+        if found is not None:
+            names, updated = found
+            stamp = versions.get(*names)
+            viewer = ''
+            if request.user.is_authenticated:
+                # Формы страницы несут CSRF-токен: после нового входа
+                # старая копия из кэша браузера даст 403.
+                viewer = f'{request.user.pk}|{request.META.get("CSRF_COOKIE")}'
+            query = request.GET.urlencode()
+            etag = hashlib.md5(
+                f'{stamp}|{updated}|{query}|{viewer}'.encode()
+            ).hexdigest()
+            changed = datetime.fromtimestamp(
+                max(map(int, stamp.split('.'))) / 1000000, timezone.utc
+            )
+            last_modified = max(filter(None, (updated, changed)))
+            request.validators = (
+                etag, None if request.user.is_authenticated else last_modified
+            )
+    return request.validators
+
+
+def conditional_page(scope):
+    """
+    Отвечает 304 на If-None-Match и If-Modified-Since до работы шаблона.
+
+    Last-Modified отдаётся только анонимам: у авторизованных страница
+    зависит от пользователя, а ETag это учитывает.
+    """
+    def decorator(view):
+        @condition(
+            etag_func=lambda request, **kwargs: validators(
+                request, scope, kwargs
+            )[0],
+            last_modified_func=lambda request, **kwargs: validators(
+                request, scope, kwargs
+            )[1],
+        )
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            patch_cache_control(
+                response, no_cache=True,
+                private=request.user.is_authenticated
+            )
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,177 @@
+from collections import Counter, defaultdict
+
+from django.db import router, transaction
+from django.db.models import Count, F, OuterRef
+from django.utils import timezone
+
+from posts import models, shards, versions
+
+# Поле записи, по которому считается posts_count модели.
+POSTS_BY = {models.Group: 'group', models.UserStats: 'author'}
+# Версии кэша, которые устаревают вместе со счётчиками строки.
+VERSIONS = {models.Group: 'group:{}', models.UserStats: 'stats:{}'}
+
+
+def counted(model):
+    """Подзапросы, по которым счётчики модели считаются с нуля."""
+    rows = {
+        models.Group: {
+            'posts_count': models.Post.objects.filter(group=OuterRef('pk')),
+        },
+        models.Post: {
+            'comments_count': models.Comment.objects.filter(
+                post=OuterRef('pk')
+            ),
+        },
+        models.UserStats: {
+            'followers_count': models.Follow.objects.filter(
+                author=OuterRef('pk')
+            ),
+            'following_count': models.Follow.objects.filter(
+                user=OuterRef('pk')
+            ),
+            'posts_count': models.Post.objects.filter(author=OuterRef('pk')),
+        },
+    }[model]
+    return {
+        field: models.count_subquery(queryset)
+        for field, queryset in rows.items()
+    }
+
+
+def change(queryset, **deltas):
+    return queryset.update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+
+
+def created(model, objs, sign=1):
+    groups, posts, users = Counter(), Counter(), defaultdict(Counter)
+    for obj in objs:
+        if model is models.Post:
+            users[obj.author_id]['posts_count'] += sign
+            if obj.group_id:
+                groups[obj.group_id] += sign
+        elif model is models.Comment:
+            using = router.db_for_write(models.Comment, instance=obj)
+            posts[using, obj.post_id] += sign
+        elif model is models.Follow:
+            users[obj.author_id]['followers_count'] += sign
+            users[obj.user_id]['following_count'] += sign
+    for group_id, delta in groups.items():
+        change(models.Group.objects.filter(pk=group_id), posts_count=delta)
+    for (using, post_id), delta in posts.items():
+        models.Post.objects.using(using).filter(pk=post_id).update(
+            comments_count=F('comments_count') + delta, updated=timezone.now()
+        )
+    for user_id, deltas in users.items():
+        change(models.UserStats.objects.filter(pk=user_id), **deltas)
+    if users:
+        versions.bump(*(f'stats:{user_id}' for user_id in users))
+
+
+def deleted(model, objs):
+    created(model, objs, sign=-1)
+
+
+def recount(model, objs, using):
+    """Пересчитывает счётчики строк, к которым относятся objs."""
+    parents = defaultdict(set)
+    for obj in objs:
+        if model is models.Post:
+            parents[models.UserStats].add(obj.author_id)
+            if obj.group_id:
+                parents[models.Group].add(obj.group_id)
+        elif model is models.Comment:
+            parents[models.Post].add(obj.post_id)
+        elif model is models.Follow:
+            parents[models.UserStats].update((obj.user_id, obj.author_id))
+    for parent, pks in parents.items():
+        queryset = parent.objects.filter(pk__in=pks)
+        if parent is models.Post:
+            queryset = queryset.using(using)
+        with transaction.atomic(using=queryset.db):
+            wrong = repair(queryset)
+        bump_repaired(queryset, wrong)
+
+
+def moved(post, old_group_id):
+    if old_group_id:
+        change(models.Group.objects.filter(pk=old_group_id), posts_count=-1)
+    if post.group_id:
+        change(models.Group.objects.filter(pk=post.group_id), posts_count=1)
+
+
+def repair(queryset):
+    """Исправляет разошедшиеся счётчики и возвращает pk этих строк."""
+    expected = counted(queryset.model)
+    if not shards.enabled() or queryset.model not in POSTS_BY:
+        wrong = list(queryset.exclude(**expected).values_list('pk', flat=True))
+        queryset.filter(pk__in=wrong).update(**expected)
+        return wrong
+    # Записи в шардах: подзапрос из основной базы их не видит.
+    del expected['posts_count']
+    posts = posts_counts(queryset)
+    wrong = {
+        pk for pk, count in queryset.values_list('pk', 'posts_count')
+        if count != posts.get(pk, 0)
+    }
+    wrong.update(queryset.exclude(**expected).values_list('pk', flat=True))
+    for pk in wrong:
+        queryset.filter(pk=pk).update(posts_count=posts.get(pk, 0), **expected)
+    return wrong
+
+
+def bump_repaired(queryset, pks):
+    if not pks:
+        return
+    if queryset.model is models.Post:
+        posts = queryset.filter(pk__in=pks).only('author', 'group')
+        versions.changed(models.Post, list(posts))
+    else:
+        versions.bump(*(VERSIONS[queryset.model].format(pk) for pk in pks))
+
+
+def posts_counts(queryset):
+    """Число записей во всех шардах для строк запроса Group или UserStats."""
+    field = POSTS_BY[queryset.model]
+    bounds = queryset.order_by('pk').values_list('pk', flat=True)
+    posts = models.Post.objects.filter(**{
+        f'{field}__gte': bounds.first(), f'{field}__lte': bounds.last(),
+    }).order_by().values_list(field).annotate(count=Count('pk'))
+    found = Counter()
+    for shard in shards.each(posts):
+        found.update(dict(shard))
+    return found
+
+
+def batches(queryset, size):
+    """Части запроса по size строк: границы идут по pk, а не по шагу id."""
+    ordered = queryset.order_by('pk').values_list('pk', flat=True)
+    last = None
+    while True:
+        page = ordered if last is None else ordered.filter(pk__gt=last)
+        pks = list(page[:size])
+        if not pks:
+            return
+        last = pks[-1]
+        yield queryset.filter(pk__gte=pks[0], pk__lte=last)
+
+
+def reconcile(batch_size=1000):
+    missing = models.User.objects.filter(stats=None)
+    models.UserStats.objects.bulk_create(
+        (models.UserStats(user_id=pk) for pk in missing.values_list(
+            'pk', flat=True
+        ).iterator()),
+        ignore_conflicts=True
+    )
+    repaired = Counter()
+    for model in (models.Group, models.Post, models.UserStats):
+        for queryset in shards.each(model.objects.all()):
+            for batch in batches(queryset, batch_size):
+                with transaction.atomic(using=batch.db):
+                    wrong = repair(batch)
+                bump_repaired(batch, wrong)
+                repaired[model._meta.verbose_name] += len(wrong)
+    return repaired
@@ -0,0 +1,94 @@
+import datetime as dt
+import heapq
+import json
+import zlib
+from collections import namedtuple
+from itertools import islice
+from operator import itemgetter
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from posts import models, shards
+
+CHUNK_SIZE = 2000
+
+Dataset = namedtuple('Dataset', ('model', 'fields', 'date_field'))
+
+DATASETS = {
+    'posts': Dataset(models.Post, (
+        'id', 'author', 'group', 'text', 'pub_date', 'updated', 'image',
+        'comments_count',
+    ), 'pub_date'),
+    'comments': Dataset(models.Comment, (
+        'id', 'post', 'author', 'text', 'created',
+    ), 'created'),
+    'follows': Dataset(models.Follow, ('id', 'user', 'author'), None),
+}
+
+
+def bound(dataset, value):
+    """Граница выгрузки: целое число — id, иначе дата или дата и время."""
+    if value.isdigit():
+        return 'id', int(value)
+    moment = parse_datetime(value)
+    if moment is None and parse_date(value):
+        moment = dt.datetime.combine(parse_date(value), dt.time())
+    if moment is None or dataset.date_field is None:
+        raise ValueError(f'Неверная граница выгрузки: {value}')
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, timezone.utc)
+    return dataset.date_field, moment
+
+
+def filters(dataset, since=None, until=None):
+    """Условия для since (включительно) и until (не включая)."""
+    found = {}
+    for value, lookup in ((since, 'gte'), (until, 'lt')):
+        if value:
+            field, value = bound(dataset, value)
+            found[f'{field}__{lookup}'] = value
+    return found
+
+
+def batches(queryset, fields):
+    """Строки пачками по id: каждая пачка — отдельный короткий запрос."""
+    queryset = queryset.order_by('pk').values(*fields)
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(pk__gt=last)
+        rows = list(page[:CHUNK_SIZE])
+        if not rows:
+            return
+        yield from rows
+        last = rows[-1]['id']
+
+
+def rows(dataset, conditions):
+    queryset = dataset.model._default_manager.filter(**conditions)
+    return heapq.merge(
+        *(batches(shard, dataset.fields) for shard in shards.each(queryset)),
+        key=itemgetter('id')
+    )
+
+
+def chunks(dataset, conditions):
+    """NDJSON по CHUNK_SIZE строк в куске: память не зависит от объёма."""
+    found = rows(dataset, conditions)
+    while True:
+        lines = [
+            json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+            for row in islice(found, CHUNK_SIZE)
+        ]
+        if not lines:
+            return
+        yield ''.join(lines).encode()
+
+
+def compress(chunks):
+    """gzip на лету: каждый кусок сжимается и сразу отдаётся."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
@@ -0,0 +1,140 @@
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Count, Exists, OuterRef
+
+from posts import models, shards
+
+BATCH_SIZE = 500
+
+
+def is_hot(author_id):
+    """Слишком популярным авторам ленты не раскладываются."""
+    limit = settings.FEED_FANOUT_LIMIT
+    followers = models.Follow.objects.filter(author_id=author_id)
+    return followers[:limit + 1].count() > limit
+
+
+def push(post):
+    """Раскладывает новую запись по лентам подписчиков автора."""
+    if is_hot(post.author_id):
+        models.FeedEntry.objects.create(
+            author_id=post.author_id, post=post, pub_date=post.pub_date
+        )
+        return
+    followers = models.Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    models.FeedEntry.objects.bulk_create(
+        (
+            models.FeedEntry(
+                user_id=user_id, author_id=post.author_id,
+                post=post, pub_date=post.pub_date
+            )
+            for user_id in followers.iterator()
+        ),
+        batch_size=BATCH_SIZE
+    )
+
+
+def backfill(follow):
+    """Добавляет в ленту подписчика последние записи автора."""
+    pulled = models.FeedEntry.objects.filter(
+        user=None, author_id=follow.author_id
+    ).values('post_id')
+    posts = models.Post.objects.filter(
+        author_id=follow.author_id
+    ).exclude(pk__in=pulled).values_list('pk', 'pub_date')
+    models.FeedEntry.objects.bulk_create(
+        (
+            models.FeedEntry(
+                user_id=follow.user_id, author_id=follow.author_id,
+                post_id=post_id, pub_date=pub_date
+            )
+            for post_id, pub_date in posts[:settings.FEED_BACKFILL_SIZE]
+        ),
+        batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def prune(user_id, author_id):
+    models.FeedEntry.objects.filter(
+        user_id=user_id, author_id=author_id
+    ).delete()
+
+
+def rebuild(backfill=None):
+    """
+    Пересобирает ленты всех пользователей с нуля.
+
+    backfill — сколько последних записей автора получает подписчик,
+    по умолчанию FEED_BACKFILL_SIZE.
+    """
+    models.FeedEntry.objects.all().delete()
+    hot_authors = models.Follow.objects.values('author').annotate(
+        followers=Count('pk')
+    ).filter(followers__gt=settings.FEED_FANOUT_LIMIT).values('author')
+    posts = models.Post.objects.filter(
+        author__in=hot_authors
+    ).values_list('pk', 'author_id', 'pub_date')
+    models.FeedEntry.objects.bulk_create(
+        (
+            models.FeedEntry(
+                author_id=author_id, post_id=post_id, pub_date=pub_date
+            )
+            for post_id, author_id, pub_date in posts.iterator()
+        ),
+        batch_size=BATCH_SIZE
+    )
+    authors = models.Follow.objects.exclude(
+        author__in=hot_authors
+    ).order_by().values_list('author_id', flat=True).distinct()
+    for author_id in authors.iterator():
+        fan_out(author_id, backfill or settings.FEED_BACKFILL_SIZE)
+
+
+def fan_out(author_id, size):
+    """
+    Последние записи автора в ленты всех подписчиков одним запросом.
+
+    То же, что backfill() для каждой подписки, но строки не проходят
+    через Python: на больших базах пересборка упирается именно в это.
+    """
+    feed, follow, post = (
+        model._meta.db_table
+        for model in (models.FeedEntry, models.Follow, models.Post)
+    )
+    using = router.db_for_write(models.FeedEntry)
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {feed} (user_id, author_id, post_id, pub_date) '
+            f'SELECT f.user_id, p.author_id, p.id, p.pub_date '
+            f'FROM {follow} f, (SELECT id, author_id, pub_date FROM {post} '
+            f'WHERE author_id = %s ORDER BY pub_date DESC LIMIT %s) p '
+            f'WHERE f.author_id = %s',
+            [author_id, size, author_id]
+        )
+
+
+def timeline(user):
+    """
+    Лента подписок: свои записи плюс записи популярных авторов.
+
+    Каждая часть читается по своему индексу уже упорядоченной, а части
+    сливаются в shards.Scatter. Одно условие OR по двум индексам SQLite
+    выполняет через сортировку всей ленты на каждой странице.
+    """
+    entries = models.FeedEntry.objects.all()
+    hot_authors = models.Follow.objects.filter(user=user).annotate(
+        pulled=Exists(entries.filter(user=None, author=OuterRef('author')))
+    ).filter(pulled=True).values_list('author_id', flat=True)
+    parts = [entries.filter(user=user)] + [
+        entries.filter(user=None, author_id=author_id)
+        for author_id in hot_authors
+    ]
+    return parts[0] if len(parts) == 1 else shards.Scatter(parts)
+
+
+def posts(entries):
+    post_ids = [entry.post_id for entry in entries]
+    post_list = models.Post.objects.with_related().in_bulk(post_ids)
+    return [post_list[pk] for pk in post_ids if pk in post_list]
@@ -0,0 +1,87 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from posts import plans
+
+
+def seed(size):
+    """Синтетические данные команды seed: size записей и комментариев."""
+    call_command(
+        'seed', users=max(10, size // 50), groups=5, posts=size,
+        comments=size, follows=5, workers=1, stdout=StringIO()
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет EXPLAIN QUERY PLAN для запросов всех страниц и API, '
+        'ищет полные просмотры и сортировки и предлагает индексы'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Создать столько синтетических записей на время проверки'
+        )
+        parser.add_argument(
+            '--apply', action='store_true',
+            help='Временно создать предложенные индексы и сравнить время'
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Проверка планов поддерживает только SQLite')
+        with transaction.atomic():
+            if options['seed']:
+                seed(options['seed'])
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            user, post = plans.sample()
+            if post is None:
+                raise CommandError(
+                    'Нужна запись с группой и комментарием, запустите с --seed'
+                )
+            findings = [
+                plans.audit(query) for query in plans.capture(user, post)
+            ]
+            self.report(findings)
+            if options['apply']:
+                self.compare(findings, options['repeat'])
+            transaction.set_rollback(True)
+
+    def report(self, findings):
+        flagged = [finding for finding in findings if finding.problems]
+        self.stdout.write(
+            f'Проверено запросов: {len(findings)}, '
+            f'с проблемами: {len(flagged)}'
+        )
+        for finding in flagged:
+            self.stdout.write(f'\n[{finding.query.route}] {finding.query.sql}')
+            for detail in finding.plan:
+                self.stdout.write(f'    {detail}')
+            self.stdout.write(
+                self.style.WARNING('  ' + '; '.join(finding.problems))
+            )
+            if finding.index:
+                columns = ', '.join(finding.index.columns)
+                self.stdout.write(self.style.SUCCESS(
+                    f'  индекс: {finding.index.table} ({columns})'
+                ))
+
+    def compare(self, findings, repeat):
+        improved = [finding for finding in findings if finding.index]
+        if not improved:
+            return
+        before = [plans.latency(f.query, repeat) for f in improved]
+        for proposal in {finding.index for finding in improved}:
+            plans.create_index(proposal)
+        after = [plans.latency(f.query, repeat) for f in improved]
+        self.stdout.write('\nВремя до и после индексов, мс:')
+        for finding, old, new in zip(improved, before, after):
+            self.stdout.write(
+                f'  {finding.query.route:<20} {old:8.2f} -> {new:8.2f}'
+            )
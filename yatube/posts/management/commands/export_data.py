@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает записи, комментарии или подписки в NDJSON-файл '
+        'в том же формате, что и /api/v1/export/'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=export.DATASETS)
+        parser.add_argument('output', help='Файл; .gz сжимается gzip')
+        parser.add_argument('--since', help='id или дата, включительно')
+        parser.add_argument('--until', help='id или дата, не включая')
+        parser.add_argument('--gzip', action='store_true')
+
+    def handle(self, *args, **options):
+        dataset = export.DATASETS[options['dataset']]
+        try:
+            conditions = export.filters(
+                dataset, options['since'], options['until']
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        chunks = self.counted(export.chunks(dataset, conditions))
+        if options['gzip'] or options['output'].endswith('.gz'):
+            chunks = export.compress(chunks)
+        with open(options['output'], 'wb') as output:
+            for chunk in chunks:
+                output.write(chunk)
+        self.stdout.write(f'Выгружено строк: {self.rows}')
+
+    def counted(self, chunks):
+        self.rows = 0
+        for chunk in chunks:
+            self.rows += chunk.count(b'\n')
+            yield chunk
@@ -0,0 +1,98 @@
+import json
+import multiprocessing
+import os
+import time
+from contextlib import ExitStack, suppress
+from functools import partial
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import importer
+
+MAX_REPORTED = 20
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует пользователей, группы, записи, комментарии и подписки '
+        'из NDJSON или CSV (можно .gz) пачками через bulk_create'
+    )
+
+    def add_arguments(self, parser):
+        for kind in importer.KINDS:
+            parser.add_argument(f'--{kind}', metavar='FILE')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Процессов для разбора строк; 1 — без отдельных процессов'
+        )
+        parser.add_argument(
+            '--state', default='import_state.json',
+            help='Файл прогресса: после сбоя импорт продолжится с него'
+        )
+
+    def handle(self, *args, **options):
+        files = [
+            (kind, options[kind]) for kind in importer.KINDS if options[kind]
+        ]
+        if not files:
+            raise CommandError('Укажите хотя бы один файл, например --posts')
+        self.state_path = options['state']
+        self.state = {}
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as state:
+                self.state = json.load(state)
+        target = importer.Importer()
+        with ExitStack() as stack:
+            parse = map
+            if options['workers'] > 1:
+                pool = multiprocessing.Pool(options['workers'])
+                parse = stack.enter_context(pool).imap
+            stack.enter_context(importer.loading())
+            for kind, path in files:
+                self.load(parse, target, kind, path, options['batch_size'])
+        self.stdout.write('Пересчёт счётчиков и лент...')
+        importer.rebuild()
+        with suppress(FileNotFoundError):
+            os.remove(self.state_path)
+        self.stdout.write(self.style.SUCCESS('Импорт завершён'))
+
+    def load(self, parse, target, kind, path, batch_size):
+        key = f'{kind}:{os.path.abspath(path)}'
+        done = skipped = self.state.get(key, 0)
+        inserted = rejected = 0
+        collided = []
+        started = reported = time.monotonic()
+        chunks = importer.read(path, skipped, batch_size)
+        for records, bad in parse(partial(importer.parse, kind), chunks):
+            added, found = target.insert(kind, records)
+            inserted += added
+            collided += found
+            rejected += bad
+            done += len(records) + bad
+            self.save(key, done)
+            if time.monotonic() - reported >= 1:
+                reported = time.monotonic()
+                self.progress(kind, done - skipped, started)
+        self.progress(kind, done - skipped, started)
+        self.stdout.write(
+            f'{kind}: вставлено {inserted}, уже были в базе {len(collided)}, '
+            f'с ошибками {rejected}, '
+            f'пропущено как уже импортированные {skipped}'
+        )
+        if collided and kind in ('posts', 'comments'):
+            ids = ', '.join(str(obj.pk) for obj in collided[:MAX_REPORTED])
+            self.stderr.write(
+                f'{kind}: id из файла уже заняты в базе, строки не '
+                f'вставлены: {ids}'
+                + (' ...' if len(collided) > MAX_REPORTED else '')
+            )
+
+    def save(self, key, done):
+        self.state[key] = done
+        with open(self.state_path, 'w') as state:
+            json.dump(self.state, state)
+
+    def progress(self, kind, rows, started):
+        rate = rows / max(time.monotonic() - started, 1e-6)
+        self.stdout.write(f'{kind}: {rows} строк, {rate:.0f} строк/с')
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import shards
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит записи и комментарии в шарды их авторов: после '
+        'включения шардирования и после изменения списка POST_SHARDS'
+    )
+
+    def handle(self, *args, **options):
+        if not settings.POST_SHARDS:
+            raise CommandError('Шардирование не включено: задайте POST_SHARDS')
+        moved = shards.rebalance()
+        for (source, target), count in sorted(moved.items()):
+            self.stdout.write(f'{source} -> {target}: {count}')
+        self.stdout.write(f'Перенесено записей: {sum(moved.values())}')
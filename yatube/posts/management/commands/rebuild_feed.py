@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import feed, shards
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает ленты подписок всех пользователей'
+
+    def handle(self, *args, **kwargs):
+        if shards.enabled():
+            self.stdout.write(
+                'Записи в шардах: ленты подписок собираются из шардов '
+                'при чтении, пересобирать нечего'
+            )
+            return
+        with transaction.atomic():
+            feed.rebuild()
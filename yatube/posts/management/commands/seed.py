@@ -0,0 +1,114 @@
+import datetime as dt
+import multiprocessing
+import os
+import time
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from posts import importer, models, seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, записями, '
+        'комментариями и подписками для нагрузочных тестов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=30000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Подписок на пользователя в среднем'
+        )
+        parser.add_argument(
+            '--hot', type=int, default=5,
+            help='Авторов, на которых подписана половина пользователей'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--until', type=dt.date.fromisoformat,
+            help='Дата последних записей, YYYY-MM-DD; данные зависят от неё'
+        )
+        parser.add_argument(
+            '--feed-backfill', type=int,
+            help='Записей автора в ленте подписчика, по умолчанию '
+                 'FEED_BACKFILL_SIZE; ленты — самая большая таблица'
+        )
+        parser.add_argument('--password', default='yatube-seed')
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Процессов для генерации строк; на результат не влияет'
+        )
+
+    def handle(self, *args, **options):
+        # Подписаться можно только на других пользователей.
+        options['follows'] = min(
+            options['follows'], max(options['users'] - 1, 0)
+        )
+        if not options['users'] and options['posts']:
+            raise CommandError('Записям нужны пользователи')
+        if not options['posts'] and options['comments']:
+            raise CommandError('Комментариям нужны записи')
+        until = dt.datetime.combine(
+            options['until'] or timezone.now().date(), dt.time()
+        )
+        seeder = seed.Seeder(
+            options['seed'], timezone.make_aware(until, timezone.utc),
+            options['password'], options['hot']
+        )
+        seeder.plan(
+            options['users'], options['groups'], options['posts'],
+            options['comments']
+        )
+        steps = (
+            (models.User, 'make_users', options['users'], {}),
+            (models.Group, 'make_groups', options['groups'], {}),
+            (models.Post, 'make_posts', options['posts'], {}),
+            (models.Comment, 'make_comments', options['comments'], {}),
+            (models.Follow, 'make_follows', options['users'], {
+                'per_user': options['follows'],
+            }),
+        )
+        seed.start_worker(seeder)
+        with ExitStack() as stack:
+            generate = map
+            if options['workers'] > 1:
+                pool = multiprocessing.Pool(
+                    options['workers'], seed.start_worker, (seeder,)
+                )
+                generate = stack.enter_context(pool).imap
+            stack.enter_context(importer.loading())
+            for model, method, count, kwargs in steps:
+                tasks = [
+                    (method, start, min(start + options['batch_size'], count),
+                     kwargs)
+                    for start in range(0, count, options['batch_size'])
+                ]
+                self.insert(seeder, model, generate(seed.generate, tasks))
+        self.stdout.write('Пересчёт счётчиков и лент...')
+        with seed.without_indexes(models.FeedEntry):
+            importer.rebuild(options['feed_backfill'])
+        self.stdout.write(self.style.SUCCESS('Готово'))
+
+    def insert(self, seeder, model, chunks):
+        name = model._meta.model_name
+        count = 0
+        started = reported = time.monotonic()
+        with seed.without_indexes(model):
+            for rows in chunks:
+                seeder.write(model, rows)
+                count += len(rows)
+                if time.monotonic() - reported >= 1:
+                    reported = time.monotonic()
+                    self.progress(name, count, started)
+        self.progress(name, count, started)
+
+    def progress(self, name, count, started):
+        rate = count / max(time.monotonic() - started, 1e-6)
+        self.stdout.write(f'{name}: {count} строк, {rate:.0f} строк/с')
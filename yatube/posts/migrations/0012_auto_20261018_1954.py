@@ -0,0 +1,75 @@
+# Generated by Django 2.2.6 on 2026-10-18 19:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def count_subquery(queryset):
+    return models.Subquery(
+        queryset.order_by().annotate(
+            count=models.Func(models.F('pk'), function='COUNT')
+        ).values('count'),
+        output_field=models.IntegerField()
+    )
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    UserStats = apps.get_model('posts', 'UserStats')
+    UserStats.objects.bulk_create(
+        UserStats(user_id=pk)
+        for pk in User.objects.values_list('pk', flat=True).iterator()
+    )
+    UserStats.objects.update(
+        followers_count=count_subquery(
+            Follow.objects.filter(author=models.OuterRef('pk'))
+        ),
+        following_count=count_subquery(
+            Follow.objects.filter(user=models.OuterRef('pk'))
+        ),
+        posts_count=count_subquery(
+            Post.objects.filter(author=models.OuterRef('pk'))
+        ),
+    )
+    Group.objects.update(posts_count=count_subquery(
+        Post.objects.filter(group=models.OuterRef('pk'))
+    ))
+    Post.objects.update(comments_count=count_subquery(
+        Comment.objects.filter(post=models.OuterRef('pk'))
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0011_auto_20261018_1947'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('followers_count', models.IntegerField(default=0)),
+                ('following_count', models.IntegerField(default=0)),
+                ('posts_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
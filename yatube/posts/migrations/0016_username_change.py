@@ -0,0 +1,20 @@
+# Generated by Django 2.2.6 on 2026-10-18 22:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_auto_20261018_2013'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsernameChange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.IntegerField()),
+            ],
+        ),
+    ]
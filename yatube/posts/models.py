@@ -4,18 +4,104 @@ from django.db import models
 User = get_user_model()
 
 
-class Group(models.Model):
+def count_subquery(queryset):
+    return models.Subquery(
+        queryset.order_by().annotate(
+            count=models.Func(models.F('pk'), function='COUNT')
+        ).values('count'),
+        output_field=models.IntegerField()
+    )
+
+
+class CountedQuerySet(models.QuerySet):
+    """bulk_create не шлёт сигналов: счётчики и версии правим здесь."""
+
+    def create(self, **kwargs):
+        from posts import shards
+        if self._db is not None or not shards.is_sharded(self.model):
+            return super().create(**kwargs)
+        obj = self.model(**kwargs)
+        obj.save(force_insert=True)
+        return obj
+
+    def bulk_create(self, objs, batch_size=None, ignore_conflicts=False):
+        from posts import counters, shards, versions
+        if self._db is None and shards.is_sharded(self.model):
+            return shards.bulk_create(
+                self, objs, batch_size=batch_size,
+                ignore_conflicts=ignore_conflicts
+            )
+        objs = super().bulk_create(
+            objs, batch_size=batch_size, ignore_conflicts=ignore_conflicts
+        )
+        if ignore_conflicts:
+            # Какие строки пропущены, неизвестно: счётчики пересчитываются.
+            counters.recount(self.model, objs, self.db)
+        else:
+            counters.created(self.model, objs)
+        versions.changed(self.model, objs)
+        return objs
+
+    def with_related(self, *related):
+        """
+        Связанные объекты без лишних запросов.
+
+        В шарде нет пользователей и групп, JOIN с ними пуст: при
+        шардировании связанные объекты догружаются из основной базы.
+        """
+        from posts import shards
+        if shards.is_sharded(self.model):
+            return self.prefetch_related(*related)
+        return self.select_related(*related)
+
+
+class CountedModel(models.Model):
+    """
+    Счётчики меняются только через F(), save() их не перезаписывает.
+
+    Поля убираются из самого UPDATE, а не через update_fields: так
+    force_insert и повторное сохранение удалённой строки работают как
+    обычно — если UPDATE ничего не задел, строка вставляется целиком.
+    """
+    counter_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields,
+                   forced_update):
+        if update_fields is None:
+            values = [
+                value for value in values
+                if value[0].name not in self.counter_fields
+            ]
+        return super()._do_update(
+            base_qs, using, pk_val, values, update_fields, forced_update
+        )
+
+
+class Group(CountedModel):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.IntegerField(default=0, editable=False)
+
+    counter_fields = ('posts_count',)
 
     def __str__(self):
         return self.title
 
 
-class Post(models.Model):
+class PostQuerySet(CountedQuerySet):
+    def with_related(self, *related):
+        """Запись с автором и группой."""
+        return super().with_related('author', 'group', *related)
+
+
+class Post(CountedModel):
     text = models.TextField()
     pub_date = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated = models.DateTimeField(auto_now=True, db_index=True)
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name='posts'
     )
@@ -24,9 +110,24 @@ class Post(models.Model):
         blank=True, null=True
     )
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    comments_count = models.IntegerField(default=0, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    counter_fields = ('comments_count',)
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_date_idx'
+            ),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -42,6 +143,16 @@ class Comment(models.Model):
         User, on_delete=models.CASCADE, related_name='comments'
     )
 
+    objects = CountedQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['created']
+        indexes = [
+            models.Index(
+                fields=('post', 'created'), name='comment_post_created_idx'
+            ),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -51,6 +162,8 @@ class Follow(models.Model):
         User, on_delete=models.CASCADE, related_name='following'
     )
 
+    objects = CountedQuerySet.as_manager()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -62,3 +175,56 @@ class Follow(models.Model):
                 ), name='not_self_follow'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=('author', 'user'), name='follow_author_user_idx'
+            ),
+        ]
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, related_name='stats',
+        primary_key=True
+    )
+    followers_count = models.IntegerField(default=0)
+    following_count = models.IntegerField(default=0)
+    posts_count = models.IntegerField(default=0)
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='feed',
+        blank=True, null=True, db_index=False
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='+'
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name='feed_entries'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-pub_date', '-post']
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'post'), name='unique_feed_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='feed_user_date_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-post'),
+                name='feed_pulled_idx',
+                condition=models.Q(user=None)
+            ),
+        ]
+
+
+class UsernameChange(models.Model):
+    """Журнал переименований и удалений для индекса имён в процессах."""
+    user_id = models.IntegerField()
@@ -0,0 +1,144 @@
+import base64
+from collections import namedtuple
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+AFTER = 'a'
+BEFORE = 'b'
+
+PageLink = namedtuple('PageLink', ('number', 'cursor'))
+
+
+def encode_cursor(direction, key, number):
+    pub_date, pk = key
+    raw = f'{direction}|{pub_date.isoformat()}|{pk}|{number}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(cursor + padding).decode()
+        direction, pub_date, pk, number = raw.split('|')
+        key = (parse_datetime(pub_date), int(pk))
+        number = int(number)
+    except ValueError:
+        return None
+    if direction not in (AFTER, BEFORE) or key[0] is None or number < 1:
+        return None
+    if direction == AFTER:
+        number = max(number, 2)
+    return direction, key, number
+
+
+class KeysetPaginator(Paginator):
+    """
+    Постраничный вывод по ключу (дата, id) без OFFSET и COUNT.
+
+    Страница открывается по непрозрачному курсору, ссылки строятся только
+    на несколько соседних страниц. Номер страницы без курсора по-прежнему
+    понимается, чтобы не ломать старые ссылки вида ?page=N.
+    """
+    window = 2
+
+    def __init__(self, object_list, per_page, keys=('pub_date', 'pk')):
+        super().__init__(object_list, per_page)
+        self.keys = keys
+        self.cursor = ''
+        self.links = []
+        self.previous_link = None
+        self.next_link = None
+
+    def get_page(self, number=None, cursor=None):
+        state = decode_cursor(cursor)
+        if state is None:
+            direction, key, number = None, None, self.clean_number(number)
+        else:
+            direction, key, number = state
+            self.cursor = cursor
+        if direction == BEFORE:
+            object_list = list(self.newer(key)[:self.per_page])[::-1]
+            if len(object_list) < self.per_page:
+                direction, number, self.cursor = None, 1, ''
+        if direction == AFTER:
+            object_list = list(self.older(key)[:self.per_page])
+        elif direction is None:
+            offset = (number - 1) * self.per_page
+            object_list = list(self.ordered()[offset:offset + self.per_page])
+        if not object_list and number > 1:
+            number, self.cursor = 1, ''
+            object_list = list(self.ordered()[:self.per_page])
+        if object_list:
+            number = self.link_pages(object_list, number)
+        self.num_pages = number + (self.next_link is not None)
+        return self._get_page(object_list, number, self)
+
+    def clean_number(self, number):
+        try:
+            return max(int(number), 1)
+        except (TypeError, ValueError):
+            return 1
+
+    def ordered(self, descending=True):
+        prefix = '-' if descending else ''
+        return self.object_list.order_by(*(prefix + k for k in self.keys))
+
+    def older(self, key):
+        date_field, pk_field = self.keys
+        pub_date, pk = key
+        return self.ordered().filter(
+            **{f'{date_field}__lte': pub_date}
+        ).filter(
+            Q(**{f'{date_field}__lt': pub_date}) | Q(**{f'{pk_field}__lt': pk})
+        )
+
+    def newer(self, key):
+        date_field, pk_field = self.keys
+        pub_date, pk = key
+        return self.ordered(descending=False).filter(
+            **{f'{date_field}__gte': pub_date}
+        ).filter(
+            Q(**{f'{date_field}__gt': pub_date}) | Q(**{f'{pk_field}__gt': pk})
+        )
+
+    def key(self, obj):
+        return tuple(getattr(obj, field) for field in self.keys)
+
+    def link_pages(self, object_list, number):
+        first, last = self.key(object_list[0]), self.key(object_list[-1])
+        limit = self.per_page * self.window
+        newer = []
+        if number > 1:
+            newer = self.newer(first).values_list(*self.keys)
+            newer = list(newer[:limit + 1])
+            if len(newer) <= limit:
+                number = -(-len(newer) // self.per_page) + 1
+            else:
+                number = max(number, self.window + 2)
+        older = self.older(last).values_list(*self.keys)
+        older = list(older[:limit - self.per_page + 1])
+        backward = []
+        for step in range(1, self.window + 1):
+            if number - step < 1:
+                break
+            if len(newer) <= step * self.per_page:
+                backward.append(PageLink(1, None))
+                break
+            edge = newer[(step - 1) * self.per_page - 1] if step > 1 else first
+            cursor = encode_cursor(BEFORE, edge, number - step)
+            backward.append(PageLink(number - step, cursor))
+        forward = []
+        for step in range(self.window):
+            if len(older) <= step * self.per_page:
+                break
+            edge = last if step == 0 else older[step * self.per_page - 1]
+            cursor = encode_cursor(AFTER, edge, number + step + 1)
+            forward.append(PageLink(number + step + 1, cursor))
+        self.previous_link = backward[0] if backward else None
+        self.next_link = forward[0] if forward else None
+        self.links = backward[::-1] + [PageLink(number, self.cursor)] + forward
+        return number
@@ -0,0 +1,195 @@
+import re
+import time
+from collections import namedtuple
+
+from django.db import connection
+from django.test import override_settings
+from django.urls import URLResolver, get_resolver, reverse
+from rest_framework.test import APIClient
+
+from posts import models
+
+SKIPPED_NAMESPACES = {'admin', 'djdt'}
+SKIPPED_ROUTES = {'logout', 'jwt-create', 'jwt-refresh', 'jwt-verify'}
+SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+TEMP_SORT = 'USE TEMP B-TREE FOR'
+MULTI_INDEX = 'MULTI-INDEX OR'
+ORDER_BY = re.compile(r' ORDER BY (.+?)(?: LIMIT| OFFSET|$)')
+ORDER_TABLE = re.compile(r'"(\w+)"\.')
+DUMMY_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+}
+
+Query = namedtuple('Query', ('route', 'sql', 'params'))
+Finding = namedtuple('Finding', ('query', 'plan', 'problems', 'index'))
+Proposal = namedtuple('Proposal', ('table', 'columns'))
+
+
+def walk(patterns, namespace=None, params=()):
+    for pattern in patterns:
+        found = params + tuple(pattern.pattern.regex.groupindex)
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace in SKIPPED_NAMESPACES:
+                continue
+            yield from walk(
+                pattern.url_patterns, pattern.namespace or namespace, found
+            )
+        elif pattern.name and 'format' not in found:
+            name = f'{namespace}:{pattern.name}' if namespace else pattern.name
+            yield name, found
+
+
+def paths(post):
+    """Адреса всех именованных маршрутов для записи с группой."""
+    values = {
+        'username': post.author.username,
+        'post_id': post.pk,
+        'slug': post.group.slug,
+    }
+    objects = {
+        'post': post,
+        'group': post.group,
+        'comments': post.comments.first(),
+    }
+    routes = dict(walk(get_resolver().url_patterns))
+    for name, params in routes.items():
+        if name in SKIPPED_ROUTES:
+            continue
+        kwargs = {
+            param: values.get(param) or getattr(
+                objects.get(name.split('-')[0]), 'pk', None
+            )
+            for param in params
+        }
+        if None not in kwargs.values():
+            yield name, reverse(name, kwargs=kwargs)
+
+
+def capture(user, post):
+    """Все SELECT, которые выполняют маршруты, без кэша страниц."""
+    client = APIClient()
+    client.force_login(user)
+    client.force_authenticate(user)
+    captured = {}
+    route = None
+
+    def record(execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith('SELECT'):
+            captured.setdefault(sql, Query(route, sql, tuple(params or ())))
+        return execute(sql, params, many, context)
+
+    with override_settings(CACHES=DUMMY_CACHE):
+        with connection.execute_wrapper(record):
+            for route, path in paths(post):
+                client.get(path)
+    return list(captured.values())
+
+
+def explain(query):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {query.sql}', query.params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def columns(sql, table, pattern):
+    return re.findall(rf'"{table}"\."(\w+)"{pattern}', sql)
+
+
+def propose(sql, table):
+    """Составной индекс: сначала условия равенства, затем сортировка."""
+    equal = columns(sql, table, r' (?:= %s|IN \()')
+    order = ORDER_BY.search(sql)
+    ordered = []
+    if order:
+        ordered = re.findall(
+            rf'"{table}"\."(\w+)" ?(ASC|DESC)?', order.group(1)
+        )
+    result = list(dict.fromkeys(equal))
+    for column, direction in ordered:
+        if column not in result:
+            result.append(f'{column} DESC' if direction == 'DESC' else column)
+    if not equal or len(result) < 2 or indexed(table, result):
+        return None
+    return Proposal(table, tuple(result))
+
+
+def indexed(table, wanted):
+    wanted = [column.split()[0] for column in wanted]
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return any(
+        constraint['columns'][:len(wanted)] == wanted
+        for constraint in constraints.values() if constraint['index']
+    )
+
+
+def order_table(sql):
+    order = ORDER_BY.search(sql)
+    table = order and ORDER_TABLE.search(order.group(1))
+    return table.group(1) if table else None
+
+
+def audit(query):
+    """
+    Проблемы плана запроса и индекс, который их снимает.
+
+    Для OR по разным индексам индекс не предлагается: сортировку после
+    объединения веток составной индекс не уберёт.
+    """
+    plan = explain(query)
+    problems = []
+    for detail in plan:
+        scan = SCAN.match(detail)
+        if scan:
+            table = scan.group(1)
+            problems.append((table, f'полный просмотр {table}'))
+        elif detail.startswith(TEMP_SORT):
+            problems.append((order_table(query.sql), detail.lower()))
+    proposal = None
+    if MULTI_INDEX not in plan:
+        for table, _ in problems:
+            proposal = table and propose(query.sql, table)
+            if proposal:
+                break
+    return Finding(query, plan, [problem for _, problem in problems], proposal)
+
+
+def create_index(proposal):
+    names = [column.split()[0] for column in proposal.columns]
+    name = f'audit_{proposal.table}_{"_".join(names)}'[:60]
+    columns = ', '.join(
+        ' '.join([f'"{column.split()[0]}"'] + column.split()[1:])
+        for column in proposal.columns
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" '
+            f'ON "{proposal.table}" ({columns})'
+        )
+
+
+def latency(query, repeat):
+    """Лучшее время выполнения запроса из repeat попыток, мс."""
+    best = float('inf')
+    with connection.cursor() as cursor:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            cursor.execute(query.sql, query.params)
+            cursor.fetchall()
+            best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def sample():
+    """Запись с группой и комментарием, на которой проверяются маршруты."""
+    post = models.Post.objects.with_related().exclude(group=None).filter(
+        comments_count__gt=0
+    ).first()
+    if post is None:
+        return None, None
+    reader = models.Follow.objects.filter(
+        author=post.author
+    ).select_related('user').first()
+    return (reader.user if reader else post.author), post
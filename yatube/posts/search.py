@@ -0,0 +1,115 @@
+import re
+from contextlib import contextmanager
+
+from django.db import connections
+
+from posts import models, shards
+
+MAX_TERMS = 8
+MIN_STEM = 3
+RECENCY_DAYS = 30
+TOKEN = re.compile(r'[^\W_]+')
+SUFFIXES = sorted((
+    'иями', 'ями', 'ами', 'ией', 'иях', 'ях', 'ах', 'ов', 'ев', 'ей', 'ой',
+    'ий', 'ый', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ую', 'юю', 'ом', 'ем',
+    'ам', 'ям', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ых', 'их',
+    'ешь', 'ете', 'ишь', 'ите', 'ет', 'ит', 'ут', 'ют', 'ат', 'ят',
+    'ать', 'ять', 'ить', 'еть', 'уть', 'ться', 'тся', 'ла', 'ли', 'ло',
+    'ть', 'ия', 'ии', 'ию', 'ость', 'ости', 'а', 'я', 'о', 'е', 'ы',
+    'и', 'у', 'ю', 'ь', 'й',
+), key=len, reverse=True)
+INSERT_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text);
+    END
+"""
+RANK = (
+    "bm25(posts_post_fts) / "
+    "(1 + (julianday('now') - julianday(posts_post.pub_date)) / %s)"
+)
+
+
+def stem(word):
+    """Отрезает русское окончание, оставляя основу не короче MIN_STEM."""
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            return word[:-len(suffix)]
+    return word
+
+
+def terms(query):
+    words = TOKEN.findall(query.lower().replace('ё', 'е'))
+    return [stem(word) for word in words[:MAX_TERMS]]
+
+
+def search(query, queryset=None):
+    """
+    Записи, где есть все слова запроса в любой форме.
+
+    В SQLite ищет по индексу FTS5 posts_post_fts: основы слов ищутся как
+    префиксы, порядок — bm25 с поправкой на свежесть записи. Индекс
+    ведут триггеры на posts_post; если таблицу пересоздаст миграция,
+    триггеры нужно создать заново и вызвать rebuild(). Scatter ищет в
+    каждом шарде и сливает результаты по рангу.
+    """
+    if queryset is None:
+        queryset = shards.scatter(models.Post.objects.all())
+    if isinstance(queryset, shards.Scatter):
+        found = [search(query, shard) for shard in queryset.querysets]
+        return shards.Scatter(found, ordering=merge_order(found[0]))
+    found = terms(query)
+    if not found:
+        return queryset.none()
+    if connections[queryset.db].vendor != 'sqlite':
+        for term in found:
+            queryset = queryset.filter(text__icontains=term)
+        return queryset.order_by('-pub_date')
+    return queryset.extra(
+        select={'rank': RANK},
+        select_params=[RECENCY_DAYS],
+        tables=['posts_post_fts'],
+        where=[
+            'posts_post_fts.rowid = posts_post.id',
+            'posts_post_fts MATCH %s',
+        ],
+        params=[' '.join(f'"{term}"*' for term in found)],
+        order_by=['rank', '-pub_date'],
+    )
+
+
+def merge_order(queryset):
+    if connections[queryset.db].vendor != 'sqlite':
+        return ('-pub_date',)
+    return ('rank',)
+
+
+def rebuild(using='default'):
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO posts_post_fts(posts_post_fts) VALUES ('rebuild')"
+            )
+
+
+@contextmanager
+def suspended(using='default'):
+    """
+    Массовая вставка без построчного обновления индекса.
+
+    Триггер вставки снимается на время блока, в конце возвращается, и
+    индекс один раз пересобирается целиком.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('DROP TRIGGER IF EXISTS posts_post_fts_insert')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(INSERT_TRIGGER)
+        rebuild(using)
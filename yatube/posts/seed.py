@@ -0,0 +1,258 @@
+import datetime as dt
+import random
+from array import array
+from bisect import bisect
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, router, transaction
+from django.db.models import Max
+from faker import Faker
+
+from posts import models, shards
+
+ZIPF_EXPONENT = 1.1
+HOT_SHARE = 0.5
+GROUP_SHARE = 0.3
+TEXTS = 1000
+DAYS = 365
+FIELDS = {
+    models.User: (
+        'id', 'username', 'first_name', 'last_name', 'email', 'password',
+        'is_superuser', 'is_staff', 'is_active', 'date_joined',
+    ),
+    models.Group: ('id', 'slug', 'title', 'description', 'posts_count'),
+    models.Post: (
+        'id', 'author', 'group', 'text', 'pub_date', 'updated',
+        'comments_count',
+    ),
+    models.Comment: ('id', 'post', 'author', 'text', 'created'),
+    models.Follow: ('user', 'author'),
+}
+
+
+@lru_cache()
+def faker():
+    return Faker('ru_RU')
+
+
+def utc_text(moment):
+    """Дата UTC в формате, в котором её хранит Django для SQLite."""
+    return str(moment.replace(tzinfo=None))
+
+
+class Seeder:
+    """
+    Синтетические данные: одинаковые для одного seed и даты конца.
+
+    Строки собираются кусками, у каждого куска свой генератор случайных
+    чисел из seed, вида данных и начала куска, поэтому куски можно
+    строить в любом порядке и в разных процессах. Авторство записей и
+    подписки распределены по Ципфу: немногие авторы пишут больше всех и
+    собирают больше всех подписчиков, а на hot самых популярных
+    подписана половина пользователей. id идут после уже существующих,
+    даты записей растут вместе с id.
+    """
+
+    def __init__(self, seed, until, password, hot=5):
+        self.seed = seed
+        self.until = until
+        self.since = until - dt.timedelta(days=DAYS)
+        self.password = make_password(password, salt=f'seed{seed}')
+        self.hot = hot
+        fake = faker()
+        fake.seed_instance(seed)
+        self.texts = [fake.paragraph(5) for _ in range(TEXTS)]
+        self.replies = [fake.sentence() for _ in range(TEXTS)]
+        self.users = self.groups = self.posts = self.comments = range(0)
+        self.popular = []
+        self.weights = []
+        self.authors = array('q')
+        self.date_value = connection.ops.adapt_datetimefield_value
+        if connection.vendor == 'sqlite':
+            self.date_value = utc_text
+
+    def random(self, kind, start):
+        return random.Random(f'{self.seed}:{kind}:{start}')
+
+    def ids(self, model, count):
+        found = (
+            queryset.aggregate(last=Max('pk'))['last']
+            for queryset in shards.each(model._default_manager.all())
+        )
+        start = max(filter(None, found), default=0) + 1
+        return range(start, start + count)
+
+    def plan(self, users, groups, posts, comments):
+        """id всех видов данных и популярность авторов — до генерации."""
+        self.users = self.ids(models.User, users)
+        self.groups = self.ids(models.Group, groups)
+        self.posts = self.ids(models.Post, posts)
+        self.comments = self.ids(models.Comment, comments)
+        self.popular = list(self.users)
+        self.random('popular', 0).shuffle(self.popular)
+        # Накопленные веса: у i-го по популярности вес 1 / i^s.
+        self.weights = list(accumulate(
+            1 / rank ** ZIPF_EXPONENT for rank in range(1, users + 1)
+        ))
+
+    def pick(self, rng):
+        point = rng.random() * self.weights[-1]
+        return self.popular[bisect(self.weights, point)]
+
+    def date(self, rng, position, total):
+        share = (position + rng.random()) / max(total, 1)
+        return self.since + (self.until - self.since) * share
+
+    def make_users(self, start, stop):
+        fake = faker()
+        fake.seed_instance(f'{self.seed}:users:{start}')
+        joined = self.date_value(self.since)
+        return [
+            (
+                pk, f'{fake.user_name()}_{pk}', fake.first_name(),
+                fake.last_name(), f'user{pk}@example.com', self.password,
+                False, False, True, joined,
+            )
+            for pk in self.users[start:stop]
+        ]
+
+    def make_groups(self, start, stop):
+        fake = faker()
+        fake.seed_instance(f'{self.seed}:groups:{start}')
+        rng = self.random('groups', start)
+        return [
+            (
+                pk, f'group-{pk}', fake.catch_phrase()[:200],
+                rng.choice(self.texts), 0,
+            )
+            for pk in self.groups[start:stop]
+        ]
+
+    def make_posts(self, start, stop):
+        rng = self.random('posts', start)
+        rows = []
+        for position in range(start, stop):
+            group_id = None
+            if self.groups and rng.random() < GROUP_SHARE:
+                group_id = rng.choice(self.groups)
+            pub_date = self.date_value(
+                self.date(rng, position, len(self.posts))
+            )
+            rows.append((
+                self.posts[position], self.pick(rng), group_id,
+                rng.choice(self.texts), pub_date, pub_date, 0,
+            ))
+        return rows
+
+    def make_comments(self, start, stop):
+        rng = self.random('comments', start)
+        total = len(self.posts)
+        rows = []
+        for pk in self.comments[start:stop]:
+            # Свежие записи обсуждают чаще старых.
+            position = total - 1 - int(total * rng.random() ** 3)
+            created = self.date(rng, position, total)
+            created += (self.until - created) * rng.random()
+            rows.append((
+                pk, self.posts[position], rng.choice(self.users),
+                rng.choice(self.replies), self.date_value(created),
+            ))
+        return rows
+
+    def make_follows(self, start, stop, per_user=20):
+        rng = self.random('follows', start)
+        hot = self.popular[:self.hot]
+        rows = []
+        for user_id in self.users[start:stop]:
+            authors = {
+                author_id for author_id in hot if rng.random() < HOT_SHARE
+            }
+            wanted = int(rng.paretovariate(2) * per_user / 2)
+            for _ in range(min(wanted, len(self.users) - 1)):
+                authors.add(self.pick(rng))
+            authors.discard(user_id)
+            rows.extend((user_id, author_id) for author_id in sorted(authors))
+        return rows
+
+    def database(self, model, row):
+        """База строки: шард автора записи для Post и Comment."""
+        if not shards.is_sharded(model):
+            return router.db_for_write(model)
+        if model is models.Comment:
+            return shards.for_author(
+                self.authors[row[1] - self.posts.start]
+            )
+        return shards.for_author(row[1])
+
+    def write(self, model, rows):
+        """
+        Вставка строк через executemany, в порядке полей FIELDS.
+
+        Минует bulk_create: подготовка значений в ORM и лимит SQLite на
+        999 параметров в запросе (около сотни записей) делали его узким
+        местом.
+        """
+        if model is models.Post:
+            self.authors.extend(row[1] for row in rows)
+        grouped = defaultdict(list)
+        for row in rows:
+            grouped[self.database(model, row)].append(row)
+        meta = model._meta
+        columns = [meta.get_field(name).column for name in FIELDS[model]]
+        sql = (
+            f'INSERT INTO {meta.db_table} ({", ".join(columns)}) '
+            f'VALUES ({", ".join(["%s"] * len(columns))})'
+        )
+        for using, group in grouped.items():
+            with transaction.atomic(using=using):
+                with connections[using].cursor() as cursor:
+                    cursor.executemany(sql, group)
+
+
+seeder = None
+
+
+def start_worker(instance):
+    global seeder
+    seeder = instance
+
+
+def generate(task):
+    """Кусок строк в процессе пула: (метод, начало, конец, аргументы)."""
+    method, start, stop, kwargs = task
+    return getattr(seeder, method)(start, stop, **kwargs)
+
+
+@contextmanager
+def without_indexes(model):
+    """
+    Вторичные индексы таблицы снимаются на время загрузки.
+
+    Построить индекс по готовой таблице быстрее, чем обновлять его на
+    каждой вставке. Уникальные индексы и ограничения остаются.
+    """
+    dropped = []
+    for queryset in shards.each(model._default_manager.all()):
+        database = connections[queryset.db]
+        if database.vendor != 'sqlite':
+            continue
+        with database.cursor() as cursor:
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+                "AND tbl_name = %s AND sql IS NOT NULL",
+                [model._meta.db_table]
+            )
+            for name, sql in cursor.fetchall():
+                if not sql.startswith('CREATE UNIQUE'):
+                    cursor.execute(f'DROP INDEX "{name}"')
+                    dropped.append((database, sql))
+    try:
+        yield
+    finally:
+        for database, sql in dropped:
+            with database.cursor() as cursor:
+                cursor.execute(sql)
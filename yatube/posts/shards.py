@@ -0,0 +1,331 @@
+import fcntl
+import hashlib
+import heapq
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.models import Max, QuerySet
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+
+from posts import models
+
+EPOCH = 1577836800000
+NODE_BITS = 10
+
+
+def enabled():
+    return bool(settings.POST_SHARDS)
+
+
+def is_sharded(model):
+    return enabled() and model in (models.Post, models.Comment)
+
+
+def for_author(author_id):
+    """
+    Шард автора по rendezvous-хешированию.
+
+    При добавлении шарда переезжают только авторы, которые достаются
+    новому шарду, остальные остаются на месте.
+    """
+    return max(
+        settings.POST_SHARDS,
+        key=lambda alias: hashlib.md5(f'{alias}:{author_id}'.encode()).digest()
+    )
+
+
+class Snowflake:
+    """
+    id, уникальные во всех шардах: миллисекунды, номер процесса и
+    счётчик.
+
+    Записи переезжают между шардами со своими id, поэтому автоинкремент
+    отдельной базы не годится. id растут со временем, как и раньше.
+    Номер процесса — SNOWFLAKE_NODE или свободный номер, который процесс
+    занимает при первом id (pid по модулю 1024 у двух воркеров совпадает).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.last = 0
+        self.sequence = 0
+        self.pid = None
+        self.node = None
+
+    def __call__(self):
+        with self.lock:
+            if self.pid != os.getpid():
+                self.pid, self.node = os.getpid(), node_id()
+            now = max(int(time.time() * 1000) - EPOCH, self.last)
+            if now == self.last:
+                self.sequence = (self.sequence + 1) & 0xfff
+                now += self.sequence == 0
+            else:
+                self.sequence = 0
+            self.last = now
+            return now << 22 | self.node << 12 | self.sequence
+
+
+def node_id():
+    """
+    Номер процесса для id: из настроек или первый свободный.
+
+    Свободный номер держит блокировка байта в общем файле, она снимается
+    сама, когда процесс завершается. Файл не закрывается: закрытие любого
+    его дескриптора сняло бы блокировку.
+    """
+    if settings.SNOWFLAKE_NODE is not None:
+        return settings.SNOWFLAKE_NODE
+    fd = os.open(settings.SNOWFLAKE_NODES_FILE, os.O_RDWR | os.O_CREAT, 0o600)
+    for node in range(1 << NODE_BITS):
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, node)
+        except OSError:
+            continue
+        return node
+    os.close(fd)
+    raise RuntimeError('Все номера процессов для id заняты')
+
+
+next_id = Snowflake()
+
+
+class ShardRouter:
+    """
+    Post и Comment живут в шарде автора записи.
+
+    Шард определяется по объекту из подсказок роутера: автор для
+    author.posts, запись для post.comments, сама запись или комментарий
+    при сохранении. Запросы без такого объекта остаются следующим
+    роутерам — для них нужен явный using() или scatter().
+    """
+
+    def db_for_read(self, model, **hints):
+        if not is_sharded(model):
+            return None
+        instance = hints.get('instance')
+        if isinstance(instance, models.Comment):
+            return self.comment_shard(instance)
+        if isinstance(instance, models.Post):
+            return for_author(instance.author_id)
+        if isinstance(instance, models.User) and model is models.Post:
+            return for_author(instance.pk)
+        return None
+
+    db_for_write = db_for_read
+
+    def comment_shard(self, comment):
+        if comment._state.db in settings.POST_SHARDS:
+            return comment._state.db
+        if models.Comment.post.is_cached(comment):
+            return for_author(comment.post.author_id)
+        return None
+
+
+def by_database(objs):
+    """Объекты, разложенные по базам, куда их пишет роутер."""
+    grouped = defaultdict(list)
+    for obj in objs:
+        grouped[router.db_for_write(type(obj), instance=obj)].append(obj)
+    return grouped.items()
+
+
+def bulk_create(queryset, objs, *args, **kwargs):
+    objs = list(objs)
+    for obj in objs:
+        if obj.pk is None:
+            obj.pk = next_id()
+    for using, group in by_database(objs):
+        queryset.using(using).bulk_create(group, *args, **kwargs)
+    return objs
+
+
+def each(queryset):
+    """Копии запроса для всех шардов или сам запрос без шардирования."""
+    if not is_sharded(queryset.model):
+        return [queryset]
+    return [queryset.using(alias) for alias in settings.POST_SHARDS]
+
+
+def latest(queryset):
+    """Самое позднее изменение среди записей запроса во всех шардах."""
+    found = (
+        shard.aggregate(updated=Max('updated'))['updated']
+        for shard in each(queryset)
+    )
+    return max(filter(None, found), default=None)
+
+
+def find(queryset, **kwargs):
+    """Объект по условию из того шарда, где он есть, или None."""
+    for shard in each(queryset):
+        obj = shard.filter(**kwargs).first()
+        if obj is not None:
+            return obj
+    return None
+
+
+def find_or_404(queryset, **kwargs):
+    try:
+        obj = find(queryset, **kwargs)
+    except (TypeError, ValueError, ValidationError):
+        obj = None
+    if obj is None:
+        raise Http404(f'{queryset.model._meta.object_name} не найден')
+    return obj
+
+
+def post_or_404(queryset, username, post_id):
+    if not is_sharded(queryset.model):
+        return get_object_or_404(
+            queryset, pk=post_id, author__username=username
+        )
+    author_id = get_object_or_404(
+        models.User.objects.values_list('pk', flat=True), username=username
+    )
+    return get_object_or_404(
+        queryset.using(for_author(author_id)),
+        pk=post_id, author_id=author_id
+    )
+
+
+class Scatter:
+    """
+    Запрос ко всем шардам сразу со слиянием результатов по сортировке.
+
+    Поддерживает то, что нужно пагинаторам: order_by, filter,
+    values_list, count и срезы. Срез [a:b] берёт с каждого шарда не больше b
+    строк, уже упорядоченных базой, и сливает их через heapq.merge.
+    """
+
+    def __init__(self, querysets, ordering=(), fields=None):
+        self.querysets = querysets
+        self.ordering = ordering
+        self.fields = fields
+
+    def clone(self, method, *args, **kwargs):
+        return Scatter(
+            [getattr(qs, method)(*args, **kwargs) for qs in self.querysets],
+            self.ordering, self.fields
+        )
+
+    def filter(self, *args, **kwargs):
+        return self.clone('filter', *args, **kwargs)
+
+    def order_by(self, *ordering):
+        scatter = self.clone('order_by', *ordering)
+        scatter.ordering = ordering
+        return scatter
+
+    def values_list(self, *fields):
+        scatter = self.clone('values_list', *fields)
+        scatter.fields = fields
+        return scatter
+
+    def count(self):
+        return sum(qs.count() for qs in self.querysets)
+
+    def key(self, row):
+        names = [name.lstrip('-') for name in self.ordering]
+        if self.fields is None:
+            return tuple(getattr(row, name) for name in names)
+        return tuple(row[self.fields.index(name)] for name in names)
+
+    def merge(self, querysets):
+        descending = bool(self.ordering) and self.ordering[0][0] == '-'
+        return heapq.merge(*querysets, key=self.key, reverse=descending)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.stop is None:
+            raise TypeError('Scatter поддерживает только срезы с концом')
+        merged = self.merge([qs[:index.stop] for qs in self.querysets])
+        return list(islice(merged, index.start, index.stop))
+
+    def __iter__(self):
+        return self.merge(self.querysets)
+
+
+def scatter(queryset):
+    querysets = each(queryset)
+    return querysets[0] if len(querysets) == 1 else Scatter(querysets)
+
+
+def following(user):
+    """Записи авторов из подписок: каждый шард — только о своих авторах."""
+    authors = defaultdict(list)
+    followed = models.Follow.objects.filter(user=user)
+    for author_id in followed.values_list('author_id', flat=True):
+        authors[for_author(author_id)].append(author_id)
+    return Scatter([
+        models.Post.objects.with_related().using(alias).filter(
+            author_id__in=author_ids
+        )
+        for alias, author_ids in authors.items()
+    ])
+
+
+def move(author_id, source, target):
+    """
+    Переносит записи автора с комментариями из source в target.
+
+    Строки копируются с теми же id и удаляются из source только после
+    коммита в target, каждая сторона — в своей транзакции. Если перенос
+    прервётся между коммитами, повторный запуск пропустит строки, которые
+    уже есть в target, и доделает удаление.
+    """
+    with transaction.atomic(using=source):
+        posts = list(
+            models.Post.objects.using(source).filter(author_id=author_id)
+        )
+        comments = list(models.Comment.objects.using(source).filter(
+            post__author_id=author_id
+        ))
+        with transaction.atomic(using=target):
+            copy(posts, target, author_id=author_id)
+            copy(comments, target, post__author_id=author_id)
+        models.FeedEntry.objects.using(source).filter(
+            post__author_id=author_id
+        ).delete()
+        with connections[source].cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {models.Comment._meta.db_table} WHERE post_id '
+                f'IN (SELECT id FROM {models.Post._meta.db_table} '
+                f'WHERE author_id = %s)', [author_id]
+            )
+            cursor.execute(
+                f'DELETE FROM {models.Post._meta.db_table} '
+                f'WHERE author_id = %s', [author_id]
+            )
+    return len(posts)
+
+
+def copy(objs, target, **author):
+    """Вставляет в target строки автора, которых там ещё нет."""
+    if not objs:
+        return
+    queryset = QuerySet(type(objs[0]), using=target)
+    found = set(
+        queryset.filter(**author).values_list('pk', flat=True).iterator()
+    )
+    queryset.bulk_create([obj for obj in objs if obj.pk not in found])
+
+
+def rebalance():
+    """Переносит записи в шарды авторов, в том числе из основной базы."""
+    moved = Counter()
+    for source in [DEFAULT_DB_ALIAS, *settings.POST_SHARDS]:
+        authors = models.Post.objects.using(source).order_by().values_list(
+            'author_id', flat=True
+        ).distinct()
+        for author_id in list(authors):
+            target = for_author(author_id)
+            if target != source:
+                moved[source, target] += move(author_id, source, target)
+    return moved
@@ -0,0 +1,131 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (post_delete,
+                                      post_init,
+                                      post_save,
+                                      pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from posts import counters, feed, models, shards, usernames, versions
+
+
+@receiver(post_save, sender=get_user_model())
+def create_user_stats(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        models.UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_init, sender=get_user_model())
+def remember_username(sender, instance, **kwargs):
+    # Отложенное поле не читаем: это был бы запрос на каждый объект.
+    instance.loaded_username = instance.__dict__.get('username')
+
+
+@receiver(post_save, sender=get_user_model())
+def track_usernames(sender, instance, created, raw, update_fields, **kwargs):
+    if raw or update_fields and 'username' not in update_fields:
+        return
+    if created:
+        usernames.changed()
+    elif instance.username != instance.loaded_username:
+        usernames.changed(instance.pk)
+        touch_author_posts(instance.pk)
+    instance.loaded_username = instance.username
+
+
+def touch_author_posts(author_id):
+    """Карточки и фрагменты с записями автора — по его новому имени."""
+    group_ids = set()
+    for posts in shards.each(models.Post.objects.filter(author_id=author_id)):
+        posts.update(updated=timezone.now())
+        group_ids.update(posts.order_by().values_list(
+            'group_id', flat=True
+        ).distinct())
+    versions.bump('posts', f'author:{author_id}', *(
+        f'group:{group_id}' for group_id in group_ids if group_id
+    ))
+
+
+@receiver(post_delete, sender=get_user_model())
+def forget_username(sender, instance, **kwargs):
+    usernames.changed(instance.pk)
+
+
+@receiver(pre_save, sender=models.Post)
+@receiver(pre_save, sender=models.Comment)
+def assign_shard_id(sender, instance, raw, **kwargs):
+    if instance.pk is None and not raw and shards.is_sharded(sender):
+        instance.pk = shards.next_id()
+
+
+@receiver(pre_save, sender=models.Post)
+def remember_post_group(sender, instance, raw, **kwargs):
+    if instance.pk and not raw:
+        posts = models.Post.objects.db_manager(hints={'instance': instance})
+        instance.loaded_group_id = posts.filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=models.Post)
+def push_post_to_feeds(sender, instance, created, raw, **kwargs):
+    if created and not raw and not shards.enabled():
+        feed.push(instance)
+
+
+@receiver(post_save, sender=models.Post)
+@receiver(post_save, sender=models.Comment)
+@receiver(post_save, sender=models.Follow)
+def count_created(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.created(sender, [instance])
+    elif sender is models.Post:
+        old_group_id = getattr(instance, 'loaded_group_id', None)
+        if old_group_id != instance.group_id:
+            counters.moved(instance, old_group_id)
+
+
+@receiver(post_delete, sender=models.Post)
+@receiver(post_delete, sender=models.Comment)
+@receiver(post_delete, sender=models.Follow)
+def count_deleted(sender, instance, **kwargs):
+    counters.deleted(sender, [instance])
+
+
+@receiver(post_save, sender=models.Follow)
+def backfill_feed(sender, instance, created, raw, **kwargs):
+    if created and not raw and not shards.enabled():
+        feed.backfill(instance)
+
+
+@receiver(post_delete, sender=models.Follow)
+def prune_feed(sender, instance, **kwargs):
+    feed.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=models.Post)
+@receiver(post_save, sender=models.Comment)
+@receiver(post_save, sender=models.Group)
+@receiver(post_save, sender=models.Follow)
+def bump_versions_on_save(sender, instance, raw, **kwargs):
+    if not raw:
+        versions.changed(sender, [instance])
+
+
+@receiver(post_delete, sender=models.Post)
+@receiver(post_delete, sender=models.Comment)
+@receiver(post_delete, sender=models.Group)
+@receiver(post_delete, sender=models.Follow)
+def bump_versions_on_delete(sender, instance, **kwargs):
+    versions.changed(sender, [instance])
+
+
+@receiver(post_save, sender=models.Group)
+@receiver(pre_delete, sender=models.Group)
+def touch_group_posts(sender, instance, raw=False, created=False, **kwargs):
+    if not (raw or created):
+        for posts in shards.each(instance.posts.all()):
+            posts.update(updated=timezone.now())
@@ -0,0 +1,45 @@
+from django import template
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+CARD_TIMEOUT = 60 * 60 * 24
+
+
+def card_key(post, user):
+    is_author = user is not None and user.pk == post.author_id
+    return f'post_card:{post.pk}:{post.updated.timestamp()}:{is_author:d}'
+
+
+@register.simple_tag(takes_context=True)
+def viewer_key(context, page):
+    """
+    Ключ фрагмента страницы: записи на ней, вход и записи зрителя.
+
+    Кроме меню для вошедших и кнопок правки своих записей фрагменты
+    одинаковы для всех, поэтому в ключе нет id пользователя.
+    """
+    user = context.get('user')
+    posts = ','.join(str(post.pk) for post in page)
+    if user is None or not user.is_authenticated:
+        return f'{posts}|guest'
+    own = ','.join(str(post.pk) for post in page if post.author_id == user.pk)
+    return f'{posts}|user|{own}'
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, page):
+    """Карточки записей страницы: одна выборка из кэша на всю страницу."""
+    user = context.get('user')
+    keys = [(post, card_key(post, user)) for post in page]
+    cards = cache.get_many([key for _, key in keys])
+    missing = {}
+    card_template = context.template.engine.get_template('post_item.html')
+    for post, key in keys:
+        if key not in cards:
+            with context.push(post=post):
+                cards[key] = missing[key] = card_template.render(context)
+    if missing:
+        cache.set_many(missing, CARD_TIMEOUT)
+    return mark_safe(''.join(cards[key] for _, key in keys))
@@ -0,0 +1,91 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+
+
+class PostCardsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='username')
+        cls.group = Group.objects.create(
+            title='Группа', slug='slug', description='Описание группы'
+        )
+        cls.posts = [
+            Post.objects.create(text='текст', author=cls.user, group=cls.group)
+            for _ in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def count_rendered_cards(self):
+        response = self.guest_client.get(reverse('index'))
+        return sum(
+            template.name == 'post_item.html'
+            for template in response.templates
+        )
+
+    def test_new_post_renders_only_its_card(self):
+        """После новой записи перерисовывается только её карточка."""
+        self.assertEqual(self.count_rendered_cards(), 3)
+        Post.objects.create(text='новый текст', author=self.user)
+        self.assertEqual(self.count_rendered_cards(), 1)
+
+    def test_comment_and_group_change_rerender_cards(self):
+        """Комментарий и правка группы обновляют карточки записей."""
+        self.count_rendered_cards()
+        Comment.objects.create(
+            text='комментарий', post=self.posts[0], author=self.user
+        )
+        self.assertEqual(self.count_rendered_cards(), 1)
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertEqual(self.count_rendered_cards(), 3)
+
+    def test_post_edit_updates_card(self):
+        """Правка записи обновляет её карточку."""
+        self.count_rendered_cards()
+        post = self.posts[1]
+        post.text = 'исправленный текст'
+        post.save()
+        self.assertEqual(self.count_rendered_cards(), 1)
+        response = self.guest_client.get(reverse('index'))
+        self.assertContains(response, 'исправленный текст')
+
+    def test_fragments_are_shared_between_readers(self):
+        """Читатели без своих записей на странице делят один фрагмент."""
+        readers = [
+            User.objects.create(username=f'reader{number}')
+            for number in range(2)
+        ]
+        rendered = []
+        for reader in readers:
+            self.guest_client.force_login(reader)
+            response = self.guest_client.get(reverse('index'))
+            rendered.append(
+                [template.name for template in response.templates]
+            )
+        self.assertIn('post_item.html', rendered[0])
+        self.assertNotIn('post_item.html', rendered[1])
+        self.guest_client.force_login(self.user)
+        response = self.guest_client.get(reverse('index'))
+        self.assertContains(response, 'Редактировать', count=3)
+
+    def test_rename_updates_card_links(self):
+        """После смены имени карточки ссылаются на новый профиль."""
+        author = User.objects.create(username='oldname')
+        Post.objects.create(text='текст', author=author, group=self.group)
+        urls = [reverse('index'), reverse('group_posts', args=['slug'])]
+        for url in urls:
+            self.guest_client.get(url)
+        author.username = 'renamed'
+        author.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, '/renamed/')
+                self.assertNotContains(response, '/oldname/')
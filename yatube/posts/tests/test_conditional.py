@@ -0,0 +1,121 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import counters
+from posts.models import Comment, Follow, Group, Post, User, UserStats
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='username')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='slug', description='Описание группы'
+        )
+        cls.post = Post.objects.create(
+            text='текст', author=cls.user, group=cls.group
+        )
+        cls.urls = [
+            reverse('index'),
+            reverse('group_posts', kwargs={'slug': 'slug'}),
+            reverse('profile', kwargs={'username': 'username'}),
+            reverse('post_view', kwargs={
+                'username': 'username', 'post_id': cls.post.pk
+            }),
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def revalidate(self, client, url, response, **headers):
+        return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'], **headers)
+
+    def test_unchanged_pages_answer_not_modified(self):
+        """Неизменённые страницы отвечают 304 без отрисовки шаблона."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertIn('Last-Modified', response)
+                again = self.revalidate(self.guest_client, url, response)
+                self.assertEqual(again.status_code, 304)
+                self.assertEqual(again.templates, [])
+                again = self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+                self.assertEqual(again.status_code, 304)
+
+    def test_changes_invalidate_validators(self):
+        """Комментарий и подписка меняют ETag страниц."""
+        responses = [self.guest_client.get(url) for url in self.urls]
+        Comment.objects.create(
+            text='комментарий', post=self.post, author=self.reader
+        )
+        Follow.objects.create(user=self.reader, author=self.user)
+        for url, response in zip(self.urls, responses):
+            with self.subTest(url=url):
+                again = self.revalidate(self.guest_client, url, response)
+                self.assertEqual(again.status_code, 200)
+
+    def test_validators_differ_for_users(self):
+        """У гостя и автора разные ETag, Last-Modified только у гостя."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                guest = self.guest_client.get(url)
+                author = self.authorized_client.get(url)
+                self.assertNotEqual(guest['ETag'], author['ETag'])
+                self.assertNotIn('Last-Modified', author)
+                again = self.revalidate(self.authorized_client, url, guest)
+                self.assertEqual(again.status_code, 200)
+
+    def test_new_login_changes_validator(self):
+        """Новый вход меняет CSRF-токен, а с ним и ETag страницы."""
+        User.objects.create_user('visitor', password='password')
+        credentials = {'username': 'visitor', 'password': 'password'}
+        client = Client()
+        client.post(reverse('login'), credentials)
+        response = client.get(self.urls[3])
+        client.get(reverse('logout'))
+        client.post(reverse('login'), credentials)
+        again = self.revalidate(client, self.urls[3], response)
+        self.assertEqual(again.status_code, 200)
+        self.assertNotEqual(again['ETag'], response['ETag'])
+
+    def test_page_cursor_changes_validator(self):
+        """Номер страницы входит в ETag."""
+        response = self.guest_client.get(self.urls[0])
+        again = self.revalidate(
+            self.guest_client, self.urls[0] + '?page=1', response
+        )
+        self.assertEqual(again.status_code, 200)
+
+    def test_author_counters_invalidate_validators(self):
+        """Подписки автора и сверка счётчиков меняют ETag его страниц."""
+        for change in (
+            lambda: Follow.objects.create(user=self.user, author=self.reader),
+            lambda: UserStats.objects.update(following_count=7),
+        ):
+            responses = [self.guest_client.get(url) for url in self.urls[2:]]
+            change()
+            counters.reconcile()
+            for url, response in zip(self.urls[2:], responses):
+                with self.subTest(url=url):
+                    again = self.revalidate(self.guest_client, url, response)
+                    self.assertEqual(again.status_code, 200)
+
+    def test_validators_skip_posts_aggregate(self):
+        """Группа и профиль не собирают даты всех своих записей."""
+        for url in self.urls[1:3]:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    self.guest_client.get(url, HTTP_IF_NONE_MATCH='"x"')
+                self.assertFalse(any(
+                    'MAX(' in query['sql'] for query in queries
+                ))
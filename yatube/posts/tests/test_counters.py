@@ -0,0 +1,120 @@
+from django.test import TestCase
+
+from posts import counters
+from posts.models import Comment, Follow, Group, Post, User, UserStats
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='username')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='slug', description='Описание группы'
+        )
+
+    def is_counters_correct(self, user, **expected):
+        """Проверяет на соответствие счётчики пользователя с expected."""
+        stats = UserStats.objects.get(user=user)
+        for field, value in expected.items():
+            self.assertEqual(getattr(stats, field), value, field)
+
+    def test_counters_follow_creates_and_deletes(self):
+        """Счётчики меняются при создании и удалении строк."""
+        post = Post.objects.create(
+            text='текст', author=self.user, group=self.group
+        )
+        Comment.objects.create(text='комментарий', post=post, author=self.user)
+        follow = Follow.objects.create(user=self.reader, author=self.user)
+        post.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(self.group.posts_count, 1)
+        self.is_counters_correct(self.user, posts_count=1, followers_count=1)
+        self.is_counters_correct(self.reader, following_count=1)
+        follow.delete()
+        post.delete()
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.is_counters_correct(self.user, posts_count=0, followers_count=0)
+        self.is_counters_correct(self.reader, following_count=0)
+
+    def test_counters_follow_bulk_create(self):
+        """bulk_create тоже обновляет счётчики."""
+        Post.objects.bulk_create(
+            Post(text='текст', author=self.user, group=self.group)
+            for _ in range(3)
+        )
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 3)
+        self.is_counters_correct(self.user, posts_count=3)
+
+    def test_bulk_create_skipped_rows_are_not_counted(self):
+        """Пропущенные ignore_conflicts строки не попадают в счётчики."""
+        Follow.objects.create(user=self.reader, author=self.user)
+        Follow.objects.bulk_create(
+            [
+                Follow(user=self.reader, author=self.user),
+                Follow(user=self.user, author=self.reader),
+            ],
+            ignore_conflicts=True
+        )
+        self.is_counters_correct(
+            self.user, followers_count=1, following_count=1
+        )
+        self.is_counters_correct(
+            self.reader, followers_count=1, following_count=1
+        )
+
+    def test_counters_follow_cascade_and_group_change(self):
+        """Каскадное удаление и смена группы учитываются."""
+        another_group = Group.objects.create(
+            title='Другая группа', slug='slug_2', description='Описание'
+        )
+        author = User.objects.create(username='author')
+        post = Post.objects.create(
+            text='текст', author=author, group=self.group
+        )
+        post.group = another_group
+        post.save()
+        self.group.refresh_from_db()
+        another_group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(another_group.posts_count, 1)
+        Follow.objects.create(user=author, author=self.user)
+        author.delete()
+        another_group.refresh_from_db()
+        self.assertEqual(another_group.posts_count, 0)
+        self.is_counters_correct(self.user, followers_count=0)
+
+    def test_save_does_not_overwrite_counters(self):
+        """Сохранение записи не затирает счётчик комментариев."""
+        post = Post.objects.create(text='текст', author=self.user)
+        Comment.objects.create(text='комментарий', post=post, author=self.user)
+        post.text = 'новый текст'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+    def test_save_inserts_forced_and_deleted_rows(self):
+        """force_insert и сохранение удалённой строки вставляют её."""
+        group = Group(
+            pk=100, title='Новая', slug='new', description='Описание'
+        )
+        group.save(force_insert=True)
+        Group.objects.filter(pk=group.pk).delete()
+        group.title = 'Снова'
+        group.save()
+        self.assertEqual(Group.objects.get(pk=group.pk).title, 'Снова')
+
+    def test_reconcile_repairs_drift(self):
+        """Сверка исправляет разошедшиеся счётчики."""
+        post = Post.objects.create(text='текст', author=self.user)
+        Post.objects.filter(pk=post.pk).update(comments_count=5)
+        UserStats.objects.filter(user=self.user).delete()
+        repaired = counters.reconcile(batch_size=1)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        self.is_counters_correct(self.user, posts_count=1)
+        self.assertEqual(repaired['post'], 1)
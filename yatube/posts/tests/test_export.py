@@ -0,0 +1,99 @@
+import datetime as dt
+import gzip
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from posts.models import Comment, Follow, Post, User
+
+
+@mock.patch('posts.export.CHUNK_SIZE', 2)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='reader')
+        cls.author = User.objects.create(username='author')
+        cls.posts = [
+            Post.objects.create(text=f'Запись {number}', author=cls.author)
+            for number in range(5)
+        ]
+        Post.objects.filter(pk=cls.posts[0].pk).update(
+            pub_date=timezone.now() - dt.timedelta(days=10)
+        )
+        Comment.objects.create(
+            text='Ответ', post=cls.posts[1], author=cls.user
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def lines(self, response):
+        content = b''.join(response.streaming_content)
+        if response.get('Content-Encoding') == 'gzip':
+            content = gzip.decompress(content)
+        return [json.loads(line) for line in content.decode().splitlines()]
+
+    def test_posts_stream_in_id_order_with_bounds(self):
+        """Все записи по возрастанию id, since и until по id и дате."""
+        response = self.client.get('/api/v1/export/posts/')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = self.lines(response)
+        self.assertEqual([row['id'] for row in rows], [
+            post.pk for post in self.posts
+        ])
+        self.assertEqual(rows[0]['author'], self.author.pk)
+        self.assertEqual(rows[0]['text'], 'Запись 0')
+        response = self.client.get('/api/v1/export/posts/', {
+            'since': self.posts[1].pk, 'until': self.posts[3].pk
+        })
+        self.assertEqual([row['id'] for row in self.lines(response)], [
+            self.posts[1].pk, self.posts[2].pk
+        ])
+        since = (timezone.now() - dt.timedelta(days=1)).date().isoformat()
+        response = self.client.get('/api/v1/export/posts/', {'since': since})
+        self.assertEqual(len(self.lines(response)), 4)
+        response = self.client.get('/api/v1/export/posts/', {'since': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_gzip_comments_and_follow_permissions(self):
+        """gzip по Accept-Encoding, подписки выгружает только персонал."""
+        response = self.client.get(
+            '/api/v1/export/comments/', HTTP_ACCEPT_ENCODING='gzip, br'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            [row['post'] for row in self.lines(response)], [self.posts[1].pk]
+        )
+        response = self.client.get('/api/v1/export/follows/')
+        self.assertEqual(response.status_code, 403)
+        self.user.is_staff = True
+        response = self.client.get('/api/v1/export/follows/')
+        self.assertEqual(self.lines(response), [{
+            'id': Follow.objects.get().pk,
+            'user': self.user.pk,
+            'author': self.author.pk,
+        }])
+
+    def test_command_writes_same_format(self):
+        """Команда пишет в файл те же строки, что отдаёт API."""
+        path = os.path.join(tempfile.mkdtemp(), 'posts.ndjson.gz')
+        call_command(
+            'export_data', 'posts', path, since=str(self.posts[3].pk),
+            stdout=open(os.devnull, 'w')
+        )
+        with gzip.open(path, 'rt') as output:
+            rows = [json.loads(line) for line in output]
+        os.remove(path)
+        response = self.client.get(
+            '/api/v1/export/posts/', {'since': self.posts[3].pk}
+        )
+        self.assertEqual(rows, self.lines(response))
@@ -0,0 +1,90 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import feed, plans
+from posts.models import FeedEntry, Follow, Post, User
+from posts.paginator import KeysetPaginator
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.follower = User.objects.create(username='follower')
+        cls.author = User.objects.create(username='author')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.follower)
+
+    def get_feed(self):
+        response = self.authorized_client.get(reverse('follow_index'))
+        return response.context['page'].object_list
+
+    def test_new_post_is_pushed_to_followers(self):
+        """Новая запись раскладывается по лентам подписчиков."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        post = Post.objects.create(text='текст', author=self.author)
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.follower, post=post).exists()
+        )
+        self.assertEqual(self.get_feed(), [post])
+
+    def test_follow_backfills_and_unfollow_prunes_feed(self):
+        """Подписка дополняет ленту, отписка очищает её."""
+        post = Post.objects.create(text='текст', author=self.author)
+        follow = Follow.objects.create(user=self.follower, author=self.author)
+        self.assertEqual(self.get_feed(), [post])
+        follow.delete()
+        self.assertFalse(FeedEntry.objects.filter(user=self.follower))
+        self.assertEqual(self.get_feed(), [])
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_hot_author_post_is_pulled_on_read(self):
+        """Запись популярного автора не раскладывается, а читается."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        post = Post.objects.create(text='текст', author=self.author)
+        entries = FeedEntry.objects.filter(post=post)
+        self.assertEqual(entries.count(), 1)
+        self.assertIsNone(entries.get().user)
+        self.assertEqual(self.get_feed(), [post])
+
+    def test_rebuild_restores_feed(self):
+        """Пересборка восстанавливает ленты подписок."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        posts = [
+            Post.objects.create(text='текст', author=self.author)
+            for _ in range(3)
+        ]
+        FeedEntry.objects.all().delete()
+        feed.rebuild()
+        self.assertEqual(self.get_feed(), posts[::-1])
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_timeline_reads_index_ranges_without_sorting(self):
+        """Свои и подтянутые записи идут по индексам без сортировки."""
+        hot = User.objects.create(username='hot')
+        other = User.objects.create(username='other')
+        Follow.objects.create(user=self.follower, author=self.author)
+        Follow.objects.create(user=self.follower, author=hot)
+        Follow.objects.create(user=other, author=hot)
+        posts = [
+            Post.objects.create(text='текст', author=author)
+            for author in (self.author, hot, self.author, hot)
+        ]
+        self.assertEqual(self.get_feed(), posts[::-1])
+        paginator = KeysetPaginator(
+            feed.timeline(self.follower), 10, keys=('pub_date', 'post_id')
+        )
+        pages = (
+            paginator.ordered(),
+            paginator.older((posts[2].pub_date, posts[2].pk)),
+        )
+        for page in pages:
+            self.assertEqual(len(page.querysets), 2)
+            for queryset in page.querysets:
+                sql, params = queryset[:10].query.sql_with_params()
+                plan = ' '.join(plans.explain(plans.Query(None, sql, params)))
+                self.assertNotIn(plans.TEMP_SORT, plan)
+                self.assertNotIn(plans.MULTI_INDEX, plan)
+                self.assertRegex(plan, 'feed_(user_date|pulled)_idx')
@@ -0,0 +1,128 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts import search
+from posts.importer import Importer
+from posts.models import Comment, Follow, Group, Post, User
+
+USERS = [
+    {'username': 'leo', 'email': 'leo@example.com'},
+    {'username': 'anna', 'date_joined': '2019-01-01T10:00:00'},
+]
+POSTS = [
+    {'id': 10, 'author': 'leo', 'group': 'books', 'text': 'Война и мир',
+     'pub_date': '2019-05-01T12:00:00'},
+    {'id': 11, 'author': 'anna', 'text': 'Анна Каренина'},
+    {'id': 12, 'author': 'ghost', 'text': 'Автора нет'},
+    'не json',
+]
+COMMENTS = [
+    {'id': 1, 'post': 10, 'author': 'anna', 'text': 'Длинно'},
+    {'id': 2, 'post': 99, 'author': 'anna', 'text': 'Записи нет'},
+]
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.state = self.path('state.json')
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def ndjson(self, name, rows):
+        with gzip.open(self.path(name), 'wt', encoding='utf-8') as output:
+            for row in rows:
+                if not isinstance(row, str):
+                    row = json.dumps(row, ensure_ascii=False)
+                output.write(row + '\n')
+        return self.path(name)
+
+    def run_import(self, workers=1, **files):
+        call_command(
+            'import_data', workers=workers, batch_size=2, state=self.state,
+            stdout=open(os.devnull, 'w'), **files
+        )
+
+    def test_import_resolves_names_and_rebuilds_once(self):
+        """Имена и slug переводятся в id, счётчики и поиск — в конце."""
+        with open(self.path('groups.csv'), 'w', encoding='utf-8') as output:
+            output.write('slug,title,description\nbooks,Книги,\n')
+        self.run_import(
+            workers=2,
+            users=self.ndjson('users.ndjson.gz', USERS),
+            groups=self.path('groups.csv'),
+            posts=self.ndjson('posts.ndjson.gz', POSTS),
+            comments=self.ndjson('comments.ndjson.gz', COMMENTS),
+            follows=self.ndjson('follows.ndjson.gz', [
+                {'user': 'anna', 'author': 'leo'},
+            ]),
+        )
+        leo = User.objects.get(username='leo')
+        post = Post.objects.get(pk=10)
+        self.assertEqual(post.author, leo)
+        self.assertEqual(post.group, Group.objects.get(slug='books'))
+        self.assertEqual(post.pub_date.year, 2019)
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.get().post, post)
+        self.assertTrue(Follow.objects.filter(author=leo).exists())
+        self.assertEqual(leo.stats.followers_count, 1)
+        self.assertEqual(list(search.search('войны')), [post])
+        self.assertFalse(os.path.exists(self.state))
+
+    def test_import_resumes_from_saved_state(self):
+        """После сбоя импорт продолжается с последней сохранённой пачки."""
+        users = self.ndjson('users.ndjson.gz', USERS)
+        posts = self.ndjson('posts.ndjson.gz', POSTS[:2])
+        insert = Importer.insert
+
+        def failing(importer, kind, records):
+            if kind == 'posts':
+                raise RuntimeError('сбой')
+            return insert(importer, kind, records)
+
+        with mock.patch.object(Importer, 'insert', failing):
+            with self.assertRaises(RuntimeError):
+                self.run_import(users=users, posts=posts)
+        with open(self.state) as state:
+            self.assertEqual(json.load(state), {f'users:{users}': 2})
+        self.assertEqual(User.objects.count(), 2)
+        with open(self.state, 'w') as state:
+            json.dump({f'users:{users}': 2, f'posts:{posts}': 1}, state)
+        self.run_import(users=users, posts=posts)
+        self.assertEqual(list(Post.objects.values_list('pk', flat=True)), [11])
+        self.assertEqual(User.objects.count(), 2)
+
+    def test_import_reports_collisions(self):
+        """Занятые id не считаются вставленными и попадают в отчёт."""
+        author = User.objects.create(username='leo')
+        Post.objects.create(text='Своя', author=author)
+        taken = Post.objects.get().pk
+        output, errors = StringIO(), StringIO()
+        call_command(
+            'import_data', workers=1, state=self.state, stdout=output,
+            stderr=errors, posts=self.ndjson('posts.ndjson.gz', [
+                {'id': taken, 'author': 'leo', 'text': 'Чужая'},
+                {'id': taken + 1, 'author': 'leo', 'text': 'Новая'},
+            ])
+        )
+        self.assertIn(
+            'posts: вставлено 1, уже были в базе 1', output.getvalue()
+        )
+        self.assertIn(str(taken), errors.getvalue())
+        self.assertEqual(Post.objects.get(pk=taken).text, 'Своя')
+
+    def test_empty_input(self):
+        """Пустой файл импортируется без ошибок."""
+        self.run_import(posts=self.ndjson('posts.ndjson.gz', []))
+        self.assertFalse(Post.objects.exists())
@@ -0,0 +1,73 @@
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post, User
+from posts.paginator import KeysetPaginator, decode_cursor
+
+
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='username')
+        cls.posts = [
+            Post.objects.create(text=f'текст {number}', author=cls.user)
+            for number in range(35)
+        ][::-1]
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def get_page(self, cursor=None, number=None):
+        paginator = KeysetPaginator(Post.objects.all(), 10)
+        return paginator.get_page(number, cursor)
+
+    def test_cursors_walk_forward_and_back(self):
+        """Курсоры ведут на следующую и предыдущую страницы."""
+        page = self.get_page()
+        self.assertEqual(list(page), self.posts[:10])
+        for number in range(2, 5):
+            page = self.get_page(page.paginator.next_link.cursor)
+            self.assertEqual(page.number, number)
+            start = (number - 1) * 10
+            self.assertEqual(list(page), self.posts[start:start + 10])
+        self.assertFalse(page.has_next())
+        page = self.get_page(page.paginator.previous_link.cursor)
+        self.assertEqual(page.number, 3)
+        self.assertEqual(list(page), self.posts[20:30])
+
+    def test_links_are_bounded(self):
+        """Ссылки строятся только на соседние страницы."""
+        page = self.get_page(number=3)
+        numbers = [link.number for link in page.paginator.links]
+        self.assertEqual(numbers, [1, 2, 3, 4])
+        self.assertIsNone(page.paginator.links[0].cursor)
+
+    def test_page_does_not_count_rows(self):
+        """Страница открывается без COUNT и без OFFSET."""
+        cursor = self.get_page(number=2).paginator.next_link.cursor
+        with CaptureQueriesContext(connection) as queries:
+            self.get_page(cursor)
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+            self.assertNotIn('OFFSET', query['sql'])
+        self.assertLessEqual(len(queries), 3)
+
+    def test_broken_cursor_opens_first_page(self):
+        """Испорченный курсор открывает первую страницу."""
+        self.assertIsNone(decode_cursor('испорчен'))
+        page = self.get_page('YWJj')
+        self.assertEqual(page.number, 1)
+        self.assertEqual(list(page), self.posts[:10])
+
+    def test_partial_returns_only_post_cards(self):
+        """Частичный ответ содержит только карточки записей."""
+        cursor = self.get_page().paginator.next_link.cursor
+        response = self.guest_client.get(
+            reverse('index'), {'cursor': cursor, 'partial': 1}
+        )
+        self.assertTemplateUsed(response, 'post_list.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(list(response.context['page']), self.posts[10:20])
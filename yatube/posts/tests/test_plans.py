@@ -0,0 +1,53 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from posts import plans
+from posts.management.commands.audit_queries import seed
+from posts.models import Post
+
+
+class QueryPlanAuditTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        seed(300)
+
+    def test_routes_use_composite_indexes(self):
+        """С индексами полный просмотр остаётся только там, где индекс
+        не поможет: в списке групп."""
+        user, post = plans.sample()
+        findings = [plans.audit(query) for query in plans.capture(user, post)]
+        flagged = {f.query.route for f in findings if f.problems}
+        self.assertLessEqual(flagged, {'group-list'})
+        self.assertFalse([f for f in findings if f.index])
+
+    def test_audit_proposes_index_for_sorted_lookup(self):
+        """Для сортировки во временном B-дереве предлагается индекс."""
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX post_author_date_idx')
+        query = plans.Query(
+            'profile',
+            'SELECT "posts_post"."id" FROM "posts_post" '
+            'WHERE "posts_post"."author_id" = %s '
+            'ORDER BY "posts_post"."pub_date" DESC, "posts_post"."id" DESC',
+            (1,)
+        )
+        finding = plans.audit(query)
+        self.assertTrue(finding.problems)
+        self.assertEqual(
+            finding.index,
+            plans.Proposal(
+                'posts_post', ('author_id', 'pub_date DESC', 'id DESC')
+            )
+        )
+
+    def test_command_reports_and_rolls_back(self):
+        """Команда печатает отчёт и не оставляет синтетических данных."""
+        posts_count = Post.objects.count()
+        out = StringIO()
+        call_command('audit_queries', seed=50, apply=True, stdout=out)
+        self.assertIn('Проверено запросов', out.getvalue())
+        self.assertEqual(Post.objects.count(), posts_count)
@@ -0,0 +1,64 @@
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class QueryCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='username')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='slug', description='Описание группы'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        cls.post = cls.create_post()
+
+    @classmethod
+    def create_post(cls):
+        post = Post.objects.create(
+            text='текст', author=cls.user, group=cls.group
+        )
+        Comment.objects.create(text='комментарий', post=post, author=cls.user)
+        return post
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def count_queries(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(path)
+        return len(queries)
+
+    def test_pages_do_not_query_per_post(self):
+        """Число запросов страницы не зависит от числа записей."""
+        path_list = [
+            reverse('index') + '?partial=1',
+            reverse('group_posts', kwargs={'slug': self.group.slug}),
+            reverse('profile', kwargs={'username': self.user.username}),
+            reverse('follow_index'),
+        ]
+        expected = {path: self.count_queries(path) for path in path_list}
+        for _ in range(9):
+            self.create_post()
+        for path in path_list:
+            with self.subTest(path=path):
+                self.assertEqual(self.count_queries(path), expected[path])
+
+    def test_post_view_does_not_query_per_comment(self):
+        """Число запросов записи не зависит от числа комментариев."""
+        path = reverse(
+            'post_view',
+            kwargs={'username': self.user.username, 'post_id': self.post.id}
+        )
+        expected = self.count_queries(path)
+        for _ in range(5):
+            Comment.objects.create(
+                text='комментарий', post=self.post, author=self.reader
+            )
+        self.assertEqual(self.count_queries(path), expected)
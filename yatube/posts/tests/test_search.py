@@ -0,0 +1,65 @@
+import datetime as dt
+
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import search
+from posts.models import Post, User
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='username')
+        cls.old = Post.objects.create(
+            text='Старые записи о путешествиях', author=cls.user
+        )
+        Post.objects.filter(pk=cls.old.pk).update(
+            pub_date=timezone.now() - dt.timedelta(days=365)
+        )
+        cls.new = Post.objects.create(
+            text='Новая запись о путешествии', author=cls.user
+        )
+        cls.other = Post.objects.create(text='Про котов', author=cls.user)
+
+    def test_stem_cuts_russian_endings(self):
+        """Основа слова не зависит от окончания."""
+        self.assertEqual(search.stem('записями'), search.stem('запись'))
+        self.assertEqual(search.terms('Ёлки, палки!'), ['елк', 'палк'])
+
+    def test_search_ranks_matches_by_relevance_and_recency(self):
+        """Находятся все формы слова, свежие записи выше."""
+        found = list(search.search('путешествия записи'))
+        self.assertEqual(found, [self.new, self.old])
+        self.assertEqual(list(search.search('   ')), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при правке и удалении записи."""
+        post = Post.objects.create(text='Про собак', author=self.user)
+        self.assertEqual(list(search.search('собаки')), [post])
+        post.text = 'Про лошадей'
+        post.save()
+        self.assertEqual(list(search.search('собаки')), [])
+        self.assertEqual(list(search.search('лошади')), [post])
+        post.delete()
+        self.assertEqual(list(search.search('лошади')), [])
+
+    def test_search_page_api_and_admin(self):
+        """Поиск доступен на странице, в API и в админке."""
+        client = Client()
+        response = client.get(reverse('search'), {'q': 'коты'})
+        self.assertEqual(list(response.context['page']), [self.other])
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'password')
+        client.force_login(admin)
+        response = client.get('/api/v1/posts/', {'search': 'коты'})
+        self.assertEqual(
+            [post['id'] for post in response.json()], [self.other.pk]
+        )
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'коты'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.other]
+        )
@@ -0,0 +1,73 @@
+import datetime as dt
+import os
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts import search
+from posts.models import (Comment,
+                          FeedEntry,
+                          Follow,
+                          Group,
+                          Post,
+                          User,
+                          UserStats)
+
+
+class SeedTests(TestCase):
+    def seed(self, **options):
+        options = {
+            'users': 30, 'groups': 3, 'posts': 200, 'comments': 300,
+            'follows': 5, 'hot': 2, 'seed': 7, 'until': dt.date(2026, 1, 1),
+            'batch_size': 64, 'workers': 1, **options,
+        }
+        call_command('seed', stdout=open(os.devnull, 'w'), **options)
+        return (
+            list(Post.objects.order_by('pk').values_list(
+                'pk', 'author__username', 'group__slug', 'text', 'pub_date'
+            )),
+            list(Comment.objects.order_by('pk').values_list(
+                'post', 'author', 'created'
+            )),
+            list(Follow.objects.order_by('user', 'author').values_list(
+                'user', 'author'
+            )),
+        )
+
+    def clear(self):
+        for model in (User, Group, Post):
+            model.objects.all().delete()
+
+    def test_same_seed_gives_same_data(self):
+        """Те же seed и дата — те же данные при любом числе процессов."""
+        first = self.seed()
+        self.clear()
+        self.assertEqual(self.seed(workers=2), first)
+        self.clear()
+        self.assertNotEqual(self.seed(seed=8), first)
+
+    def test_seeded_data_is_ready_to_use(self):
+        """Счётчики, ленты, поиск и вход работают сразу после генерации."""
+        self.seed()
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        stats = UserStats.objects.order_by('-followers_count')
+        self.assertEqual(sum(stats.values_list('posts_count', flat=True)), 200)
+        self.assertGreater(
+            stats[0].followers_count, Follow.objects.count() / 30
+        )
+        post = Post.objects.order_by('-comments_count').first()
+        self.assertEqual(post.comments_count, post.comments.count())
+        follow = Follow.objects.filter(author__posts__isnull=False).first()
+        self.assertTrue(FeedEntry.objects.filter(user=follow.user).exists())
+        word = max(post.text.split(), key=len).strip('.')
+        self.assertIn(post, search.search(word))
+        self.assertTrue(self.client.login(
+            username=post.author.username, password='yatube-seed'
+        ))
+
+    def test_groups_without_users(self):
+        """Без пользователей можно создать одни группы."""
+        self.seed(users=0, posts=0, comments=0)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertFalse(Follow.objects.exists())
@@ -0,0 +1,227 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.db.models import QuerySet
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts import shards
+from posts.models import Comment, Follow, Group, Post, User, UserStats
+
+SHARDS = ['shard_a', 'shard_b']
+
+
+class ShardingTests(TransactionTestCase):
+    """Шарды — отдельные SQLite-файлы с полной схемой."""
+
+    databases = {'default', *SHARDS}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        for alias in SHARDS:
+            connections.databases[alias] = {
+                'ENGINE': 'core.backends.sqlite3',
+                'NAME': os.path.join(cls.directory, f'{alias}.sqlite3'),
+                'OPTIONS': {'foreign_keys': False},
+            }
+        super().setUpClass()
+        for alias in SHARDS:
+            call_command('migrate', database=alias, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in SHARDS:
+            connections[alias].close()
+            del connections[alias]
+            del connections.databases[alias]
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        cache.clear()
+        self.sharding = override_settings(POST_SHARDS=SHARDS)
+        self.sharding.enable()
+        self.addCleanup(self.sharding.disable)
+        self.authors = {}
+        number = 0
+        while len(self.authors) < len(SHARDS):
+            user = User.objects.create(username=f'author{number}')
+            self.authors.setdefault(shards.for_author(user.pk), user)
+            number += 1
+        self.first, self.second = self.authors.values()
+        self.reader = User.objects.create(username='reader')
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def posts(self, alias, author):
+        return Post.objects.using(alias).filter(author=author)
+
+    def test_rows_go_to_author_shard(self):
+        """Записи и комментарии пишутся в шард автора записи."""
+        post = Post.objects.create(text='Запись', author=self.first)
+        Comment.objects.create(text='Ответ', post=post, author=self.second)
+        alias = shards.for_author(self.first.pk)
+        self.assertEqual(list(self.posts(alias, self.first)), [post])
+        self.assertFalse(Post.objects.using('default').exists())
+        self.assertEqual(
+            Post.objects.using(alias).get(pk=post.pk).comments_count, 1
+        )
+        self.client.post(
+            reverse('add_comment', args=[self.first.username, post.pk]),
+            {'text': 'Ещё ответ'}
+        )
+        self.assertEqual(post.comments.count(), 2)
+
+    def test_pages_merge_posts_from_all_shards(self):
+        """Лента, подписки и профиль собирают записи из шардов по дате."""
+        Follow.objects.create(user=self.reader, author=self.first)
+        Follow.objects.create(user=self.reader, author=self.second)
+        created = [
+            Post.objects.create(text=f'Запись {number}', author=author)
+            for number in range(6)
+            for author in (self.first, self.second)
+        ][::-1]
+        for name in ('index', 'follow_index'):
+            response = self.client.get(reverse(name))
+            page = response.context['page']
+            self.assertEqual(list(page), created[:10])
+            response = self.client.get(
+                reverse(name), {'cursor': page.paginator.next_link.cursor}
+            )
+            self.assertEqual(list(response.context['page']), created[10:])
+        response = self.client.get(reverse('profile', args=['author0']))
+        self.assertEqual(
+            list(response.context['page']),
+            [post for post in created if post.author.username == 'author0']
+        )
+        post = created[0]
+        response = self.client.get(
+            reverse('post_view', args=[post.author.username, post.pk])
+        )
+        self.assertEqual(response.context['post'], post)
+
+    def test_rebalance_moves_authors_to_their_shards(self):
+        """Перенос из основной базы и между шардами после смены списка."""
+        with override_settings(POST_SHARDS=[]):
+            post = Post.objects.create(text='Старая', author=self.second)
+            Comment.objects.create(text='Ответ', post=post, author=self.first)
+        with override_settings(POST_SHARDS=SHARDS[:1]):
+            Post.objects.create(text='Новая', author=self.first)
+            Post.objects.create(text='Новая', author=self.second)
+            call_command('rebalance_shards', stdout=open(os.devnull, 'w'))
+            self.assertEqual(self.posts(SHARDS[0], self.second).count(), 2)
+        call_command('rebalance_shards', stdout=open(os.devnull, 'w'))
+        for alias, author in self.authors.items():
+            self.assertFalse(self.posts('default', author).exists())
+            self.assertEqual(
+                [alias], [
+                    shard for shard in SHARDS
+                    if self.posts(shard, author).exists()
+                ]
+            )
+        moved = Post.objects.using(shards.for_author(self.second.pk))
+        self.assertEqual(moved.get(pk=post.pk).comments.count(), 1)
+        self.assertEqual(shards.rebalance(), {})
+        self.assertEqual(settings.POST_SHARDS, SHARDS)
+
+    def test_interrupted_move_resumes(self):
+        """Повтор переноса после сбоя между коммитами не дублирует строки."""
+        source, target = SHARDS
+        author = self.authors[source]
+        post = Post.objects.create(text='Запись', author=author)
+        Comment.objects.create(text='Ответ', post=post, author=self.reader)
+        copied = Post.objects.using(source).get(pk=post.pk)
+        QuerySet(Post, using=target).bulk_create([copied])
+        self.assertEqual(shards.move(author.pk, source, target), 1)
+        self.assertFalse(self.posts(source, author).exists())
+        self.assertEqual(self.posts(target, author).count(), 1)
+        self.assertEqual(
+            Comment.objects.using(target).filter(post=post.pk).count(), 1
+        )
+
+    def test_processes_get_different_nodes(self):
+        """Два процесса не получают один номер для id."""
+        nodes = override_settings(
+            SNOWFLAKE_NODE=None,
+            SNOWFLAKE_NODES_FILE=os.path.join(self.directory, 'nodes')
+        )
+        nodes.enable()
+        self.addCleanup(nodes.disable)
+        node = shards.node_id()
+        context = multiprocessing.get_context('fork')
+        receiver, sender = context.Pipe(duplex=False)
+        child = context.Process(
+            target=lambda: sender.send(shards.node_id())
+        )
+        child.start()
+        child.join()
+        self.assertNotEqual(receiver.recv(), node)
+        self.assertEqual(
+            shards.next_id() >> 12 & 0x3ff, shards.next_id.node
+        )
+
+    def test_comments_authors_come_from_default_database(self):
+        """Комментарии записи в шарде показываются с авторами."""
+        post = Post.objects.create(text='Запись', author=self.first)
+        Comment.objects.create(text='Ответ', post=post, author=self.second)
+        response = self.client.get(
+            reverse('post_view', args=[self.first.username, post.pk])
+        )
+        self.assertEqual(
+            [comment.author for comment in response.context['comments']],
+            [self.second]
+        )
+
+    def test_recount_sees_posts_in_shards(self):
+        """Пересчёт складывает записи из всех шардов."""
+        group = Group.objects.create(title='Группа', slug='group')
+        for author in (self.first, self.second):
+            Post.objects.create(text='Запись', author=author, group=group)
+        Group.objects.update(posts_count=0)
+        UserStats.objects.update(posts_count=5)
+        call_command('recount', '--batch-size', '1', stdout=StringIO())
+        group.refresh_from_db()
+        self.assertEqual(group.posts_count, 2)
+        posts = dict(UserStats.objects.values_list('user', 'posts_count'))
+        self.assertEqual(posts.pop(self.first.pk), 1)
+        self.assertEqual(posts.pop(self.second.pk), 1)
+        self.assertEqual(set(posts.values()), {0})
+
+    def test_api_search_and_admin_read_shards(self):
+        """API, поиск и админка находят записи в шардах."""
+        posts = [
+            Post.objects.create(text='Коты и собаки', author=author)
+            for author in (self.first, self.second)
+        ][::-1]
+        Comment.objects.create(text='Ответ', post=posts[0], author=self.reader)
+        response = self.client.get('/api/v1/posts/')
+        self.assertEqual(
+            [post['id'] for post in response.json()],
+            [str(post.pk) for post in posts]
+        )
+        response = self.client.get(f'/api/v1/posts/{posts[0].pk}/comments/')
+        self.assertEqual(response.json()[0]['post'], str(posts[0].pk))
+        response = self.client.get(reverse('search'), {'q': 'кот'})
+        self.assertEqual(set(response.context['page']), set(posts))
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'password')
+        self.client.force_login(admin)
+        alias = shards.for_author(self.first.pk)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'shard': alias}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list),
+            [post for post in posts if post.author == self.first]
+        )
+        response = self.client.get(
+            reverse('admin:posts_post_change', args=[posts[0].pk])
+        )
+        self.assertEqual(response.context['original'], posts[0])
@@ -0,0 +1,111 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from posts import usernames
+from posts.models import Follow, User
+
+
+class UsernameIndexTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = {
+            username: User.objects.create(username=username)
+            for username in ('alexander', 'alexey', 'Alina', 'boris')
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.index = usernames.UsernameIndex()
+
+    def names(self, pks):
+        return [User.objects.get(pk=pk).username for pk in pks]
+
+    def test_prefix_and_fuzzy_search(self):
+        """Поиск по началу имени без учёта регистра и с опечаткой."""
+        self.assertEqual(
+            self.names(self.index.search('ALEX')), ['alexander', 'alexey']
+        )
+        self.assertEqual(self.names(self.index.search('al', 1)), ['alexander'])
+        self.assertEqual(self.names(self.index.search('borsi')), ['boris'])
+        self.assertEqual(self.index.search('zzz'), [])
+
+    def test_index_follows_user_changes(self):
+        """Новые, переименованные и удалённые пользователи учитываются."""
+        self.index.search('a')
+        User.objects.create(username='alla')
+        self.assertIn('alla', self.names(self.index.search('all')))
+        user = self.users['boris']
+        user.username = 'bogdan'
+        user.save()
+        self.assertEqual(self.names(self.index.search('bo')), ['bogdan'])
+        User.objects.create(username='borislav').delete()
+        self.assertEqual(self.index.search('borislav'), [])
+
+    def test_only_renames_touch_index(self):
+        """Вход не меняет индекс, переименование не пересобирает его."""
+        self.index.search('a')
+        user = self.users['boris']
+        user.last_login = timezone.now()
+        user.save()
+        with self.assertNumQueries(0):
+            self.index.search('bo')
+        user.username = 'bogdan'
+        user.save()
+        with mock.patch.object(self.index, 'clear') as clear:
+            self.assertEqual(self.names(self.index.search('bo')), ['bogdan'])
+        clear.assert_not_called()
+
+    def test_follow_search_and_autocomplete_api(self):
+        """Подписки ищутся с опечатками, автодополнение отдаёт имена."""
+        reader = User.objects.create(username='reader')
+        for author in self.users.values():
+            Follow.objects.create(user=reader, author=author)
+        client = APIClient()
+        client.force_authenticate(reader)
+        response = client.get('/api/v1/follow/', {'search': 'lex'})
+        self.assertEqual(
+            sorted(follow['author'] for follow in response.json()),
+            ['alexander', 'alexey']
+        )
+        response = client.get('/api/v1/follow/', {'search': 'alina'})
+        self.assertEqual(len(response.json()), 1)
+        response = client.get('/api/v1/follow/', {'search': 'zzz'})
+        self.assertEqual(response.json(), [])
+        response = client.get('/api/v1/follow/', {'search': 'borris'})
+        self.assertEqual(
+            [follow['author'] for follow in response.json()], ['boris']
+        )
+        response = client.get('/api/v1/follow/', {'search': 'is'})
+        self.assertEqual(
+            [follow['author'] for follow in response.json()], ['boris']
+        )
+        response = client.get('/api/v1/autocomplete/', {'q': 'ali'})
+        self.assertEqual(
+            response.json(),
+            [{'id': self.users['Alina'].pk, 'username': 'Alina'}]
+        )
+
+    def test_follow_search_is_not_limited_by_other_users(self):
+        """Подписку находит, даже если похожих чужих имён больше сотен."""
+        User.objects.bulk_create(
+            User(username=f'alex_{number:03}')
+            for number in range(usernames.MAX_CANDIDATES + 50)
+        )
+        usernames.changed()
+        reader = User.objects.create(username='reader')
+        author = User.objects.create(username='alex_zz')
+        Follow.objects.create(user=reader, author=author)
+        client = APIClient()
+        client.force_authenticate(reader)
+        for query in ('alex', 'ex_z', 'alex_zy'):
+            with self.subTest(query=query):
+                response = client.get('/api/v1/follow/', {'search': query})
+                self.assertEqual(
+                    [follow['author'] for follow in response.json()],
+                    ['alex_zz']
+                )
@@ -193,13 +193,34 @@ class PostsPagesTests(TestCase):
         page = response_1.context['page']
         paginator = page.paginator
         self.assertEqual(paginator.num_pages, 1)
-        expected.delete()
+        Post.objects.filter(pk=expected.pk).update(text='мимо сигналов')
         response_2 = self.authorized_client.get(path)
         self.assertEqual(response_2.content, response_1.content)
-        cache.clear()
+        expected.delete()
         response_3 = self.authorized_client.get(path)
         self.assertNotEqual(response_3.content, response_1.content)
 
+    def test_cache_pages_invalidated_by_comment(self):
+        """Новый комментарий сбрасывает кэш страниц со списком записей."""
+        kwargs_group = {'slug': self.group.slug}
+        kwargs_profile = {'username': self.user.username}
+        path_list = [
+            reverse('index'),
+            reverse('group_posts', kwargs=kwargs_group),
+            reverse('profile', kwargs=kwargs_profile),
+        ]
+        cache.clear()
+        responses = {
+            path: self.authorized_client.get(path) for path in path_list
+        }
+        Comment.objects.create(
+            text='ещё комментарий', post=self.post, author=self.user
+        )
+        for path, response in responses.items():
+            with self.subTest(path=path):
+                new_response = self.authorized_client.get(path)
+                self.assertNotEqual(new_response.content, response.content)
+
 
 class PaginatorViewsTest(TestCase):
     @classmethod
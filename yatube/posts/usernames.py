@@ -0,0 +1,201 @@
+import bisect
+import threading
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.db import connections, router, transaction
+from django.db.models import Max
+
+from posts import models, versions
+
+MAX_TRIGRAMS = 24
+MAX_POSTINGS = 2000
+MAX_CANDIDATES = 200
+MIN_SIMILARITY = 0.3
+
+
+def trigrams(name):
+    padded = f'  {name} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(query, name):
+    query, name = trigrams(query), trigrams(name)
+    return len(query & name) / len(query | name)
+
+
+class UsernameIndex:
+    """
+    Индекс имён пользователей в памяти процесса.
+
+    Отсортированный список имён отвечает на поиск по началу имени за
+    O(log N + limit), триграммы — на поиск с опечатками; просматривается
+    не больше MAX_POSTINGS id на триграмму и MAX_CANDIDATES кандидатов,
+    поэтому время ответа не зависит от числа пользователей. Новые
+    пользователи и записи UsernameChange о переименованиях и удалениях
+    меняют версию 'usernames': по ней каждый процесс догружает только
+    новых пользователей и изменения после последней сверки.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.version = None
+        self.clear()
+
+    def clear(self):
+        self.names = []
+        self.usernames = {}
+        self.postings = defaultdict(set)
+        self.last_pk = 0
+        self.last_change = 0
+
+    def add(self, pk, username):
+        self.remove(pk)
+        name = username.lower()
+        bisect.insort(self.names, (name, pk))
+        self.usernames[pk] = username
+        for trigram in trigrams(name):
+            self.postings[trigram].add(pk)
+        self.last_pk = max(self.last_pk, pk)
+
+    def remove(self, pk):
+        username = self.usernames.pop(pk, None)
+        if username is None:
+            return
+        name = username.lower()
+        del self.names[bisect.bisect_left(self.names, (name, pk))]
+        for trigram in trigrams(name):
+            self.postings[trigram].discard(pk)
+
+    def sync(self):
+        version = versions.get('usernames')
+        with self.lock:
+            if self.version == version:
+                return
+            if self.version is None:
+                # Изменения до этой точки уже видны в самих пользователях.
+                self.last_change = models.UsernameChange.objects.aggregate(
+                    last=Max('pk')
+                )['last'] or 0
+            for change, pk, username in self.changes():
+                self.last_change = max(self.last_change, change)
+                if username is None:
+                    self.remove(pk)
+                else:
+                    self.add(pk, username)
+            self.version = version
+
+    def changes(self):
+        """
+        Одним запросом: изменения из журнала с текущими именами (None —
+        пользователь удалён) и пользователи новее уже загруженных.
+        """
+        change, user = (
+            model._meta.db_table
+            for model in (models.UsernameChange, models.User)
+        )
+        using = router.db_for_read(models.UsernameChange)
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f'SELECT c.id, c.user_id, u.username FROM {change} c '
+                f'LEFT JOIN {user} u ON u.id = c.user_id WHERE c.id > %s '
+                f'UNION ALL SELECT 0, id, username FROM {user} WHERE id > %s',
+                [self.last_change, self.last_pk]
+            )
+            return cursor.fetchall()
+
+    def prefix(self, query, limit):
+        start = bisect.bisect_left(self.names, (query,))
+        found = self.names[start:start + limit]
+        return [pk for name, pk in found if name.startswith(query)]
+
+    def fuzzy(self, query, limit):
+        query_trigrams = list(trigrams(query))[:MAX_TRIGRAMS]
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(islice(self.postings.get(trigram, ()), MAX_POSTINGS))
+        scored = []
+        for pk, count in shared.most_common(MAX_CANDIDATES):
+            name = self.usernames[pk].lower()
+            score = count / (len(query_trigrams) + len(trigrams(name)) - count)
+            if score >= MIN_SIMILARITY:
+                scored.append((-score, name, pk))
+        return [pk for _, _, pk in sorted(scored)[:limit]]
+
+    def contains(self, query, limit):
+        """Имена с подстрокой: кандидаты — из самой редкой триграммы."""
+        inner = [query[i:i + 3] for i in range(len(query) - 2)]
+        if not inner:
+            return []
+        rarest = min(
+            (self.postings.get(trigram, ()) for trigram in inner), key=len
+        )
+        found = sorted(
+            (self.usernames[pk].lower(), pk)
+            for pk in islice(rarest, MAX_POSTINGS)
+            if query in self.usernames[pk].lower()
+        )
+        return [pk for _, pk in found[:limit]]
+
+    def search(self, query, limit=10):
+        query = query.strip().lower()
+        if not query:
+            return []
+        self.sync()
+        with self.lock:
+            return self.prefix(query, limit) or self.fuzzy(query, limit)
+
+    def matching(self, query, limit=MAX_CANDIDATES, candidates=None):
+        """
+        Поиск для фильтров: сначала начало имени, затем подстрока, а
+        если нет ни того, ни другого — похожие имена. С candidates
+        ищет только среди этих pk, например авторов подписок.
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+        self.sync()
+        with self.lock:
+            if candidates is not None:
+                return self.among(query, candidates, limit)
+            found = self.prefix(query, limit)
+            found += [
+                pk for pk in self.contains(query, limit) if pk not in found
+            ]
+            return found[:limit] or self.fuzzy(query, limit)
+
+    def among(self, query, candidates, limit):
+        """
+        Тот же порядок поиска перебором небольшого набора pk: глобальные
+        кандидаты могли бы его не задеть, а подстрока короче триграммы
+        ищется и так.
+        """
+        names = sorted(
+            (self.usernames[pk].lower(), pk)
+            for pk in candidates if pk in self.usernames
+        )
+        found = [pk for name, pk in names if name.startswith(query)]
+        found += [
+            pk for name, pk in names
+            if query in name and not name.startswith(query)
+        ]
+        if found:
+            return found[:limit]
+        scored = sorted(
+            (-similarity(query, name), name, pk) for name, pk in names
+        )
+        return [
+            pk for score, _, pk in scored if -score >= MIN_SIMILARITY
+        ][:limit]
+
+
+index = UsernameIndex()
+
+
+def changed(user_id=None):
+    """Новый пользователь или, с user_id, переименование и удаление."""
+    if user_id is not None:
+        models.UsernameChange.objects.create(user_id=user_id)
+    # Процесс, сверившийся до коммита, догрузит строки по второй версии.
+    versions.bump('usernames')
+    transaction.on_commit(lambda: versions.bump('usernames'))
@@ -0,0 +1,50 @@
+import time
+
+from django.core.cache import cache
+
+from posts import models, shards
+
+
+def now():
+    return int(time.time() * 1000000)
+
+
+def get(*names):
+    """Версии кэша по именам; версия — время последнего изменения в мкс."""
+    keys = [f'version:{name}' for name in names]
+    found = cache.get_many(keys)
+    missing = {key: now() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return '.'.join(str(found[key]) for key in keys)
+
+
+def bump(*names):
+    version = now()
+    cache.set_many({f'version:{name}': version for name in names}, None)
+
+
+def changed(model, objs):
+    names = {'posts'}
+    if model is models.Follow:
+        names = set()
+        for follow in objs:
+            names.add(f'follows:{follow.user_id}')
+            names.add(f'followers:{follow.author_id}')
+    elif model is models.Group:
+        names.update(f'group:{group.pk}' for group in objs)
+    else:
+        if model is models.Comment:
+            objs = [
+                post
+                for using, comments in shards.by_database(objs)
+                for post in models.Post.objects.using(using).filter(
+                    pk__in={comment.post_id for comment in comments}
+                ).only('author', 'group')
+            ]
+        for post in objs:
+            group_ids = {post.group_id, getattr(post, 'loaded_group_id', None)}
+            names.add(f'author:{post.author_id}')
+            names.update(f'group:{pk}' for pk in group_ids if pk)
+    bump(*names)
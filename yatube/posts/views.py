@@ -2,39 +2,54 @@ from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, redirect, render
 
-from posts import forms, models
+from posts import conditional, feed, forms, models, search, shards, versions
+from posts.paginator import KeysetPaginator
 
 
-def index(request):
-    post_list = models.Post.objects.all()
-    paginator = Paginator(post_list, 10)
+def paginate(request, object_list, **kwargs):
+    paginator = KeysetPaginator(object_list, 10, **kwargs)
     page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    cursor = request.GET.get('cursor')
+    return paginator.get_page(page_number, cursor)
+
+
+def render_feed(request, template_name, context):
+    if 'partial' in request.GET:
+        template_name = 'post_list.html'
+    return render(request, template_name, context)
+
+
+@conditional.conditional_page(conditional.index_scope)
+def index(request):
+    post_list = shards.scatter(models.Post.objects.with_related())
+    page = paginate(request, post_list)
     index = {
-        'page': page
+        'page': page,
+        'version': versions.get('posts'),
     }
-    return render(request, 'index.html', index)
+    return render_feed(request, 'index.html', index)
 
 
+@conditional.conditional_page(conditional.group_scope)
 def group_posts(request, slug):
     group = get_object_or_404(models.Group, slug=slug)
-    post_list = group.posts.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = shards.scatter(group.posts.with_related())
+    page = paginate(request, post_list)
     group_posts = {
         'group': group,
         'page': page,
+        'version': versions.get(f'group:{group.pk}'),
     }
-    return render(request, 'group.html', group_posts)
+    return render_feed(request, 'group.html', group_posts)
 
 
+@conditional.conditional_page(conditional.profile_scope)
 def profile(request, username):
-    author = get_object_or_404(models.User, username=username)
-    post_list = author.posts.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    author = get_object_or_404(
+        models.User.objects.select_related('stats'), username=username
+    )
+    post_list = author.posts.with_related()
+    page = paginate(request, post_list)
     following = request.user.is_authenticated and (
         models.Follow.objects.filter(
             user=request.user, author=author
@@ -44,24 +59,40 @@ def profile(request, username):
         'author': author,
         'page': page,
         'following': following,
+        'version': versions.get(f'author:{author.pk}'),
     }
-    return render(request, 'profile.html', profile)
+    return render_feed(request, 'profile.html', profile)
 
 
+@conditional.conditional_page(conditional.post_scope)
 def post_view(request, username, post_id):
-    post = get_object_or_404(
-        models.Post, pk=post_id, author__username=username
+    post = shards.post_or_404(
+        models.Post.objects.with_related('author__stats'), username, post_id
     )
-    comments = post.comments.all()
+    comments = post.comments.with_related('author')
     form = forms.CommentForm()
     post_view = {
         'post': post,
+        'author': post.author,
         'comments': comments,
         'form': form,
     }
     return render(request, 'post.html', post_view)
 
 
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    post_list = search.search(
+        query, shards.scatter(models.Post.objects.with_related())
+    )
+    page = Paginator(post_list, 10).get_page(request.GET.get('page'))
+    search_posts = {
+        'query': query,
+        'page': page,
+    }
+    return render(request, 'search.html', search_posts)
+
+
 @login_required
 def new_post(request):
     form = forms.PostForm(request.POST or None, files=request.FILES or None)
@@ -78,9 +109,7 @@ def new_post(request):
 
 @login_required
 def post_edit(request, username, post_id):
-    post = get_object_or_404(
-        models.Post, pk=post_id, author__username=username
-    )
+    post = shards.post_or_404(models.Post.objects.all(), username, post_id)
     if request.user != post.author:
         return redirect('post_view', username=username, post_id=post_id)
     form = forms.PostForm(
@@ -98,9 +127,7 @@ def post_edit(request, username, post_id):
 
 @login_required
 def add_comment(request, username, post_id):
-    post = get_object_or_404(
-        models.Post, pk=post_id, author__username=username
-    )
+    post = shards.post_or_404(models.Post.objects.all(), username, post_id)
     form = forms.CommentForm(request.POST or None)
     if form.is_valid():
         form = form.save(commit=False)
@@ -113,14 +140,17 @@ def add_comment(request, username, post_id):
 @login_required
 def follow_index(request):
     follower = request.user
-    post_list = models.Post.objects.filter(author__following__user=follower)
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    if shards.enabled():
+        page = paginate(request, shards.following(follower))
+    else:
+        entry_list = feed.timeline(follower)
+        page = paginate(request, entry_list, keys=('pub_date', 'post_id'))
+        page.object_list = feed.posts(page.object_list)
     follow_index = {
         'page': page,
+        'version': versions.get('posts', f'follows:{follower.pk}'),
     }
-    return render(request, 'follow.html', follow_index)
+    return render_feed(request, 'follow.html', follow_index)
 
 
 @login_required
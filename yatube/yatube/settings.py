@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 
 from dotenv import load_dotenv
@@ -6,10 +7,14 @@ from dotenv import load_dotenv
 load_dotenv()
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Файлы, общие для процессов хоста: кэш, номера процессов.
+RUNTIME_DIR = (
+    '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+)
 
 SECRET_KEY = os.getenv('SECRET_KEY', 'default')
 
-DEBUG = True
+DEBUG = os.getenv('DEBUG', 'True') == 'True'
 
 ALLOWED_HOSTS = ['*']
 
@@ -22,27 +27,42 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'sorl.thumbnail',
-    'debug_toolbar',
     'rest_framework',
     'djoser',
     'api',
     'about',
     'users',
     'posts',
+    'core',
 ]
 
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.QueryStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+if DEBUG:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv('SERVER_TIMING_SAMPLE_RATE', 1))
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+PROFILES_DIR = os.getenv('PROFILES_DIR', os.path.join(BASE_DIR, 'profiles'))
+PROFILE_LINK_MAX_AGE = 60 * 10
+SQL_STATS_ENABLED = os.getenv('SQL_STATS', 'False') == 'True'
+SQL_STATS_FLUSH_INTERVAL = 10
+SQL_SLOW_QUERY_MS = float(os.getenv('SQL_SLOW_QUERY_MS', 100))
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
@@ -71,13 +91,65 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
+SQLITE_OPTIONS = {
+    'transaction_mode': 'IMMEDIATE',
+    'init_command': ';'.join([
+        'PRAGMA auto_vacuum = INCREMENTAL',
+        'PRAGMA journal_mode = WAL',
+        'PRAGMA synchronous = NORMAL',
+        'PRAGMA busy_timeout = 5000',
+        'PRAGMA mmap_size = 268435456',
+        'PRAGMA cache_size = -20000',
+        'PRAGMA temp_store = MEMORY',
+    ]),
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': int(os.getenv('DATABASE_CONN_MAX_AGE', 600)),
+        'OPTIONS': SQLITE_OPTIONS,
     }
 }
 
+REPLICA_DATABASES = []
+for number, name in enumerate(
+    filter(None, os.getenv('DATABASE_REPLICAS', '').split(',')), 1
+):
+    REPLICA_DATABASES.append(f'replica_{number}')
+    DATABASES[f'replica_{number}'] = {
+        'ENGINE': 'core.backends.sqlite3',
+        'NAME': name,
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'OPTIONS': SQLITE_OPTIONS,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+POST_SHARDS = []
+for number, name in enumerate(
+    filter(None, os.getenv('POST_SHARDS', '').split(',')), 1
+):
+    POST_SHARDS.append(f'shard_{number}')
+    DATABASES[f'shard_{number}'] = {
+        'ENGINE': 'core.backends.sqlite3',
+        'NAME': name,
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'OPTIONS': {**SQLITE_OPTIONS, 'foreign_keys': False},
+    }
+
+# Номер процесса в id записей, 0..1023. Без него процесс занимает
+# свободный номер блокировкой в SNOWFLAKE_NODES_FILE.
+SNOWFLAKE_NODE = os.getenv('SNOWFLAKE_NODE')
+if SNOWFLAKE_NODE is not None:
+    SNOWFLAKE_NODE = int(SNOWFLAKE_NODE)
+SNOWFLAKE_NODES_FILE = os.getenv(
+    'SNOWFLAKE_NODES_FILE', os.path.join(RUNTIME_DIR, 'yatube_nodes')
+)
+
+DATABASE_ROUTERS = ['posts.shards.ShardRouter', 'core.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = 5
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -124,8 +196,24 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+            'L1_TIMEOUT': 300,
+            'GENERATION_INTERVAL': 1,
+            'IMMUTABLE_NAMESPACES': ['post_card', 'template'],
+        },
+    },
+    # Общий для процессов хоста: по нему воркеры видят новые версии.
+    'shared': {
+        'BACKEND': os.getenv(
+            'SHARED_CACHE_BACKEND', 'core.mmap_cache.SharedMemoryCache'
+        ),
+        'LOCATION': os.getenv(
+            'SHARED_CACHE_LOCATION', os.path.join(RUNTIME_DIR, 'yatube_cache')
+        ),
+    },
 }
 
 REST_FRAMEWORK = {
@@ -141,3 +229,29 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
+
+THUMBNAIL_BACKEND = 'core.thumbnails.TimedThumbnailBackend'
+
+FEED_FANOUT_LIMIT = 5000
+FEED_BACKFILL_SIZE = 500
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # В разработке те же данные показывает панель отладки.
+        'core.timing': {
+            'handlers': ['console'],
+            'level': 'WARNING' if DEBUG else 'INFO',
+        },
+        'core.querystats': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}